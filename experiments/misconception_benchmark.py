@@ -0,0 +1,92 @@
+"""
+Time misconception rule dispatch with and without the operator index.
+
+getAllApplicableMisconceptions applies every MisconceptionCode's rules to a
+formula. Unindexed, each rule probes every node of the formula
+(codebook.applyTilFirstRandom without an index). Indexed, one
+codebook.MutationSiteIndex per formula lets rules whose trigger operators
+are absent be skipped, and the rest probe only their candidate sites.
+
+This applies every misconception, at a random site, to every formula in
+semantic_benchmark_*.csv and static/ltl_formula_suggestions.json (as
+experiments/parser_benchmark.py loads them), both ways, checks that both
+find the same misconceptions, and reports formulas per second (best of
+--repeat runs). The final equivalence filter of
+getAllApplicableMisconceptions is SPOT work common to both and is left out.
+
+Run from the repo root:  python3 experiments/misconception_benchmark.py [--repeat N]
+Imports codebook, and so needs the same environment as the app.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import codebook  # noqa: E402
+from codebook import MisconceptionCode, MutationSiteIndex, MISCONCEPTION_RULES  # noqa: E402
+import ltlnode  # noqa: E402
+from parser_benchmark import load_formulas, parseable  # noqa: E402
+
+
+def unindexed(node):
+    """The misconceptions found by probing every node for every rule."""
+    found = []
+    for code in MisconceptionCode:
+        for f in MISCONCEPTION_RULES.get(code, []):
+            res = codebook.applyTilFirstRandom(node, f)
+            if res.misconception:
+                found.append(res.misconception)
+                break
+    return found
+
+
+def indexed(node):
+    """The misconceptions found through one MutationSiteIndex of `node`."""
+    index = MutationSiteIndex(node)
+    results = [codebook.applyMisconception(node, code, randomize_location=True, index=index)
+               for code in MisconceptionCode]
+    return [res.misconception for res in results if res.misconception]
+
+
+def throughput(apply, nodes, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        random.seed(0)
+        start = time.perf_counter()
+        for node in nodes:
+            apply(node)
+        best = min(best, time.perf_counter() - start)
+    return len(nodes) / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per variant (best is reported)")
+    args = parser.parse_args()
+
+    ltlnode.set_parser_backend("precedence")
+    nodes = [ltlnode.parse_ltl_string(text) for text in parseable(load_formulas())]
+    mismatches = [n for n in nodes if unindexed(n) != indexed(n)]
+    sizes = sorted(n.size for n in nodes)
+    print(f"{len(nodes)} formulas (median size {sizes[len(sizes) // 2]}, largest {sizes[-1]}); "
+          f"{len(mismatches)} find different misconceptions")
+    for node in mismatches[:10]:
+        print(f"  mismatch: {node}")
+
+    rates = {
+        "unindexed": throughput(unindexed, nodes, args.repeat),
+        "indexed": throughput(indexed, nodes, args.repeat),
+    }
+    print(f"\n{'dispatch':<12}{'formulas/s':>12}")
+    for name, rate in rates.items():
+        print(f"{name:<12}{rate:>12.0f}")
+    print(f"\nspeedup: {rates['indexed'] / rates['unindexed']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
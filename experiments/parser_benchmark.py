@@ -0,0 +1,112 @@
+"""
+Compare parse throughput of the two ltlnode parser backends.
+
+ltlnode.parse_ltl_string can run the ANTLR grammar (ltl.g4) or the
+hand-written precedence-climbing parser in precedenceparser.py (see
+ltlnode.PARSER_BACKENDS). This parses every formula in
+semantic_benchmark_*.csv and static/ltl_formula_suggestions.json with
+each backend, checks that both produce the same tree, and reports formulas
+per second (best of --repeat runs over the whole set).
+
+Run from the repo root:  python3 experiments/parser_benchmark.py [--repeat N]
+Imports ltlnode, and so needs the same environment as the app.
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import time
+from contextlib import redirect_stderr
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+import ltlnode  # noqa: E402
+import precedenceparser  # noqa: E402
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+BENCHMARK_FILES = ["semantic_benchmark_near_eng.csv", "semantic_benchmark_far_eng.csv"]
+SUGGESTIONS_FILE = os.path.join("src", "static", "ltl_formula_suggestions.json")
+
+
+def load_formulas():
+    formulas = []
+    for name in BENCHMARK_FILES:
+        with open(os.path.join(REPO_ROOT, name), newline="") as f:
+            for row in csv.DictReader(f):
+                for column in ("ltl_formula", "closest_mutant_formula"):
+                    text = (row.get(column) or "").strip()
+                    if text:
+                        formulas.append(text)
+    suggestions = os.path.join(REPO_ROOT, SUGGESTIONS_FILE)
+    if os.path.exists(suggestions):
+        with open(suggestions) as f:
+            formulas.extend(_strings(json.load(f)))
+    return list(dict.fromkeys(formulas))
+
+
+def _strings(data):
+    """Formula strings anywhere in the suggestions JSON."""
+    if isinstance(data, str):
+        yield data
+    elif isinstance(data, list):
+        for item in data:
+            yield from _strings(item)
+    elif isinstance(data, dict):
+        for key in ("formula", "ltl"):
+            if isinstance(data.get(key), str):
+                yield data[key]
+        for value in data.values():
+            if isinstance(value, (list, dict)):
+                yield from _strings(value)
+
+
+def parseable(formulas):
+    """The formulas the grammar derives (the precedence parser accepts them)."""
+    accepted = []
+    for text in formulas:
+        try:
+            precedenceparser.parse(text)
+        except precedenceparser.LTLParseError:
+            continue
+        accepted.append(text)
+    return accepted
+
+
+def throughput(parse, formulas, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in formulas:
+            parse(text)
+        best = min(best, time.perf_counter() - start)
+    return len(formulas) / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per backend (best is reported)")
+    args = parser.parse_args()
+
+    formulas = parseable(load_formulas())
+    with redirect_stderr(io.StringIO()):
+        mismatches = [t for t in formulas
+                      if str(ltlnode.parse_ltl_string_antlr(t)) != str(precedenceparser.parse(t))]
+    print(f"{len(formulas)} distinct formulas; {len(mismatches)} parse differently")
+    for text in mismatches[:10]:
+        print(f"  mismatch: {text}")
+
+    rates = {
+        "antlr": throughput(ltlnode.parse_ltl_string_antlr, formulas, args.repeat),
+        "precedence": throughput(precedenceparser.parse, formulas, args.repeat),
+    }
+    print(f"\n{'backend':<12}{'formulas/s':>12}")
+    for name, rate in rates.items():
+        print(f"{name:<12}{rate:>12.0f}")
+    print(f"\nspeedup: {rates['precedence'] / rates['antlr']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Compare SPOT translation optimization levels on the repo's benchmark formulas.
+
+spotutils could translate at 'low' effort for emptiness checks and size
+estimates, keeping 'high' effort where an automaton's traces are shown to
+students (see TRANSLATION_PROFILES). This measures what that trade would buy,
+and must be run before the 'check' and 'size' profiles are lowered: for every
+formula in semantic_benchmark_*.csv, and at each level,
+
+  - translation time for the formula and its negation (no caching),
+  - automaton size (states / edges), and
+  - the time of an inclusion check f => f, i.e. a product with the negation
+    and an emptiness check, the operation the 'check' profile serves.
+
+Run from the repo root:  python3 experiments/translation_profiles.py [--repeat N]
+Needs the real SPOT bindings.
+"""
+
+import argparse
+import csv
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+import spot  # noqa: E402
+from spotutils import TRANSLATION_LEVELS  # noqa: E402
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+BENCHMARK_FILES = ["semantic_benchmark_near_eng.csv", "semantic_benchmark_far_eng.csv"]
+
+
+def load_formulas():
+    formulas = []
+    for name in BENCHMARK_FILES:
+        with open(os.path.join(REPO_ROOT, name), newline="") as f:
+            for row in csv.DictReader(f):
+                for column in ("ltl_formula", "closest_mutant_formula"):
+                    text = (row.get(column) or "").strip()
+                    if text:
+                        formulas.append(text)
+    return list(dict.fromkeys(formulas))
+
+
+def measure(formula, level):
+    f = spot.formula(formula)
+    nf = spot.formula.Not(f)
+
+    start = time.perf_counter()
+    aut = f.translate(level)
+    naut = nf.translate(level)
+    translate_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    spot.product(aut, naut).is_empty()
+    check_seconds = time.perf_counter() - start
+
+    return translate_seconds, check_seconds, aut.num_states(), aut.num_edges()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3, help="runs per formula and level (median is reported)")
+    args = parser.parse_args()
+
+    formulas = load_formulas()
+    print(f"{len(formulas)} distinct formulas from {', '.join(BENCHMARK_FILES)}; median of {args.repeat} runs\n")
+
+    rows = []
+    for level in TRANSLATION_LEVELS:
+        translate_ms, check_ms, states, edges = [], [], [], []
+        for formula in formulas:
+            runs = [measure(formula, level) for _ in range(args.repeat)]
+            translate_ms.append(1000 * statistics.median(r[0] for r in runs))
+            check_ms.append(1000 * statistics.median(r[1] for r in runs))
+            states.append(runs[0][2])
+            edges.append(runs[0][3])
+        rows.append((level, sum(translate_ms), max(translate_ms), sum(check_ms),
+                     statistics.mean(states), statistics.mean(edges)))
+
+    print(f"{'level':<8}{'translate total':>17}{'translate max':>15}{'check total':>13}{'mean states':>13}{'mean edges':>12}")
+    for level, total, worst, check, mean_states, mean_edges in rows:
+        print(f"{level:<8}{total:>14.1f} ms{worst:>12.2f} ms{check:>10.1f} ms{mean_states:>13.2f}{mean_edges:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,7 +3,6 @@ from flask_login import login_required, current_user
 
 
 from ltlnode import parse_ltl_string, SUPPORTED_SYNTAXES
-from codebook import getAllApplicableMisconceptions
 import os
 import json
 import sys
@@ -17,11 +16,14 @@ import exerciseprocessor
 import exercisebuilder
 import random
 import spotutils
+import spotpool
+import distractorcache
 from itertools import chain
 from collections import Counter, defaultdict
 import uuid
 import requests
-from stepper import traceSatisfactionPerStep, getTraceRenderData
+import stepper
+from stepper import traceSatisfactionPerStep, matrixTraceSatisfaction, getTraceRenderData
 import ltltoeng_prose
 from authroutes import (
     authroutes,
@@ -69,6 +71,27 @@ def enforce_https_in_production():
         return redirect(secure_url, code=301)
 
 answer_logger = Logger()
+
+## Implication/disjointness results shared by every worker on this machine.
+## Set RELATION_CACHE_PATH to an empty string to keep them in-process only.
+RELATION_CACHE_PATH = os.getenv('RELATION_CACHE_PATH',
+                                default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'db', 'relation_cache.db'))
+spotutils.configure_relation_cache(RELATION_CACHE_PATH or None)
+
+## Merged misconception distractors per canonical answer formula, shared the
+## same way. Set DISTRACTOR_CACHE_PATH to an empty string to keep them in-process only.
+DISTRACTOR_CACHE_PATH = os.getenv('DISTRACTOR_CACHE_PATH',
+                                  default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'db', 'distractor_cache.db'))
+distractorcache.configure(DISTRACTOR_CACHE_PATH or None)
+
+## SPOT calls on user-entered formulas (stepper, question authoring, trace
+## suggestions) run in worker processes with a per-call time and memory limit.
+## Set SPOT_POOL_PROCESSES=0 to run them in-process instead.
+spotpool.configure(int(os.getenv('SPOT_POOL_PROCESSES', default='2')),
+                   timeout=float(os.getenv('SPOT_CALL_TIMEOUT', default=str(spotpool.DEFAULT_TIMEOUT_SECONDS))),
+                   memory_limit_mb=int(os.getenv('SPOT_MEMORY_LIMIT_MB', default=str(spotpool.DEFAULT_MEMORY_LIMIT_MB))),
+                   max_calls_per_worker=int(os.getenv('SPOT_WORKER_MAX_CALLS', default=str(spotpool.DEFAULT_MAX_CALLS_PER_WORKER))))
+
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
 
 BENCHMARK_FILES = {
@@ -595,34 +618,30 @@ def authorquestion():
             return "Invalid question type"
         
         
-        d = getAllApplicableMisconceptions(ltl)
-        distractors = []
-        for misconception in d:
-            distractors.append({
-                "formula": str(misconception.node),
-                "code": str(misconception.misconception)
-            })
-
-        # Merge labels for equal formulae
-        mergedDistractors = []
-        for distractor in distractors:
-            existingDistractor = next((d for d in mergedDistractors if d['formula'] == distractor['formula']), None)
-            if existingDistractor:
-                existingDistractor['code'] += f", {distractor['code']}"
-            else:
-                mergedDistractors.append(distractor)
-
-        distractors = mergedDistractors
+        options = distractorcache.distractor_set(
+            ltl, compute=lambda canonical: spotpool.run(distractorcache.build_distractor_set, canonical))
+        distractors = [{
+            "formula": option["formula"],
+            "code": ", ".join(option["misconceptions"])
+        } for option in options]
         new_distractors = []
         added_traces = set([exerciseprocessor.canonicalizeSpotTrace(answer)])
         ## IF the kind is trace satisfaction_mc, we need to generate traces for each distractor:
         if kind == "tracesatisfaction_mc" or kind == "tracesatisfaction_yn":
             # This is only true for trace_satisaction questions
             answer_formula = question
-            
+
+            ## The set has every misconception site; one trace per
+            ## misconception keeps the SPOT calls below bounded.
+            options = distractorcache.one_per_misconception(options)
+            distractors = [{
+                "formula": option["formula"],
+                "code": ", ".join(option["misconceptions"])
+            } for option in options]
+
             for distractor in distractors:
                 f = distractor['formula']
-                potential_trace_choices = spotutils.generate_traces(f_accepted=f, f_rejected=answer_formula, max_traces=10)
+                potential_trace_choices = spotpool.run(spotutils.generate_traces, f_accepted=f, f_rejected=answer_formula, max_traces=10)
                 potential_trace_choices = [exerciseprocessor.canonicalizeSpotTrace(t) for t in potential_trace_choices]
                 potential_trace_choices = list(dict.fromkeys(potential_trace_choices))
                 trace_choices = [t for t in potential_trace_choices if t not in added_traces]
@@ -648,6 +667,13 @@ def authorquestion():
         return render_template('authorquestion.html', uid = getUserName(), distractors=distractors, error="", answer=answer, question=question, exerciseset = exercise_so_far, kind = kind)
     
     
+    except spotpool.SpotLimitError as e:
+        distractors = [{
+            "formula": "-",
+            "code": "Could not determine applicable distractors."
+        }]
+        return render_template('authorquestion.html', uid = getUserName(), error=f"This formula is too expensive to analyze: {e}", distractors=distractors, answer=answer, question=question, exerciseset = exercise_so_far, kind = kind)
+
     except Exception as e:
         distractors = [{
             "formula": "-",
@@ -1169,16 +1195,83 @@ def ltlstepper():
     except:
         return render_template('stepper.html', uid = getUserName(), error="Invalid LTL formula " + ltl, prefixstates=[], cyclestates=[], matrix_data={"subformulae": [], "matrix": [], "rows": []}, trace_render_data=empty_trace_data, stepper_tree_html="", stepper_steps=empty_steps)
 
+    ## Repeat submissions (e.g. an example projected in lecture) are served from cache.
+    view = stepper.cachedStepperView(node, trace, syntax_choice) if trace else None
+    if view is None:
+        try:
+            ## Most traces are evaluated natively, in-process; only the rest need SPOT.
+            result = matrixTraceSatisfaction(node = node, trace = trace, syntax = syntax_choice)
+            if result is None:
+                result = spotpool.run(traceSatisfactionPerStep, node = node, trace = trace, syntax = syntax_choice)
+            view = stepper.cacheStepperView(node, trace, syntax_choice, result)
+        except spotpool.SpotLimitError as e:
+            return render_template('stepper.html', uid = getUserName(), error="Could not evaluate this formula on this trace. " + str(e), prefixstates=[], cyclestates=[], matrix_data={"subformulae": [], "matrix": [], "rows": []}, trace_render_data=empty_trace_data, stepper_tree_html="", stepper_steps=empty_steps)
+        except:
+            return render_template('stepper.html', uid = getUserName(), error="Invalid trace " + trace, prefixstates=[], cyclestates=[], matrix_data={"subformulae": [], "matrix": [], "rows": []}, trace_render_data=empty_trace_data, stepper_tree_html="", stepper_steps=empty_steps)
+
+    trace_render_data = json.dumps(getTraceRenderData(trace))
+    return render_template('stepper.html', uid = getUserName(), error="", prefixstates=view["prefixstates"], cyclestates=view["cyclestates"], formula = ltl, trace=trace, matrix_data=view["matrix_data"], trace_render_data=trace_render_data, stepper_tree_html=view["stepper_tree_html"], stepper_steps=view["stepper_steps"])
+
+
+
+@app.route('/stepper/evaluate', methods=['POST'])
+def ltlstepper_evaluate():
+    """The stepper's views as JSON, recomputed incrementally on edits.
+
+    Takes {"formula", "trace"}, optionally "previous" (the "evaluation" token
+    of an earlier response) and "edit" ({"state": i, "assignment": "a & !b"},
+    applied to the trace). Formula and trace default to the previous ones, so
+    a client can send just the edit. Only subformulas and states the change
+    can affect are recomputed.
+
+    Tokens are kept per worker and expire, so a token this worker does not
+    know is only an error if the request lacks the formula or trace to
+    evaluate from scratch.
+    """
+    data = request.get_json(silent=True) or {}
+
+    syntax_choice = data.get('syntax') or request.cookies.get('ltlsyntax')
+    if syntax_choice not in SUPPORTED_SYNTAXES:
+        syntax_choice = 'Classic'
+
+    previous = stepper.recallEvaluation(data.get('previous'))
+    if data.get('previous') and previous is None and not (data.get('formula') and data.get('trace')):
+        return jsonify({"error": "Unknown or expired evaluation; send the formula and trace."}), 400
+
+    ltl = data.get('formula') or (str(previous.node) if previous else None)
+    trace = data.get('trace') or (previous.trace if previous else None)
+    if not ltl or not trace:
+        return jsonify({"error": "Please enter an LTL formula and a trace."}), 400
+
+    edit = data.get('edit')
+    if edit is not None:
+        try:
+            trace = stepper.editTraceState(trace, edit.get('state'), edit.get('assignment'))
+        except (AttributeError, ValueError) as e:
+            return jsonify({"error": "Invalid edit. " + str(e)}), 400
+
     try:
-        result = traceSatisfactionPerStep(node = node, trace = trace, syntax = syntax_choice)
+        node = parse_ltl_string(ltl)
     except:
-        return render_template('stepper.html', uid = getUserName(), error="Invalid trace " + trace, prefixstates=[], cyclestates=[], matrix_data={"subformulae": [], "matrix": [], "rows": []}, trace_render_data=empty_trace_data, stepper_tree_html="", stepper_steps=empty_steps)
+        return jsonify({"error": "Invalid LTL formula " + ltl}), 400
 
-    matrix_data = result.getMatrixView()
-    stepper_view = result.getStepperViewData()
-    trace_render_data = json.dumps(getTraceRenderData(trace))
-    return render_template('stepper.html', uid = getUserName(), error="", prefixstates=result.prefix_states, cyclestates=result.cycle_states, formula = ltl, trace=trace, matrix_data=matrix_data, trace_render_data=trace_render_data, stepper_tree_html=stepper_view["tree_html"], stepper_steps=json.dumps(stepper_view["steps"]))
+    try:
+        evaluation = stepper.evaluateStepperMatrix(node, trace, syntax_choice, previous)
+        if evaluation is not None:
+            response = evaluation.to_json()
+            response["evaluation"] = stepper.rememberEvaluation(evaluation)
+        else:
+            result = spotpool.run(traceSatisfactionPerStep, node = node, trace = trace, syntax = syntax_choice)
+            stepper_view = result.getStepperViewData()
+            response = {"matrix": result.getMatrixView(), "tree_html": stepper_view["tree_html"],
+                        "steps": stepper_view["steps"], "evaluation": None}
+    except spotpool.SpotLimitError as e:
+        return jsonify({"error": "Could not evaluate this formula on this trace. " + str(e)}), 400
+    except:
+        return jsonify({"error": "Invalid trace " + trace}), 400
 
+    response.update({"formula": ltl, "trace": trace, "trace_render_data": getTraceRenderData(trace)})
+    return jsonify(response)
 
 ##### Eng LTL Logging Routes ###
 @app.route('/logenglishltlrating', methods=['POST'])
@@ -1207,7 +1300,3 @@ def logenglishltlrating():
 
     answer_logger.recordEnglishLTLPair(e_ltl_pair)
     return { "message": "Success" }
-
-
-if __name__ == '__main__':
-    app.run(host="0.0.0.0", port=int(port))
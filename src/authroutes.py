@@ -755,7 +755,7 @@ def suggest_distractors():
     """API endpoint to suggest distractors for a question"""
     from flask import jsonify
     import ltlnode
-    from codebook import getAllApplicableMisconceptions
+    import distractorcache
     
     answer = request.form.get('answer', '')
     kind = request.form.get('kind', 'englishtoltl')
@@ -767,35 +767,56 @@ def suggest_distractors():
         try:
             parsed = ltlnode.parse_ltl_string(answer)
             if parsed:
-                # Use the same approach as authorquestion in app.py
-                applicable = getAllApplicableMisconceptions(parsed)
-                for misconception in applicable:
-                    distractors.append({
-                        'formula': str(misconception.node),
-                        'code': str(misconception.misconception)
-                    })
-                
-                # Merge labels for equal formulae
-                merged = []
-                for distractor in distractors:
-                    existing = next((d for d in merged if d['formula'] == distractor['formula']), None)
-                    if existing:
-                        existing['code'] += f", {distractor['code']}"
-                    else:
-                        merged.append(distractor)
-                distractors = merged
+                # Same distractor set as authorquestion in app.py
+                distractors = [{
+                    'formula': option['formula'],
+                    'code': ', '.join(option['misconceptions'])
+                } for option in distractorcache.distractor_set(parsed)]
         except Exception as e:
             error = str(e)
     
     return jsonify({'distractors': distractors, 'error': error})
 
 
+@authroutes.route('/instructor/evaluate-traces', methods=['POST'])
+@login_required_as_courseinstructor
+def evaluate_traces():
+    """Stream the satisfaction of formula/trace pairs as NDJSON.
+
+    Takes JSON with "formula" or "formulas" and "trace" or "traces", and
+    answers every pair: one line per pair, with its per-state vector (see
+    batcheval.evaluate_batch).
+    """
+    from flask import jsonify, stream_with_context
+    import json
+    import batcheval
+    import spotpool
+
+    data = request.get_json(silent=True) or {}
+    formulas = data.get('formulas') if 'formulas' in data else [data.get('formula')]
+    traces = data.get('traces') if 'traces' in data else [data.get('trace')]
+    try:
+        batcheval.check_batch(formulas, traces)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    def spot_check(formula, trace):
+        return spotpool.run(batcheval.spot_positions, formula, trace)
+
+    def generate():
+        for result in batcheval.evaluate_batch(formulas, traces, spot_check=spot_check):
+            yield json.dumps(result) + '\n'
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+
 @authroutes.route('/instructor/suggest-traces', methods=['POST'])
 @login_required_as_courseinstructor
 def suggest_traces():
     """API endpoint to suggest traces for trace satisfaction questions"""
     from flask import jsonify
     import spotutils
+    import spotpool
     import exerciseprocessor
     import ltlnode
     
@@ -814,7 +835,7 @@ def suggest_traces():
         literals = list(exerciseprocessor.getFormulaLiterals(formula_str))
         
         # Generate satisfying traces
-        sat_traces = spotutils.generate_accepted_traces(formula_str, max_traces=5)
+        sat_traces = spotpool.run(spotutils.generate_accepted_traces, formula_str, max_traces=5)
         for trace in sat_traces:
             trace_str = exerciseprocessor.canonicalizeSpotTrace(str(trace))
             expanded = exerciseprocessor.expandSpotTrace(trace_str, literals)
@@ -828,7 +849,7 @@ def suggest_traces():
         
         # Generate rejecting traces (traces that satisfy NOT formula)
         negated = f"!({formula_str})"
-        rej_traces = spotutils.generate_accepted_traces(negated, max_traces=5)
+        rej_traces = spotpool.run(spotutils.generate_accepted_traces, negated, max_traces=5)
         for trace in rej_traces:
             trace_str = exerciseprocessor.canonicalizeSpotTrace(str(trace))
             expanded = exerciseprocessor.expandSpotTrace(trace_str, literals)
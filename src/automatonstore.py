@@ -0,0 +1,241 @@
+"""Precompiled automata for the formulas the app ships with.
+
+The benchmark CSVs, the formula suggestions, the equivalence exercises and
+the codebook's template patterns are the same after every deploy, yet every
+fresh worker used to translate them again. `python automatonstore.py build`
+translates each of them (and its negation) once, at SPOT's highest
+optimization level, and writes two files:
+
+  * <path>.hoa   the automata in HOA format, one after the other, and
+  * <path>.json  an index mapping each formula, as SPOT prints it after
+                 parsing (the translation cache's key), to the byte offset
+                 and length of its automaton in <path>.hoa.
+
+Workers memory-map the HOA file on the first lookup and parse only the
+automata they are asked for, so the store costs almost nothing to open and
+pages are shared between the processes on a machine. spotutils consults the
+store whenever a translation misses its cache.
+"""
+
+import argparse
+import csv
+import json
+import mmap
+import os
+import sys
+import threading
+
+import spot
+
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.abspath(os.path.join(SRC_DIR, os.pardir))
+
+DEFAULT_PATH = os.path.join(SRC_DIR, 'db', 'automata')
+
+## Stored automata are translated at this level, so they serve every profile.
+STORE_LEVEL = 'high'
+
+FORMAT_VERSION = 1
+
+BENCHMARK_FILES = [os.path.join(PROJECT_ROOT, name)
+                   for name in ("semantic_benchmark_near_eng.csv", "semantic_benchmark_far_eng.csv")]
+BENCHMARK_COLUMNS = ("ltl_formula", "closest_mutant_formula")
+SUGGESTIONS_FILE = os.path.join(SRC_DIR, "static", "ltl_formula_suggestions.json")
+EQUIVALENT_FILE = os.path.join(SRC_DIR, "static", "equivalent.json")
+
+## The shapes MisconceptionCode.generateTemplateFormula builds, with its
+## subformulas x, y, z instantiated as the atoms it draws from.
+TEMPLATE_PATTERNS = [
+    "p0 U (!p0 & p1)",
+    "p0 U (p0 -> p1)",
+    "p0 U (!p0 | p1)",
+    "p0 U (p1 & F p2)",
+    "p0 U (p1 & G p2)",
+    "p0 U X(p1 & p2)",
+    "X(p1 & p2)",
+]
+
+
+def _paths(path):
+    return path + '.hoa', path + '.json'
+
+
+class AutomatonStore:
+    """Read-only view of a store written by `write_store`.
+
+    Nothing is read until the first lookup. A store whose files are missing
+    (e.g. in development, before `build` has run) is simply empty.
+    """
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._opened = False
+        self._index = {}
+        self._data = None
+        self.hits = 0
+        self.misses = 0
+
+    def _open(self):
+        with self._lock:
+            if self._opened:
+                return
+            self._opened = True
+            data_path, index_path = _paths(self.path)
+            if not (os.path.exists(data_path) and os.path.exists(index_path)):
+                return
+            try:
+                with open(index_path) as f:
+                    index = json.load(f)
+                if index.get('version') != FORMAT_VERSION:
+                    print(f"Warning: ignoring automaton store {self.path} (format {index.get('version')})")
+                    return
+                if index['entries']:
+                    with open(data_path, 'rb') as f:
+                        self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                self._index = index['entries']
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Warning: could not open automaton store {self.path}: {e}")
+
+    def __contains__(self, key):
+        self._open()
+        return key in self._index
+
+    def __len__(self):
+        self._open()
+        return len(self._index)
+
+    def text(self, key):
+        """The HOA text stored for `key`, or None."""
+        self._open()
+        entry = self._index.get(key)
+        if entry is None:
+            return None
+        offset, length = entry
+        return self._data[offset:offset + length].decode('utf-8')
+
+    def load(self, key):
+        """A freshly parsed automaton for `key` (a formula as SPOT prints it), or None."""
+        text = self.text(key)
+        if text is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return spot.automaton(text)
+
+    def close(self):
+        with self._lock:
+            if self._data is not None:
+                self._data.close()
+            self._data = None
+            self._index = {}
+            self._opened = False
+
+    def stats(self):
+        return {"path": self.path, "entries": len(self._index), "hits": self.hits, "misses": self.misses}
+
+
+def write_store(path, automata):
+    """Write a store from `automata`, a mapping of key -> HOA text."""
+    data_path, index_path = _paths(path)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    entries = {}
+    offset = 0
+    with open(data_path + '.tmp', 'wb') as f:
+        for key in sorted(automata):
+            blob = automata[key].encode('utf-8')
+            if not blob.endswith(b'\n'):
+                blob += b'\n'
+            f.write(blob)
+            entries[key] = [offset, len(blob)]
+            offset += len(blob)
+    with open(index_path + '.tmp', 'w') as f:
+        json.dump({"version": FORMAT_VERSION, "level": STORE_LEVEL, "entries": entries}, f)
+
+    # Each file is swapped in atomically. Workers that already opened the store
+    # keep their mapping of the old data file until they restart.
+    os.replace(data_path + '.tmp', data_path)
+    os.replace(index_path + '.tmp', index_path)
+
+
+def corpus_formulas():
+    """Every formula shipped with the app, as written in its source file."""
+    formulas = []
+    for name in BENCHMARK_FILES:
+        if not os.path.exists(name):
+            continue
+        with open(name, newline='') as f:
+            for row in csv.DictReader(f):
+                for column in BENCHMARK_COLUMNS:
+                    text = (row.get(column) or '').strip()
+                    if text:
+                        formulas.append(text)
+
+    if os.path.exists(SUGGESTIONS_FILE):
+        with open(SUGGESTIONS_FILE) as f:
+            formulas.extend(item['formula'] for item in json.load(f) if item.get('formula'))
+
+    if os.path.exists(EQUIVALENT_FILE):
+        with open(EQUIVALENT_FILE) as f:
+            for question in json.load(f):
+                formulas.extend(o['option'] for o in question.get('options', []) if o.get('option'))
+
+    formulas.extend(TEMPLATE_PATTERNS)
+    return list(dict.fromkeys(formulas))
+
+
+def _variants(text):
+    """The formulas to store for `text`: itself and, where our parser accepts
+    it, its literal-canonical form (see ltlnode.canonicalize); each with its negation."""
+    variants = [spot.formula(text)]
+    try:
+        import ltlnode
+        canonical, _ = ltlnode.canonicalize(ltlnode.parse_ltl_string(text))
+        variants.append(spot.formula(str(canonical)))
+    except Exception:
+        pass
+    for f in list(variants):
+        variants.append(spot.formula.Not(f))
+    return variants
+
+
+def build(path=DEFAULT_PATH, formulas=None):
+    """Translate `formulas` (default: corpus_formulas()) and write the store at `path`."""
+    if formulas is None:
+        formulas = corpus_formulas()
+    automata = {}
+    for text in formulas:
+        try:
+            variants = _variants(text)
+        except Exception as e:
+            print(f"Skipping {text!r}: {e}")
+            continue
+        for f in variants:
+            key = str(f)
+            if key not in automata:
+                automata[key] = f.translate(STORE_LEVEL).to_str('hoa')
+    write_store(path, automata)
+    return len(automata)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Precompiled automata for the formulas shipped with the app.")
+    sub = parser.add_subparsers(dest='command', required=True)
+    build_parser = sub.add_parser('build', help="translate the shipped corpora and write the store")
+    build_parser.add_argument('--path', default=DEFAULT_PATH, help="store path, without extension")
+    info_parser = sub.add_parser('info', help="print the number of automata in a store")
+    info_parser.add_argument('--path', default=DEFAULT_PATH, help="store path, without extension")
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        count = build(args.path)
+        print(f"Wrote {count} automata to {args.path}.hoa")
+    else:
+        print(f"{len(AutomatonStore(args.path))} automata in {args.path}.hoa")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,133 @@
+"""Satisfaction of many (formula, trace) pairs in one go.
+
+Instructors building a trace-satisfaction question bank want to know, for
+one formula and a few dozen candidate traces (or a few candidate formulas and
+one trace), which traces satisfy it and at which states. `evaluate_batch`
+answers every pair of the cross product and yields one result per pair, so the
+instructor endpoint (/instructor/evaluate-traces) and the command line can
+stream them as NDJSON as they are computed.
+
+Each formula is parsed once, with the tutor's grammar, and each trace once.
+Pairs traceeval can evaluate natively cost one pass over the lasso; the rest
+go to SPOT one suffix per state, where spotutils' translation cache shares
+the formula's automaton across all of that formula's traces. SPOT is given
+the parsed formula, fully parenthesized, since it would read the raw string
+with its own precedence (see traceeval.parse_exactly).
+
+Run from src/:
+    python batcheval.py --formula "G (a -> F b)" --trace "a; cycle{b}" --trace "cycle{a}"
+    python batcheval.py --formula "G a" --traces traces.txt   (one trace per line, - for stdin)
+"""
+
+import argparse
+import json
+import sys
+
+import traceeval
+from stepper import splitTraceAtCycle
+
+
+## Pairs one request may ask for.
+MAX_PAIRS = 1000
+
+
+def check_batch(formulas, traces):
+    """Raise ValueError unless `formulas` and `traces` make a valid batch."""
+    if not isinstance(formulas, list) or not isinstance(traces, list):
+        raise ValueError("formulas and traces must be lists")
+    if not formulas or not traces:
+        raise ValueError("Need at least one formula and one trace")
+    if not all(isinstance(x, str) and x.strip() for x in formulas + traces):
+        raise ValueError("Formulas and traces must be non-empty strings")
+    if len(formulas) * len(traces) > MAX_PAIRS:
+        raise ValueError(f"At most {MAX_PAIRS} formula/trace pairs per batch")
+
+
+def suffix_traces(trace):
+    """The word starting at each state of `trace`, prefix states first."""
+    prefix, cycle = splitTraceAtCycle(trace)
+    cycle_string = "cycle{" + ';'.join(cycle) + "}"
+    suffixes = [';'.join(prefix[i:] + [cycle_string]) for i in range(len(prefix))]
+    suffixes += [';'.join(cycle[j:] + [cycle_string]) for j in range(len(cycle))]
+    return suffixes
+
+
+def spot_positions(formula, trace):
+    """Per-state satisfaction of `formula` on `trace`, checked with SPOT."""
+    import spotutils
+    return [spotutils.is_trace_satisfied(trace=suffix, formula=formula) for suffix in suffix_traces(trace)]
+
+
+def evaluate_batch(formulas, traces, spot_check=spot_positions):
+    """Yield one result per (formula, trace) pair, formula by formula.
+
+    Args:
+        spot_check: Called as spot_check(formula, trace) for pairs that cannot
+            be evaluated natively, with str() of the parsed formula; returns
+            the per-state values. The endpoint passes one that runs in the
+            SPOT worker pool.
+
+    Yields:
+        {"formula", "trace", "satisfied", "positions", "engine"} dicts, where
+        positions holds 0/1 per state of the trace (prefix states, then one
+        pass of the cycle) and engine is "native" or "spot"; or
+        {"formula", "trace", "error"} if the pair could not be evaluated
+        (including every pair of a formula the tutor's parser cannot read).
+    """
+    parsed_traces = {trace: traceeval.parse_trace(trace) for trace in traces}
+    for formula in formulas:
+        node = traceeval.parse_exactly(formula)
+        alphabet = traceeval.literals_in_order(node) if node is not None else None
+        for trace in traces:
+            result = {"formula": formula, "trace": trace}
+            try:
+                if node is None:
+                    raise ValueError(f"Cannot read formula {formula!r}")
+                lasso = traceeval.lasso_from_parsed(parsed_traces[trace], alphabet)
+                if lasso is not None:
+                    values, engine = traceeval.evaluate_positions(node, lasso), "native"
+                else:
+                    values, engine = spot_check(str(node), trace), "spot"
+            except Exception as e:
+                result["error"] = str(e) or type(e).__name__
+                yield result
+                continue
+            result.update({
+                "satisfied": bool(values[0]) if values else None,
+                "positions": [1 if v else 0 for v in values],
+                "engine": engine,
+            })
+            yield result
+
+
+def _read_lines(path):
+    stream = sys.stdin if path == '-' else open(path)
+    try:
+        return [line.strip() for line in stream if line.strip()]
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Evaluate formula/trace pairs; prints one JSON object per line.")
+    parser.add_argument('--formula', action='append', default=[], help="a formula (repeatable)")
+    parser.add_argument('--trace', action='append', default=[], help="a trace as a SPOT word (repeatable)")
+    parser.add_argument('--formulas', help="file with one formula per line, or - for stdin")
+    parser.add_argument('--traces', help="file with one trace per line, or - for stdin")
+    args = parser.parse_args(argv)
+
+    formulas = args.formula + (_read_lines(args.formulas) if args.formulas else [])
+    traces = args.trace + (_read_lines(args.traces) if args.traces else [])
+    try:
+        check_batch(formulas, traces)
+    except ValueError as e:
+        parser.error(str(e))
+
+    for result in evaluate_batch(formulas, traces):
+        print(json.dumps(result), flush=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,8 +1,9 @@
 from enum import Enum
 import random
 from ltlnode import *
-import copy
 import spotutils
+import ltlzipper
+import formulasampler
 
 class MisconceptionCode(Enum):
     Precedence = "Precedence"
@@ -44,7 +45,7 @@ class MisconceptionCode(Enum):
     def generateTemplateFormula(self, atomic_props=None):
         """
         Generate a formula from a template that guarantees this misconception can be applied.
-        Uses SPOT's randltl for subformulae to avoid trivial tautologies/contradictions.
+        Uses the constrained sampler (via spotutils) for subformulae to avoid trivial tautologies/contradictions.
         Returns an LTLNode, or None if template generation is not applicable.
         
         Args:
@@ -58,7 +59,7 @@ class MisconceptionCode(Enum):
         
         def build_subformula(tree_size=3):
             """
-            Build a non-trivial subformula using SPOT's randltl via spotutils.
+            Build a non-trivial subformula using the formula sampler via spotutils.
             Returns an LTLNode.
             """
             formula_str = spotutils.gen_small_rand_ltl(atomic_props, tree_size=tree_size)
@@ -102,7 +103,9 @@ class MisconceptionCode(Enum):
                 ]
                 template = random.choice(patterns)
             
-            if template is not None and not spotutils.is_trivial(str(template)):
+            # Parts that are non-trivial can still combine into a tautology or
+            # contradiction; a formula that takes both values on the trace bank cannot.
+            if template is not None and formulasampler.takes_both_values(template, sorted(set(atomic_props))):
                 return template
         
         # If all attempts failed, return None
@@ -143,43 +146,37 @@ class MutationResult:
         self.misconception = misconception
 
 
-def applyMisconception(node_orig, misconception, randomize_location=False):
-    """
-    Apply a misconception rewrite to a formula tree.
-
-    By default this preserves the historical first-match traversal behavior.
-    When `randomize_location=True`, rewrites (except ImplicitF/ImplicitG, which
-    are always random-site) are applied at a random applicable location.
-    """
-
-    ## First copy everything so we don't mess up the original node.
-    node = copy.deepcopy(node_orig)
-    apply_at_location = applyTilFirstRandom if randomize_location else applyTilFirst
-
-
-    if misconception == MisconceptionCode.Precedence:
-        return apply_at_location(node, applyPrecedence)
-    elif misconception == MisconceptionCode.BadStateIndex:
-        return apply_at_location(node, applyBadStateIndex)
-    elif misconception == MisconceptionCode.BadStateQuantification:
-        return apply_at_location(node, applyBadStateQuantification)
-    elif misconception == MisconceptionCode.ExclusiveU:
-        return apply_at_location(node, applyExclusiveU)
-    elif misconception == MisconceptionCode.ImplicitF:
-        return applyTilFirstRandom(node, applyImplicitF)
-    elif misconception == MisconceptionCode.ImplicitG:
-        return applyTilFirstRandom(node, applyImplicitG)
-    elif misconception == MisconceptionCode.WeakU:
-        return apply_at_location(node, applyWeakU)
-    elif misconception == MisconceptionCode.OtherImplicit:
-        res = apply_at_location(node, applyImplicitPrefix)
-        if not res.misconception:
-            return apply_at_location(node, applyUnderconstraint)
-        return res
-    # elif misconception in [MisconceptionCode.BadProp, MisconceptionCode.Unlabeled, MisconceptionCode.ReasonableVariant]:
-    #     return MutationResult(node)
-    else:
-        return MutationResult(node)
+def applyMisconception(node_orig, misconception, randomize_location=False, index=None):
+    """
+    Apply a misconception rewrite to a formula tree.
+
+    By default this preserves the historical first-match traversal behavior.
+    When `randomize_location=True`, rewrites (except ImplicitF/ImplicitG, which
+    are always random-site) are applied at a random applicable location.
+
+    `index` is a MutationSiteIndex of `node_orig`, for callers applying
+    several misconceptions to one formula; one is built if it is not given.
+    Rules whose triggers (MUTATION_TRIGGERS) match nowhere in the formula are
+    skipped, and random-site rules only probe the locations their triggers match.
+    """
+
+    ## Nodes are immutable, so rewrites rebuild only the path to their site
+    ## and `node_orig` is never modified.
+    node = node_orig
+    if index is None:
+        index = MutationSiteIndex(node)
+
+    res = MutationResult(node)
+    for f in MISCONCEPTION_RULES.get(misconception, []):
+        if not index.candidates(f):
+            continue
+        if randomize_location or f in (applyImplicitF, applyImplicitG):
+            res = applyTilFirstRandom(node, f, index)
+        else:
+            res = applyTilFirst(node, f)
+        if res.misconception:
+            return res
+    return res
 
 
 def getAllApplicableMisconceptions(node):
@@ -191,7 +188,8 @@ def getAllApplicableMisconceptions(node):
 
     # Use randomized location application so distractor generation is not
     # systematically biased toward first-match rewrite sites.
-    xs = [applyMisconception(node, misconception, randomize_location=True) for misconception in MisconceptionCode]
+    index = MutationSiteIndex(node)
+    xs = [applyMisconception(node, misconception, randomize_location=True, index=index) for misconception in MisconceptionCode]
     xs = [ x  for x in xs if (x is not None and x.misconception is not None) ]
     
     xs = [ x  for x in xs if not equivalentToOriginal(x.node) ]
@@ -199,34 +197,68 @@ def getAllApplicableMisconceptions(node):
     
 
 
-def collectAllMutationLocations(node, f, path=None):
+class MutationSiteIndex:
+    """
+    The locations of one formula, grouped by node class, from a single walk.
+
+    Rules declare the node classes and shapes they can rewrite in
+    MUTATION_TRIGGERS; `candidates` answers where a rule may apply, so a rule
+    whose operators the formula lacks costs nothing and the others only probe
+    their candidate sites.
+    """
+
+    def __init__(self, node):
+        self.node = node
+        self.locations = list(ltlzipper.locations(node))
+        self._positions_by_type = {}
+        for position, location in enumerate(self.locations):
+            self._positions_by_type.setdefault(type(location.node), []).append(position)
+        self._candidates = {}
+
+    def candidates(self, f):
+        """
+        The locations whose node matches one of f's triggers, in pre-order;
+        every location if f declares none.
+        """
+        triggers = MUTATION_TRIGGERS.get(f)
+        if triggers is None:
+            return self.locations
+        if f not in self._candidates:
+            positions = set()
+            for node_type, shape in triggers:
+                for cls, cls_positions in self._positions_by_type.items():
+                    if issubclass(cls, node_type):
+                        positions.update(p for p in cls_positions
+                                         if shape is None or shape(self.locations[p].node))
+            self._candidates[f] = [self.locations[p] for p in sorted(positions)]
+        return self._candidates[f]
+
+
+def applicableMutationSites(node, f, index=None):
+    """
+    All locations in the tree where mutation f applies, with f's result there:
+    a list of (ltlzipper.Location, MutationResult) pairs in pre-order.
+
+    Mutation functions only build new nodes, so probing a subtree is the
+    rewrite itself; nothing is copied. Without an `index` (a
+    MutationSiteIndex of `node`) f is called once per node; with one, only
+    at the candidate sites of its triggers.
+    """
+    sites = []
+    for location in (index.candidates(f) if index is not None else ltlzipper.locations(node)):
+        res = f(location.node)
+        if res.misconception:
+            sites.append((location, res))
+    return sites
+
+
+def collectAllMutationLocations(node, f):
     """
     Collect all locations in the tree where mutation f can be applied.
     Returns a list of path lists where each path is a list of directions
     to reach that node from the root.
-    
-    Each returned path is an independent copy to avoid aliasing issues.
     """
-    if path is None:
-        path = []
-    
-    locations = []
-    
-    # Probe applicability on a copy since some mutation functions mutate input
-    # nodes while constructing their result.
-    res = f(copy.deepcopy(node))
-    if res.misconception:
-        # Store just the path, we'll apply the mutation later
-        locations.append(list(path))
-    
-    # Recurse into children
-    if isinstance(node, UnaryOperatorNode):
-        locations.extend(collectAllMutationLocations(node.operand, f, path + ['operand']))
-    elif isinstance(node, BinaryOperatorNode):
-        locations.extend(collectAllMutationLocations(node.left, f, path + ['left']))
-        locations.extend(collectAllMutationLocations(node.right, f, path + ['right']))
-    
-    return locations
+    return [location.path() for location, _ in applicableMutationSites(node, f)]
 
 
 def applyMutationAtPath(node, f, path):
@@ -234,42 +266,17 @@ def applyMutationAtPath(node, f, path):
     Apply a mutation function f at a specific path in the tree.
     Path is a list of 'left', 'right', or 'operand' directions.
     
-    Note: This function modifies the node tree in-place and uses a pattern
-    where child_result.node is reassigned to point to the parent node.
-    This is intentional and matches the pattern used in applyTilFirst.
-    The caller should pass a deep copy if the original needs to be preserved.
+    Nodes are immutable, so only the parents on the path are rebuilt around
+    the mutated subtree, and the result's node is the new root. `node` itself
+    is unchanged. Raises ValueError if the path does not exist in `node`.
     """
-    if not path:
-        # We're at the target node, apply the mutation
-        return f(node)
-    
-    # Navigate to the target location
-    direction = path[0]
-    remaining_path = path[1:]
-    
-    if isinstance(node, UnaryOperatorNode) and direction == 'operand':
-        child_result = applyMutationAtPath(node.operand, f, remaining_path)
-        # Thread the result back through the parent: replace child with mutated version,
-        # then update result to point to the whole subtree
-        node.operand = child_result.node
-        child_result.node = node
-        return child_result
-    elif isinstance(node, BinaryOperatorNode) and direction == 'left':
-        child_result = applyMutationAtPath(node.left, f, remaining_path)
-        node.left = child_result.node
-        child_result.node = node
-        return child_result
-    elif isinstance(node, BinaryOperatorNode) and direction == 'right':
-        child_result = applyMutationAtPath(node.right, f, remaining_path)
-        node.right = child_result.node
-        child_result.node = node
-        return child_result
-    
-    # Invalid path - this indicates a bug in path generation
-    raise ValueError(f"Invalid path: cannot apply direction '{direction}' to node of type {type(node).__name__}")
+    location = ltlzipper.location_at(node, path)
+    res = f(location.node)
+    res.node = location.replace(res.node)
+    return res
 
 
-def applyTilFirstRandom(node, f):
+def applyTilFirstRandom(node, f, index=None):
     """
     Apply mutation f to a randomly selected location in the tree where it's applicable.
     This ensures diverse mutations when multiple locations are possible.
@@ -277,16 +284,15 @@ def applyTilFirstRandom(node, f):
     select from all possible application sites.
     """
     # Collect all possible mutation locations
-    locations = collectAllMutationLocations(node, f)
+    sites = applicableMutationSites(node, f, index)
     
-    if not locations:
+    if not sites:
         return MutationResult(node)
     
-    # Randomly select one location
-    path = random.choice(locations)
-    
-    # Apply the mutation at the selected location
-    return applyMutationAtPath(node, f, path)
+    # Randomly select one location, and keep the rewrite made there while probing
+    location, res = random.choice(sites)
+    res.node = location.replace(res.node)
+    return res
 
 
 def applyTilFirst(node, f):
@@ -301,8 +307,7 @@ def applyTilFirst(node, f):
 
     if isinstance(node, UnaryOperatorNode):
         res = applyTilFirst(node.operand, f)
-        node.operand = res.node
-        res.node = node
+        res.node = type(node)(res.node)
         return res
 
     if isinstance(node, BinaryOperatorNode):
@@ -314,29 +319,57 @@ def applyTilFirst(node, f):
         choose_right = res_right.misconception and (not res_left.misconception or random_index == 1)
 
         if choose_left:
-            node.left = res_left.node
-            res_left.node = node
+            res_left.node = type(node)(res_left.node, node.right)
             return res_left
         elif choose_right:
-            node.right = res_right.node
-            res_right.node = node
+            res_right.node = type(node)(node.left, res_right.node)
             return res_right
 
     return MutationResult(node)
 
 
+def allRewrites(node, f):
+    """
+    Every MutationResult mutation f can return at `node`.
+
+    Rules that pick one of several rewrites at random (ExclusiveU variants,
+    BadStateQuantification on U, ...) make each pick through their `choose`
+    argument, random.choice by default. This runs f once per sequence of
+    picks, so each alternative is produced once.
+    """
+    if f not in _CHOOSING_RULES:
+        return [f(node)]
+    results = []
+    pending = [[]]
+    while pending:
+        prescribed = pending.pop()
+        taken = []
+
+        def choose(options):
+            if len(taken) < len(prescribed):
+                pick = prescribed[len(taken)]
+            else:
+                pick = 0
+                pending.extend(taken + [alternative] for alternative in range(len(options) - 1, 0, -1))
+            taken.append(pick)
+            return options[pick]
+
+        results.append(f(node, choose))
+    return results
+
+
 def applyPrecedence(node):
     if isinstance(node, BinaryOperatorNode):
         if isinstance(node.right, BinaryOperatorNode):
-            new_top = node.right
-            node.right = new_top.left
-            new_top.left = node
+            # (a op1 (b op2 c)) -> ((a op1 b) op2 c)
+            inner = node.right
+            new_top = type(inner)(type(node)(node.left, inner.left), inner.right)
             return MutationResult(new_top, MisconceptionCode.Precedence)
 
     return MutationResult(node)
 
 
-def applyExclusiveU(node):
+def applyExclusiveU(node, choose=random.choice):
     """
     Detect patterns where Until is used with explicit disjointness/exclusivity.
     ExclusiveU misconception: treating "x U y" as if x and y cannot both be true.
@@ -373,7 +406,7 @@ def applyExclusiveU(node):
         # Reverse: x U y → one of the ExclusiveU misconception variants
         # The correct formula is x U y, but a student with the ExclusiveU
         # misconception might write any of these, so we randomly choose one.
-        variant = random.choice([
+        variant = choose([
             UntilNode(x, AndNode(NotNode(x), rhs)),   # x U (!x & y)
             UntilNode(x, ImpliesNode(x, rhs)),         # x U (x -> y)
             UntilNode(x, OrNode(NotNode(x), rhs)),     # x U (!x | y)
@@ -487,9 +520,9 @@ def applyImplicitPrefix(node):
 
 
 
-def applyUnderconstraint(node):
+def applyUnderconstraint(node, choose=random.choice):
     if isinstance(node, BinaryOperatorNode):
-        n = random.choice([node.left, node.right])
+        n = choose([node.left, node.right])
         return MutationResult(n, MisconceptionCode.OtherImplicit)
     ## TODO: Yes, but this shouldn't remove F / G constraints (these aren't covered by the other code)
     elif isinstance(node, UnaryOperatorNode):
@@ -508,7 +541,7 @@ def applyWeakU(node):
     return MutationResult(node)
 
 
-def applyBadStateQuantification(node):
+def applyBadStateQuantification(node, choose=random.choice):
     if isinstance(node, GloballyNode):
         op = node.operand
         return MutationResult(FinallyNode(op), MisconceptionCode.BadStateQuantification)
@@ -521,7 +554,7 @@ def applyBadStateQuantification(node):
         lhs = node.left
         rhs = node.right
 
-        new_node = random.choice([
+        new_node = choose([
             UntilNode(FinallyNode(lhs), rhs),
             UntilNode(GloballyNode(lhs), rhs),
             UntilNode(lhs, FinallyNode(rhs)),
@@ -533,7 +566,7 @@ def applyBadStateQuantification(node):
     return MutationResult(node)
 
 
-def applyBadStateIndex(node):
+def applyBadStateIndex(node, choose=random.choice):
     if isinstance(node, UntilNode):
         lhs = node.left
         rhs = node.right
@@ -578,7 +611,7 @@ def applyBadStateIndex(node):
                 x = x.operand
             
             # Randomly add or remove 1-2 Nexts, but ensure we stay within reasonable bounds
-            change = random.choice([-2, -1, 1, 2])
+            change = choose([-2, -1, 1, 2])
             new_count = next_count + change
             
             # Ensure new_count is at least 1 and different from original
@@ -597,3 +630,49 @@ def applyBadStateIndex(node):
             return MutationResult(result, MisconceptionCode.BadStateIndex)
 
     return MutationResult(node)
+
+
+## Rules tried, in order, for each misconception; the first that applies wins.
+MISCONCEPTION_RULES = {
+    MisconceptionCode.Precedence: [applyPrecedence],
+    MisconceptionCode.BadStateIndex: [applyBadStateIndex],
+    MisconceptionCode.BadStateQuantification: [applyBadStateQuantification],
+    MisconceptionCode.ExclusiveU: [applyExclusiveU],
+    MisconceptionCode.ImplicitF: [applyImplicitF],
+    MisconceptionCode.ImplicitG: [applyImplicitG],
+    MisconceptionCode.WeakU: [applyWeakU],
+    MisconceptionCode.OtherImplicit: [applyImplicitPrefix, applyUnderconstraint],
+}
+
+
+def _untilAndGlobally(node):
+    kinds = {type(node.left), type(node.right)}
+    return UntilNode in kinds and GloballyNode in kinds
+
+
+## The nodes each rule can rewrite: (node class, shape) pairs, where shape is
+## None or a cheap test of the node's children. A rule never returns a
+## misconception at a node matching none of its triggers, so MutationSiteIndex
+## only probes nodes that match one.
+MUTATION_TRIGGERS = {
+    applyPrecedence: [(BinaryOperatorNode, lambda n: isinstance(n.right, BinaryOperatorNode))],
+    applyBadStateIndex: [
+        (UntilNode, lambda n: isinstance(n.right, (AndNode, OrNode, ImpliesNode))
+                              and isinstance(n.right.right, (FinallyNode, GloballyNode))),
+        (NextNode, lambda n: isinstance(n.operand, (AndNode, NextNode))),
+    ],
+    applyBadStateQuantification: [(GloballyNode, None), (FinallyNode, None), (UntilNode, None)],
+    applyExclusiveU: [(UntilNode, None), (AndNode, _untilAndGlobally)],
+    applyImplicitF: [(FinallyNode, None)],
+    applyImplicitG: [(GloballyNode, None)],
+    applyImplicitPrefix: [
+        (UntilNode, lambda n: isinstance(n.left, NotNode) or isinstance(n.right, GloballyNode)),
+        (AndNode, lambda n: isinstance(n.left, FinallyNode) and isinstance(n.right, GloballyNode)),
+        (NextNode, None),
+    ],
+    applyUnderconstraint: [(UnaryOperatorNode, None), (BinaryOperatorNode, None)],
+    applyWeakU: [(UntilNode, None)],
+}
+
+## Rules that take a `choose` argument (see allRewrites).
+_CHOOSING_RULES = {applyExclusiveU, applyUnderconstraint, applyBadStateQuantification, applyBadStateIndex}
@@ -0,0 +1,198 @@
+"""Misconception distractor sets, memoized per canonical answer formula.
+
+The distractors for an answer formula are its misconception neighborhood
+(mutantneighborhood.mutant_neighborhood): every misconception applied at
+every site it fits, grouped into semantic classes, with one option per class
+other than the answer's own. Building one takes a fingerprint per mutant and
+SPOT checks for fingerprint collisions, and ExerciseBuilder, /authorquestion/
+and /instructor/suggest-distractors all need the same handful of answers.
+
+A distractor set depends on the answer only up to renaming of its literals,
+so sets are keyed by the answer's canonical form (`a U b` and `q U s` share
+one) and stored over the canonical literals; `distractor_set` renames them
+back for the caller. Sets are kept in:
+
+  * an in-process LRU front tier, and
+  * optionally, a SQLite file shared by every worker, bounded by row count
+    with least-recently-used eviction (sqlitelru.SQLiteLRU, as for
+    relationcache).
+
+A set holds every site of every misconception, so caching it fixes nothing
+random: which site of a misconception a student is shown, and which
+misconceptions, is decided when options are selected from the set
+(one_per_misconception, ExerciseBuilder._sample_misconception_options). The
+persistent tier is best-effort; SQLite errors degrade to a miss or a skipped
+write. Rows are keyed with DISTRACTOR_SET_VERSION, so changing the codebook
+rules and bumping it retires old sets (they are never read again, and age
+out of the table).
+"""
+
+import json
+import random
+
+import ltlnode
+import mutantneighborhood
+from lrucache import LRUCache
+from sqlitelru import SQLiteLRU
+
+
+## Bump when the misconception rules change what a set contains.
+DISTRACTOR_SET_VERSION = 2
+
+DEFAULT_FRONT_ENTRIES = 2048
+DEFAULT_MAX_ROWS = 100000
+
+## Writes between two eviction checks of the SQLite tier.
+EVICTION_CHECK_INTERVAL = 200
+
+
+def neighborhood_options(neighborhood):
+    """
+    The distractor options of a MutantNeighborhood: one {"formula",
+    "misconceptions"} dict per semantic class other than the original's, in
+    order of first occurrence. The formula is the class's first mutant, and
+    the misconceptions are the codes of all its mutants, each listed once.
+
+    Mutants from different misconceptions or sites can denote the same
+    property (e.g. "G d" and "G (G d)"): two such options would waste a
+    distractor slot and make the misconception attribution of whichever one
+    the student picks arbitrary, so each class is offered once. Codes are a
+    union, not a concatenation: the evidence model splits a pick's strength
+    by len(codes), so listing a code twice would halve its evidence.
+    """
+    options = []
+    for class_id, mutants in neighborhood.by_class().items():
+        if class_id == neighborhood.ORIGINAL_CLASS:
+            continue
+        codes = list(dict.fromkeys(str(m.misconception) for m in mutants))
+        options.append({"formula": str(mutants[0].node), "misconceptions": codes})
+    return options
+
+
+def one_per_misconception(options, rng=random):
+    """
+    One option per misconception code in `options`, uniformly among the
+    options carrying that code, in order of the codes' first occurrence.
+
+    A set holds every site of a misconception, so selecting from it as a
+    whole would offer a misconception with many sites more often than one
+    with a single site. An option carrying several codes is returned once.
+    """
+    by_code = {}
+    for option in options:
+        for code in option["misconceptions"]:
+            by_code.setdefault(code, []).append(option)
+    chosen = []
+    for candidates in by_code.values():
+        option = rng.choice(candidates)
+        if not any(option is c for c in chosen):
+            chosen.append(option)
+    return chosen
+
+
+def build_distractor_set(node):
+    """The distractor options for answer `node` over every misconception site, uncached."""
+    return neighborhood_options(mutantneighborhood.mutant_neighborhood(node))
+
+
+class DistractorCache:
+
+    def __init__(self, path=None, max_rows=DEFAULT_MAX_ROWS, front_entries=DEFAULT_FRONT_ENTRIES):
+        """
+        Args:
+            path: SQLite file for the shared tier, or None to keep sets in-process only.
+            max_rows: Row bound for the SQLite tier.
+            front_entries: Entry bound for the in-process tier.
+        """
+        self.front = LRUCache(max_entries=front_entries)
+        self.store = SQLiteLRU(path, "distractor_sets", ("formula", "version"), "TEXT",
+                               max_rows, EVICTION_CHECK_INTERVAL, name="distractor cache")
+
+        self.persistent_hits = 0
+
+    @property
+    def path(self):
+        """The SQLite file, or None once the shared tier is disabled (or was never configured)."""
+        return self.store.path
+
+    def get(self, formula):
+        """The cached options for canonical answer `formula`, or None."""
+        options = self.front.get(formula)
+        if options is not None:
+            return options
+
+        options = self._load(formula)
+        if options is not None:
+            self.persistent_hits += 1
+            self.front.put(formula, options)
+        return options
+
+    def put(self, formula, options):
+        self.front.put(formula, options)
+        self.store.put((formula, str(DISTRACTOR_SET_VERSION)), json.dumps(options))
+
+    def stats(self):
+        stats = dict(self.front.stats())
+        stats["persistent_hits"] = self.persistent_hits
+        stats["path"] = self.path
+        return stats
+
+    def clear(self):
+        """Drop both tiers."""
+        self.front.clear()
+        self.store.clear()
+
+    ## Persistent tier ##
+
+    def _load(self, formula):
+        value = self.store.get((formula, str(DISTRACTOR_SET_VERSION)))
+        if value is None:
+            return None
+        try:
+            return json.loads(value)
+        except ValueError as e:
+            print(f"Warning: ignoring unreadable distractor set for {formula}: {e}")
+            return None
+
+
+## In-process only until the app calls configure, which adds the SQLite tier.
+_cache = DistractorCache()
+
+
+def configure(path, max_rows=DEFAULT_MAX_ROWS):
+    """Back distractor sets with the SQLite file at `path` (None: in-process only)."""
+    global _cache
+    _cache = DistractorCache(path=path, max_rows=max_rows)
+
+
+def distractor_set(node, compute=build_distractor_set):
+    """
+    The misconception distractor options for answer formula `node`, over its
+    own literals: {"formula", "misconceptions"} dicts (formula in Classic
+    syntax, misconceptions as str(MisconceptionCode)). The caller may modify
+    the returned list and dicts.
+
+    Args:
+        compute: Called with the canonical form of `node` on a miss, returning
+            its options (build_distractor_set by default; the app runs it in
+            the SPOT worker pool). Exceptions propagate and nothing is cached.
+    """
+    canonical, renaming = ltlnode.canonicalize(node)
+    key = str(canonical)
+    options = _cache.get(key)
+    if options is None:
+        options = compute(canonical)
+        _cache.put(key, options)
+
+    inverse = ltlnode.invert_renaming(renaming)
+    return [{"formula": str(ltlnode.rename_literals(ltlnode.parse_ltl_string(o["formula"]), inverse)),
+             "misconceptions": list(o["misconceptions"])}
+            for o in options]
+
+
+def stats():
+    return _cache.stats()
+
+
+def clear():
+    _cache.clear()
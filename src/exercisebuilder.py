@@ -1,12 +1,13 @@
 import spotutils
 import datetime
 from collections import defaultdict
-import codebook
+import distractorcache
 from codebook import MisconceptionCode
 import ltlnode
 import random
 import re
 import math
+import itertools
 import ltltoeng_prose
 import ltltoeng_contextualized
 import misconceptionmodel
@@ -85,7 +86,38 @@ class ExerciseBuilder:
 
     def toSpotSyntax(self, s):
         return str(ltlnode.parse_ltl_string(s))
-    
+
+    def _canonicalTracePair(self, f_accepted, f_rejected):
+        """Literal-renamed canonical forms of the formulas, and the renaming back.
+
+        Traces are generated on the canonical forms and renamed back, so
+        exercises that differ only in their choice of literals share SPOT's
+        cached translations.
+        """
+        formulas = [ltlnode.parse_ltl_string(f_accepted)]
+        if f_rejected is not None:
+            formulas.append(ltlnode.parse_ltl_string(f_rejected))
+        canonical, renaming = ltlnode.canonicalize_jointly(formulas)
+        return [str(c) for c in canonical], ltlnode.invert_renaming(renaming)
+
+    def iterTraces(self, f_accepted, f_rejected=None):
+        """Lazily yield traces accepted by f_accepted (and, if given, rejected by f_rejected)."""
+        canonical, inverse = self._canonicalTracePair(f_accepted, f_rejected)
+        if f_rejected is None:
+            traces = spotutils.iter_accepted_traces(canonical[0])
+        else:
+            traces = spotutils.iter_traces(canonical[0], canonical[1])
+        for t in traces:
+            yield spotutils.rename_atoms(t, inverse)
+
+    def generateTraces(self, f_accepted, f_rejected=None, max_traces=5):
+        """Up to max_traces traces accepted by f_accepted (and, if given, rejected by f_rejected)."""
+        canonical, inverse = self._canonicalTracePair(f_accepted, f_rejected)
+        if f_rejected is None:
+            traces = spotutils.generate_accepted_traces(canonical[0], max_traces=max_traces)
+        else:
+            traces = spotutils.generate_traces(f_accepted=canonical[0], f_rejected=canonical[1], max_traces=max_traces)
+        return [spotutils.rename_atoms(t, inverse) for t in traces]
 
 
     def getLTLFormulaAsString(self, node):
@@ -405,23 +437,14 @@ class ExerciseBuilder:
 
     def build_exercise(self, literals, num_questions):
 
-        def contains_undersirable_lit(s):
-            TAUTOLOGY = r'\b1\b'
-            UNSAT = r'\b0\b'
-            # remove all the parens
-            y = s.replace('(', ' ').replace(')', ' ').replace("'", ' ')
-            x = bool(re.search(TAUTOLOGY, y)) or bool(re.search(UNSAT, y))
-
-            return x
-
-
         self.set_ltl_priorities()
         self.update_complexity()
 
         ## TODO: Find a better mapping between complexity and tree size
         tree_size = self.get_tree_size()
 
-        ## First generate a large pool from spot randltl
+        ## First draw a large pool of candidates. These come out of spotutils'
+        ## prefetched formula pool, sampled with no constant subformula.
         pool_size = 2*num_questions
         question_answers = spotutils.gen_rand_ltl(atoms = literals,
                                                   tree_size = tree_size,
@@ -447,11 +470,6 @@ class ExerciseBuilder:
         questions = []
         for answer in question_answers:
 
-            ## Lets make this even more conservative.
-            ## If the answer contains UNSAT or a tautology, skip it.
-            if contains_undersirable_lit(answer):
-                continue
-
 
             kind = self.choose_question_kind()
 
@@ -603,45 +621,23 @@ class ExerciseBuilder:
 
     def get_options_with_misconceptions_as_formula(self, answer):
         ltl = ltlnode.parse_ltl_string(answer)
-        d = codebook.getAllApplicableMisconceptions(ltl)
-
-        options = []
-        for misconception in d:
-            options.append({
-                "option": self.getLTLFormulaAsString(misconception.node),
-                "isCorrect": False,
-                "misconceptions": [str(misconception.misconception)]
-            })
-        ## Mutations from different misconceptions can collide textually OR
-        ## semantically (e.g. "G d" and "G (G d)"): two options denoting the
-        ## same property waste a distractor slot and make the misconception
-        ## attribution of whichever one the student picks arbitrary, so both
-        ## kinds of duplicate are merged.
-        merged_options = []
-        merged_nodes = []
-        for option in options:
-            existing_option = next((o for o in merged_options if o['option'] == option['option']), None)
-            if existing_option is None:
-                node = ltlnode.parse_ltl_string(option['option'])
-                existing_option = next(
-                    (o for o, kept in zip(merged_options, merged_nodes)
-                     if ltlnode.LTLNode.equiv(kept, node)), None)
-            if existing_option:
-                ## Union, not concatenation: the evidence model splits a
-                ## pick's strength by len(codes), so listing a code twice
-                ## (same misconception at two sites yielding equivalent
-                ## formulas) would halve that code's evidence.
-                existing_option['misconceptions'] += [
-                    code for code in option['misconceptions']
-                    if code not in existing_option['misconceptions']]
-            else:
-                merged_options.append(option)
-                merged_nodes.append(node)
+        ## The distractor set (every misconception site, one option per
+        ## semantic class) is shared by every student answering this formula
+        ## or any renaming of it. Each student is shown one random site per
+        ## misconception, and _sample_misconception_options then picks
+        ## misconceptions by their weight.
+        distractors = distractorcache.distractor_set(ltl)
 
         ## If we couldn't build anything here, skip it
-        if len(merged_options) == 0:
+        if len(distractors) == 0:
             return None
 
+        merged_options = [{
+            "option": self.getLTLFormulaAsString(ltlnode.parse_ltl_string(d["formula"])),
+            "isCorrect": False,
+            "misconceptions": d["misconceptions"]
+        } for d in distractorcache.one_per_misconception(distractors)]
+
         correct_option = {
             "option": self.getLTLFormulaAsString(ltl),
             "isCorrect": True,
@@ -649,8 +645,9 @@ class ExerciseBuilder:
         }
 
         ### BUILD A SINGLE RANDOM SYNTACTIC MUTATION (the red-herring control)
-        ## THAT IS NOT EQUIVALENT TO THE CORRECT ANSWER OR ANY OTHER OPTION
-        notEquivalentToNodes = [ltlnode.parse_ltl_string(o['option']) for o in merged_options]
+        ## THAT IS NOT EQUIVALENT TO THE CORRECT ANSWER OR ANY MISCONCEPTION
+        ## DISTRACTOR (shown to this student or not)
+        notEquivalentToNodes = [ltlnode.parse_ltl_string(d['formula']) for d in distractors]
         notEquivalentToNodes.append(ltl)
         mutated_node = applyRandomMutationNotEquivalentTo(ltl, notEquivalentToNodes)
         syntactic_option = None
@@ -756,15 +753,16 @@ class ExerciseBuilder:
             attempt_number = 1
             trace_choices = []
 
+            # Traces are drawn from one lazy stream, MAX_TRACES at a time, until
+            # some trace is not already used by another option.
+            trace_stream = self.iterTraces(formula, None if isCorrect else parenthesized_answer)
+            existing_trace_options = [option['option'] for option in trace_options]
             while (len(trace_choices) == 0) and (attempt_number <= max_trace_gen_attempts):
-                max_choice_size = attempt_number * self.MAX_TRACES
-                if isCorrect: 
-                    potential_trace_choices = spotutils.generate_accepted_traces(formula, max_traces=max_choice_size)
-                else:
-                    potential_trace_choices = spotutils.generate_traces(f_accepted=formula, f_rejected=parenthesized_answer, max_traces=max_choice_size)
-                potential_trace_choices = [exerciseprocessor.canonicalizeSpotTrace(t) for t in potential_trace_choices]
+                potential_trace_choices = [exerciseprocessor.canonicalizeSpotTrace(t)
+                                           for t in itertools.islice(trace_stream, self.MAX_TRACES)]
+                if len(potential_trace_choices) == 0:
+                    break
                 potential_trace_choices = list(dict.fromkeys(potential_trace_choices))
-                existing_trace_options = [option['option'] for option in trace_options]
                 trace_choices = [t for t in potential_trace_choices if t not in existing_trace_options]
                 attempt_number += 1
 
@@ -847,10 +845,10 @@ class ExerciseBuilder:
                 # Positive instances balance the answer key but are not a
                 # diagnostic opportunity for the selected misconception. A
                 # wrong "No" therefore remains ambiguous (no coded option).
-                potential_trace_choices = spotutils.generate_accepted_traces(parenthesized_answer)
+                potential_trace_choices = self.generateTraces(parenthesized_answer)
             else:
                 formula_asString = self.toSpotSyntax(probe_formula['option'])
-                potential_trace_choices = spotutils.generate_traces(f_accepted=formula_asString, f_rejected=parenthesized_answer)
+                potential_trace_choices = self.generateTraces(formula_asString, parenthesized_answer)
 
 
                 ## LTL Formula to Show
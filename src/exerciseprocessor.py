@@ -56,10 +56,9 @@ def removeORs(node):
         else:
             return removeORs(node.right)
     elif isinstance(node, ltlnode.BinaryOperatorNode):
-        node.left = removeORs(node.left)
-        node.right = removeORs(node.right)
+        return type(node)(removeORs(node.left), removeORs(node.right))
     elif isinstance(node, ltlnode.UnaryOperatorNode):
-        node.operand = removeORs(node.operand)
+        return type(node)(removeORs(node.operand))
     
     return node
 
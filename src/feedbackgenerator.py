@@ -6,34 +6,44 @@ class FeedbackGenerator:
     def __init__(self, correct, student):
         self.correct_answer = correct
         self.student_selection = student
+        self._relation = None
+
+    def relation(self):
+        # Every predicate below, and getCEWords, reads this one relation, so a
+        # wrong answer costs a single spotutils.relate call rather than a
+        # separate pair of translations and a product per question asked.
+        if self._relation is None:
+            self._relation = spotutils.relate(self.correct_answer, self.student_selection)
+        return self._relation
 
     def correctAnswerContained(self):
         # correct answer => student selection
-
-
-        return spotutils.isSufficientFor(self.correct_answer, self.student_selection)
+        return self.relation().f_implies_g
     
     def correctAnswerSubsumes(self):
-
-
-
         # student selection => correct answer
-        return spotutils.isSufficientFor(self.student_selection, self.correct_answer)
+        return self.relation().g_implies_f
     
     def disjoint(self):
-        return spotutils.areDisjoint(self.correct_answer, self.student_selection)
+        return self.relation().disjoint
 
     def equivalent(self):
-        return spotutils.areEquivalent(self.correct_answer, self.student_selection)
-
-    def getCEWords(self):
-        if self.disjoint():
-            return spotutils.generate_accepted_traces(self.student_selection)
-        elif self.correctAnswerSubsumes():
-            return spotutils.generate_traces(f_accepted=self.correct_answer, f_rejected=self.student_selection)
-        elif self.correctAnswerContained():
-            return spotutils.generate_traces(f_accepted=self.student_selection, f_rejected=self.correct_answer)
+        return self.relation().kind == spotutils.SemanticRelation.EQUIVALENT
+
+    def getCEWords(self, max_words=5, max_length=spotutils.MAX_WITNESS_LENGTH):
+        # The shortest distinguishing lassos rather than whatever SPOT finds
+        # first: they are what a student can actually read, and they stay
+        # small once expanded across the combined alphabet. They come from the
+        # products relate already built for its verdicts, not new translations.
+        relation = self.relation()
+        SemanticRelation = spotutils.SemanticRelation
+        if relation.disjoint:
+            # Every word of the student's selection is outside the correct answer.
+            return relation.words(SemanticRelation.G_NOT_F, max_words, max_length)
+        elif relation.g_implies_f:
+            return relation.words(SemanticRelation.F_NOT_G, max_words, max_length)
+        elif relation.f_implies_g:
+            return relation.words(SemanticRelation.G_NOT_F, max_words, max_length)
         ### What about the case where there is partial overlap.
         else:
-            return spotutils.generate_traces(f_accepted=self.student_selection, f_rejected=self.correct_answer)
-
+            return relation.words(SemanticRelation.G_NOT_F, max_words, max_length)
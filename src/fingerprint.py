@@ -0,0 +1,112 @@
+"""Semantic fingerprints: a formula's verdicts on a fixed bank of traces.
+
+Two equivalent formulas agree on every trace, so if their fingerprints over
+the same alphabet differ they are certainly not equivalent -- a pure-Python
+check that is far cheaper than the two SPOT products `areEquivalent` needs.
+Equal fingerprints prove nothing and must fall through to SPOT. Most pairs
+checked while merging distractors or filtering syntactic mutations are not
+equivalent, and are separated by some short lasso in the bank.
+
+A fingerprint is an int bitvector (bit i = verdict on trace i of the bank), so
+it also works as a hash for grouping formulas by likely semantics.
+"""
+
+import itertools
+import random
+
+from lrucache import LRUCache
+import ltlnode
+import traceeval
+
+
+## The bank for an alphabet of k literals is:
+##  * every constant trace cycle{v}, for each of the 2^k valuations v
+##    (only while 2^k <= EXHAUSTIVE_VALUATIONS_LIMIT), and
+##  * RANDOM_LASSOS lassos with prefixes of up to MAX_PREFIX states and
+##    cycles of up to MAX_CYCLE states, drawn from a PRNG seeded by k.
+## It depends only on the alphabet, so fingerprints are stable across
+## processes and restarts.
+EXHAUSTIVE_VALUATIONS_LIMIT = 16
+RANDOM_LASSOS = 96
+MAX_PREFIX = 3
+MAX_CYCLE = 3
+BANK_SEED = 20261018
+
+_banks = {}
+_fingerprints = LRUCache(max_entries=8192)
+
+
+def _valuations(alphabet):
+    for bits in itertools.product([False, True], repeat=len(alphabet)):
+        yield frozenset(a for a, b in zip(alphabet, bits) if b)
+
+
+def trace_bank(alphabet):
+    """The fixed list of lassos used to fingerprint formulas over `alphabet`."""
+    alphabet = tuple(alphabet)
+    bank = _banks.get(alphabet)
+    if bank is not None:
+        return bank
+
+    bank = []
+    if 2 ** len(alphabet) <= EXHAUSTIVE_VALUATIONS_LIMIT:
+        bank.extend(traceeval.Lasso([], [v]) for v in _valuations(alphabet))
+
+    rng = random.Random(BANK_SEED + len(alphabet))
+
+    def random_state():
+        return frozenset(a for a in alphabet if rng.random() < 0.5)
+
+    seen = set(bank)
+    for _ in range(RANDOM_LASSOS):
+        prefix = [random_state() for _ in range(rng.randint(0, MAX_PREFIX))]
+        cycle = [random_state() for _ in range(rng.randint(1, MAX_CYCLE))]
+        lasso = traceeval.Lasso(prefix, cycle)
+        if lasso not in seen:
+            seen.add(lasso)
+            bank.append(lasso)
+
+    _banks[alphabet] = bank
+    return bank
+
+
+def fingerprint(node, alphabet=None):
+    """Bitvector of `node`'s verdicts on the trace bank for `alphabet`.
+
+    Fingerprints are only comparable over the same alphabet, which must
+    contain every literal of `node`. Defaults to the sorted literals of `node`.
+    """
+    if alphabet is None:
+        alphabet = sorted(ltlnode.literals_in_order(node))
+    alphabet = tuple(alphabet)
+
+    key = (str(node), alphabet)
+    cached = _fingerprints.get(key)
+    if cached is not None:
+        return cached
+
+    bits = 0
+    for i, lasso in enumerate(trace_bank(alphabet)):
+        if traceeval.evaluate(node, lasso):
+            bits |= 1 << i
+    _fingerprints.put(key, bits)
+    return bits
+
+
+def separating_trace(node1, node2, alphabet=None):
+    """A lasso from the bank on which the two formulas disagree, or None."""
+    if alphabet is None:
+        alphabet = sorted(set(ltlnode.literals_in_order(node1)) | set(ltlnode.literals_in_order(node2)))
+    diff = fingerprint(node1, alphabet) ^ fingerprint(node2, alphabet)
+    if diff == 0:
+        return None
+    return trace_bank(alphabet)[(diff & -diff).bit_length() - 1]
+
+
+def maybe_equivalent(node1, node2):
+    """False if the bank separates the two formulas; True means only "not refuted"."""
+    return separating_trace(node1, node2) is None
+
+
+def fingerprint_stats():
+    return _fingerprints.stats()
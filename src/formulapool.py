@@ -0,0 +1,166 @@
+"""Pre-generated random formulas, kept ready ahead of the requests that need them.
+
+Random formula generators are cheap per formula but not per call: setting one
+up parses its priority profile, and the exercise builder used to make one such
+call per exercise (plus one per template subformula). A FormulaPool keeps one
+long-lived generator per (number of atoms, tree size, priority profile) from
+a caller-supplied source (spotutils uses formulasampler's), and a buffer of
+formulas already drawn from it. A background thread tops buffers up once they
+run low, so `take` normally just pops formulas off a deque.
+
+Formulas are generated over the atoms p0, p1, ... and renamed to the caller's
+atoms on the way out, so requests that differ only in their choice of literals
+(as /exercise/generate's do) share a buffer.
+"""
+
+import itertools
+import random
+import re
+import threading
+from collections import deque
+
+from lrucache import LRUCache
+
+
+DEFAULT_BUFFER_SIZE = 64
+DEFAULT_LOW_WATER = 16
+DEFAULT_MAX_STREAMS = 32
+
+## SPOT prints unary operators without a space ("Gp0", "XFp1"), so an atom may
+## follow an uppercase operator with no word boundary in between.
+_POOL_ATOM = re.compile(r'(?<![a-z0-9_])p(\d+)(?![a-z0-9_])')
+
+
+def pool_atoms(count):
+    return [f'p{i}' for i in range(count)]
+
+
+class _Stream:
+
+    def __init__(self, generator):
+        self.generator = generator
+        self.buffer = deque()
+        self.lock = threading.Lock()
+
+    def draw(self, count):
+        """Draw up to `count` formulas from the generator. Caller holds `lock`."""
+        return [str(formula) for formula in itertools.islice(self.generator, count)]
+
+
+class FormulaPool:
+
+    def __init__(self, source, buffer_size=DEFAULT_BUFFER_SIZE, low_water=DEFAULT_LOW_WATER,
+                 max_streams=DEFAULT_MAX_STREAMS, background=True):
+        """
+        Args:
+            source: Called as source(atoms, tree_size, priorities, seed) to
+                create a stream's formula iterator. Its formulas are served
+                as drawn, so any filtering belongs in the source.
+            buffer_size: Formulas kept ready per stream.
+            low_water: A take that leaves fewer than this many schedules a refill.
+            max_streams: Generators kept alive at once; the least recently used
+                one is dropped (and rebuilt on demand) beyond this.
+            background: Refill buffers in a daemon thread (otherwise only
+                `take` and `fill` draw formulas).
+        """
+        self.buffer_size = buffer_size
+        self.low_water = low_water
+        self.source = source
+        self.background = background
+        self._streams = LRUCache(max_entries=max_streams)
+        self._streams_lock = threading.Lock()
+        self._pending = deque()
+        self._wakeup = threading.Condition()
+        self._thread = None
+
+        self.served = 0
+        self.drawn_inline = 0
+        self.refilled = 0
+
+    @staticmethod
+    def _key(atom_count, tree_size, priorities):
+        return (atom_count, tree_size, tuple(sorted(priorities.items())))
+
+    def _stream(self, key):
+        with self._streams_lock:
+            stream = self._streams.get(key)
+            if stream is None:
+                atom_count, tree_size, priorities = key
+                generator = self.source(pool_atoms(atom_count), tree_size, dict(priorities),
+                                        random.randrange(1 << 30))
+                stream = _Stream(generator)
+                self._streams.put(key, stream)
+            return stream
+
+    def take(self, atoms, tree_size, priorities, count):
+        """`count` random formulas over `atoms`.
+
+        Fewer may be returned only if the source runs dry.
+        """
+        key = self._key(len(atoms), tree_size, priorities)
+        stream = self._stream(key)
+
+        formulas = []
+        while len(formulas) < count:
+            try:
+                formulas.append(stream.buffer.popleft())
+            except IndexError:
+                break
+        if len(formulas) < count:
+            with stream.lock:
+                drawn = stream.draw(count - len(formulas))
+            self.drawn_inline += len(drawn)
+            formulas.extend(drawn)
+
+        if len(stream.buffer) < self.low_water:
+            self._schedule(key)
+        self.served += len(formulas)
+        return [rename_pool_atoms(f, atoms) for f in formulas]
+
+    def fill(self, key):
+        """Top up the buffer of the stream for `key` to `buffer_size`."""
+        stream = self._stream(key)
+        with stream.lock:
+            missing = self.buffer_size - len(stream.buffer)
+            if missing > 0:
+                drawn = stream.draw(missing)
+                stream.buffer.extend(drawn)
+                self.refilled += len(drawn)
+
+    def _schedule(self, key):
+        if not self.background:
+            return
+        with self._wakeup:
+            if key not in self._pending:
+                self._pending.append(key)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._refill_loop, name='formula-pool-refill', daemon=True)
+                self._thread.start()
+            self._wakeup.notify()
+
+    def _refill_loop(self):
+        while True:
+            with self._wakeup:
+                while not self._pending:
+                    self._wakeup.wait()
+                key = self._pending[0]
+            try:
+                self.fill(key)
+            except Exception as e:
+                print(f"Warning: could not refill formula pool {key}: {e}")
+            with self._wakeup:
+                self._pending.popleft()
+
+    def stats(self):
+        return {
+            "streams": len(self._streams),
+            "served": self.served,
+            "drawn_inline": self.drawn_inline,
+            "refilled": self.refilled,
+            "pending": len(self._pending),
+        }
+
+
+def rename_pool_atoms(formula, atoms):
+    """Replace p0, p1, ... in a pooled formula by atoms[0], atoms[1], ..."""
+    return _POOL_ATOM.sub(lambda m: atoms[int(m.group(1))], formula)
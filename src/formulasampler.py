@@ -0,0 +1,185 @@
+"""Random LTL formulas that are non-trivial by construction.
+
+spot.randltl draws a formula and leaves it to the caller to throw away the
+ones containing `1`/`0` or simplifying to a constant, which costs a SPOT
+simplification per attempt. FormulaSampler instead grows a tree of exactly
+the requested size, using the same operator priorities randltl takes, and
+constrains it as it goes:
+
+  * constants are never generated; only the atoms are leaves,
+  * a binary operator never gets two identical operands (`a & a`, `a -> a`),
+    and F, G and ! are never stacked on themselves (`F F a`, `!!a`), and
+  * every subformula must take both truth values on the fingerprint trace
+    bank (see fingerprint.py), so none of them -- the root included -- is a
+    tautology or a contradiction.
+
+The last check is pure Python and one-sided in the right direction: a
+formula that is true on one bank trace and false on another is certainly not
+constant. A subtree that fails a check is redrawn on the spot, and the
+sampler counts how often that happens (`stats()['rejection_rate']`).
+
+The formulas are not distributed as randltl's for the same priorities:
+every formula has exactly the requested number of nodes (randltl simplifies
+its draws, so many come out smaller); true and false are never drawn, nor are
+xor, R, W and M, which ltlnode cannot represent, whatever their priority; and
+redrawing rejected subtrees shifts weight away from operators whose small
+instances are often constant or repeat an operand.
+"""
+
+import random
+import threading
+
+from ltlnode import (LiteralNode, NotNode, AndNode, OrNode, ImpliesNode,
+                     EquivalenceNode, NextNode, FinallyNode, GloballyNode, UntilNode)
+import fingerprint
+import traceeval
+
+
+## randltl priority names this sampler can generate, by arity. Any other
+## priority (true, false, xor, R, W, M) is ignored.
+UNARY_OPERATORS = {'not': NotNode, 'X': NextNode, 'F': FinallyNode, 'G': GloballyNode}
+BINARY_OPERATORS = {'and': AndNode, 'or': OrNode, 'implies': ImpliesNode,
+                    'equiv': EquivalenceNode, 'U': UntilNode}
+
+## Operators that are idempotent when stacked (F F a == F a, !!a == a).
+_NO_REPEAT = (NotNode, FinallyNode, GloballyNode)
+
+## Redraws of one subtree before giving up on it (and redrawing its parent),
+## and of a whole formula before concluding the priorities cannot produce one.
+MAX_REDRAWS = 20
+MAX_SAMPLE_ATTEMPTS = 50
+
+_totals_lock = threading.Lock()
+_totals = {"sampled": 0, "built": 0, "rejected": 0}
+
+
+def takes_both_values(node, alphabet):
+    """True if `node` is true on some bank trace over `alphabet` and false on another.
+
+    Such a formula is certainly neither a tautology nor a contradiction.
+    """
+    seen = set()
+    for lasso in fingerprint.trace_bank(alphabet):
+        seen.add(traceeval.evaluate(node, lasso))
+        if len(seen) == 2:
+            return True
+    return False
+
+
+class FormulaSampler:
+
+    def __init__(self, atoms, priorities, seed=None):
+        """
+        Args:
+            atoms: The atomic propositions to draw leaves from.
+            priorities: randltl-style operator priorities ({'ap': 5, 'U': 7, ...}).
+            seed: Seed for the sampler's own PRNG.
+        """
+        if not atoms:
+            raise ValueError("A FormulaSampler needs at least one atom")
+        self.atoms = list(atoms)
+        self.alphabet = tuple(sorted(set(self.atoms)))
+        self.rng = random.Random(seed)
+        self.unary = [(UNARY_OPERATORS[op], w) for op, w in priorities.items()
+                      if op in UNARY_OPERATORS and w > 0]
+        self.binary = [(BINARY_OPERATORS[op], w) for op, w in priorities.items()
+                       if op in BINARY_OPERATORS and w > 0]
+        self._unary_classes = {c for c, _ in self.unary}
+        self.sampled = 0
+        self.built = 0
+        self.rejected = 0
+
+    def sample(self, size):
+        """A formula of `size` nodes (fewer only if the priorities allow no
+        operator of the needed arity), none of whose subformulas is constant.
+
+        Returns None if no such formula turned up in MAX_SAMPLE_ATTEMPTS tries
+        (e.g. a single atom and only binary operators).
+        """
+        for _ in range(MAX_SAMPLE_ATTEMPTS):
+            node = self._tree(size)
+            if node is not None:
+                self.sampled += 1
+                with _totals_lock:
+                    _totals["sampled"] += 1
+                return node
+        return None
+
+    def iter_formulas(self, size):
+        """Sampled formulas as strings SPOT can parse; ends only if `sample` fails."""
+        while True:
+            node = self.sample(size)
+            if node is None:
+                return
+            yield str(node)
+
+    def _count(self, rejected):
+        self.built += 1
+        if rejected:
+            self.rejected += 1
+        with _totals_lock:
+            _totals["built"] += 1
+            if rejected:
+                _totals["rejected"] += 1
+
+    def _choose(self, options):
+        return self.rng.choices([c for c, _ in options], weights=[w for _, w in options], k=1)[0]
+
+    def _tree(self, size):
+        if size <= 1 or not (self.unary or (self.binary and size >= 3)):
+            return LiteralNode(self.rng.choice(self.atoms))
+
+        options = list(self.unary)
+        if size >= 3:
+            options += self.binary
+
+        for _ in range(MAX_REDRAWS):
+            op = self._choose(options)
+            if op in self._unary_classes:
+                operand = self._tree(size - 1)
+                if operand is None:
+                    return None
+                if op in _NO_REPEAT and type(operand) is op:
+                    self._count(rejected=True)
+                    continue
+                node = op(operand)
+            else:
+                left_size = self.rng.randint(1, size - 2)
+                left = self._tree(left_size)
+                right = self._tree(size - 1 - left_size)
+                if left is None or right is None:
+                    return None
+                if str(left) == str(right):
+                    self._count(rejected=True)
+                    continue
+                node = op(left, right)
+            ok = takes_both_values(node, self.alphabet)
+            self._count(rejected=not ok)
+            if ok:
+                return node
+        return None
+
+    def stats(self):
+        return _stats(self.sampled, self.built, self.rejected)
+
+
+def _stats(sampled, built, rejected):
+    return {
+        "sampled": sampled,
+        "built": built,
+        "rejected": rejected,
+        "rejection_rate": rejected / built if built else 0.0,
+    }
+
+
+def sampler_stats():
+    """Totals over every FormulaSampler in this process. `built` counts
+    operator nodes tried, `rejected` those redrawn for failing a check."""
+    with _totals_lock:
+        return _stats(_totals["sampled"], _totals["built"], _totals["rejected"])
+
+
+def sample_formulas(atoms, tree_size, priorities, seed=None):
+    """An endless stream of constrained formulas; the formula source spotutils
+    gives formulapool.FormulaPool."""
+    return FormulaSampler(atoms, priorities, seed).iter_formulas(tree_size)
@@ -0,0 +1,144 @@
+"""Bounded least-recently-used caches with hit/miss/eviction counters.
+
+Used wherever the tutor memoizes expensive work (SPOT automata, relation
+checks, ...). A cache is bounded by entry count and, optionally, by a total
+*weight* computed per value, so a handful of large automata cannot crowd out
+memory the way a plain entry count would allow. Entries can also be given a
+time to live, for results that are only worth keeping for a while.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+
+    def __init__(self, max_entries=1024, max_weight=None, weigh=None, ttl=None, clock=time.monotonic):
+        """
+        Args:
+            max_entries: Maximum number of entries kept.
+            max_weight: Maximum total weight kept, or None for no weight bound.
+            weigh: Function value -> non-negative int weight. Defaults to 1 per entry.
+            ttl: Seconds an entry stays valid after it is stored, or None to keep
+                entries until they are evicted.
+            clock: Time source for `ttl` (seconds, monotonic).
+        """
+        self.max_entries = max_entries
+        self.max_weight = max_weight
+        self._weigh = weigh if weigh is not None else (lambda value: 1)
+        self.ttl = ttl
+        self._clock = clock
+
+        self._entries = OrderedDict()   # key -> (value, weight, expiry time or None)
+        self._total_weight = 0
+        self._lock = threading.RLock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        with self._lock:
+            return self._live(key) is not None
+
+    @property
+    def total_weight(self):
+        return self._total_weight
+
+    def get(self, key, default=None):
+        """Return the cached value for `key` (marking it recently used), or `default`."""
+        with self._lock:
+            entry = self._live(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value):
+        """Insert or replace `key`, evicting least-recently-used entries to stay in bounds.
+
+        A value heavier than max_weight on its own is not cached at all.
+        """
+        weight = self._weigh(value)
+        with self._lock:
+            if key in self._entries:
+                self._total_weight -= self._entries.pop(key)[1]
+            if self.max_weight is not None and weight > self.max_weight:
+                return
+            expires = self._clock() + self.ttl if self.ttl is not None else None
+            self._entries[key] = (value, weight, expires)
+            self._total_weight += weight
+            self._evict()
+
+    def get_or_compute(self, key, compute):
+        """Return the cached value for `key`, computing and caching it on a miss.
+
+        `compute` runs outside the lock, so two threads missing on the same key
+        may both compute it; the later result wins. That is cheaper than
+        serializing every computation behind one lock.
+        """
+        with self._lock:
+            entry = self._live(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        value = compute()
+        self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._total_weight = 0
+
+    def stats(self):
+        """Counters and current occupancy, e.g. for logging or an admin page."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+                "entries": len(self._entries),
+                "weight": self._total_weight,
+                "max_entries": self.max_entries,
+                "max_weight": self.max_weight,
+            }
+
+    def _live(self, key):
+        """The entry for `key`, dropping it if it has expired. Caller holds the lock."""
+        entry = self._entries.get(key)
+        if entry is not None and entry[2] is not None and entry[2] <= self._clock():
+            del self._entries[key]
+            self._total_weight -= entry[1]
+            self.expirations += 1
+            return None
+        return entry
+
+    def _over_bounds(self):
+        return (len(self._entries) > self.max_entries
+                or (self.max_weight is not None and self._total_weight > self.max_weight))
+
+    def _evict(self):
+        if self.ttl is not None and self._over_bounds():
+            # Make room from expired entries first, wherever they are in LRU order.
+            now = self._clock()
+            for key in [k for k, (_, _, expires) in self._entries.items() if expires <= now]:
+                self._total_weight -= self._entries.pop(key)[1]
+                self.expirations += 1
+        while self._entries and self._over_bounds():
+            _, (_, weight, _) = self._entries.popitem(last=False)
+            self._total_weight -= weight
+            self.evictions += 1
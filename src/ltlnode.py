@@ -2,6 +2,9 @@
 
 import os
 import random
+import threading
+import weakref
+from lrucache import LRUCache
 
 ### TODO: Ideally, this should not be in 
 ### src, but mocked in the test directory.
@@ -15,7 +18,7 @@ from antlr4 import CommonTokenStream, ParseTreeWalker
 from antlr4 import ParseTreeWalker, CommonTokenStream, InputStream
 from ltlLexer import ltlLexer
 from ltlParser import ltlParser
-from abc import ABC, abstractmethod
+from abc import ABC, ABCMeta, abstractmethod
 import ltltoeng
 
 
@@ -44,17 +47,88 @@ OPERATOR_PRECEDENCE = {
     'Literal': 10
 }
 
+# Literal names that SPOT reads as boolean constants rather than atomic
+# propositions. They are never renamed.
+BOOLEAN_CONSTANTS = {'true', 'false', '1', '0'}
 
-class LTLNode(ABC):
-    def __init__(self, type):
-        self.type = type
 
+class _InternedNodeMeta(ABCMeta):
+    """Hash-consing: constructing a node equal to a live one returns that one.
+
+    Children are interned before their parents, so a node is identified by
+    its class and its constructor arguments (child nodes compared by
+    identity). There is one object per distinct subformula, shared by every
+    formula that contains it, and equal formulas are the same object.
     """
-        LTL Node in Classic/ Spot Syntax
+
+    def __call__(cls, *args):
+        key = (cls,) + args
+        with _intern_lock:
+            node = _interned.get(key)
+        if node is None:
+            node = super().__call__(*args)
+            with _intern_lock:
+                node = _interned.setdefault(key, node)
+        return node
+
+
+## Live nodes by (class, *constructor arguments). Entries go away with the
+## last reference to their node.
+_interned = weakref.WeakValueDictionary()
+_intern_lock = threading.Lock()
+
+
+def interned_node_count():
+    return len(_interned)
+
+
+class LTLNode(ABC, metaclass=_InternedNodeMeta):
+    """A node of an interned, immutable formula DAG.
+
+    Equality is identity (see _InternedNodeMeta), and each node caches its
+    Classic string, hash, size and set of literals when it is built, so
+    using a formula as a key or printing it no longer walks the tree.
+
+    Attributes:
+        size: The number of nodes of the formula as a tree.
+        literals: frozenset of the literals it mentions, excluding boolean constants.
+    """
+
+    __slots__ = ('_str', '_hash', 'size', 'literals', '__weakref__')
+
+    ## Nodes are immutable once built: parse_ltl_string hands the same cached
+    ## tree to every caller, and interning shares subtrees between formulas,
+    ## so a rewrite must build new nodes rather than assign to an existing one.
+    ## Constructors set their slots with _init.
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable; build a new node instead of setting {name!r}")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def _init(self, string, size, literals, **fields):
+        for name, value in fields.items():
+            object.__setattr__(self, name, value)
+        object.__setattr__(self, '_str', string)
+        object.__setattr__(self, '_hash', hash((type(self),) + tuple(fields.values())))
+        object.__setattr__(self, 'size', size)
+        object.__setattr__(self, 'literals', literals)
+
+    def __hash__(self):
+        return self._hash
+
+    ## Copies of an immutable, interned node would only be worse versions of it.
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    """
+        LTL Node in Classic/ Spot Syntax, built once by the constructor
     """
-    @abstractmethod
     def __str__(self):
-        pass
+        return self._str
 
     """
         LTL Node in English
@@ -85,6 +159,16 @@ class LTLNode(ABC):
 
     @staticmethod
     def equiv(formula1, formula2):
+        # Equivalence is invariant under a joint renaming of literals, so
+        # compare canonical forms: that way `a U b` vs `F b` and `q U s` vs `F s`
+        # are one check as far as SPOT's caches are concerned.
+        if isinstance(formula1, LTLNode) and isinstance(formula2, LTLNode):
+            (formula1, formula2), _ = canonicalize_jointly([formula1, formula2])
+            # Most pairs checked are not equivalent, and a short trace that
+            # separates them is far cheaper to find than two SPOT products.
+            from fingerprint import maybe_equivalent
+            if not maybe_equivalent(formula1, formula2):
+                return False
         return areEquivalent(formula1, formula2)
 
 class ltlListenerImpl(ltlListener) :
@@ -155,13 +239,15 @@ class ltlListenerImpl(ltlListener) :
 
 
 class UnaryOperatorNode(LTLNode):
+    __slots__ = ('operator', 'operand')
+    type = 'UnaryOperator'
+
     def __init__(self, operator, operand):
-        super().__init__('UnaryOperator')
-        self.operator = operator
-        self.operand = operand
+        self._init(f'({operator} {operand._str})', 1 + operand.size, operand.literals,
+                   operator=operator, operand=operand)
 
-    def __str__(self):
-        return f'({self.operator} {str(self.operand)})'
+    def __reduce__(self):
+        return (type(self), (self.operand,))
     
     def __to_english__(self):
         x = ltltoeng.apply_special_pattern_if_possible(self)
@@ -177,14 +263,16 @@ class UnaryOperatorNode(LTLNode):
 
 
 class BinaryOperatorNode(LTLNode):
+    __slots__ = ('operator', 'left', 'right')
+    type = 'BinaryOperator'
+
     def __init__(self, operator, left, right):
-        super().__init__('BinaryOperator')
-        self.operator = operator
-        self.left = left
-        self.right = right
+        literals = left.literals if right.literals <= left.literals else left.literals | right.literals
+        self._init(f'({left._str} {operator} {right._str})', 1 + left.size + right.size, literals,
+                   operator=operator, left=left, right=right)
 
-    def __str__(self):
-        return f'({str(self.left)} {self.operator} {str(self.right)})'
+    def __reduce__(self):
+        return (type(self), (self.left, self.right))
     
     def __to_english__(self):
         x = ltltoeng.apply_special_pattern_if_possible(self)
@@ -200,12 +288,15 @@ class BinaryOperatorNode(LTLNode):
 
 
 class LiteralNode(LTLNode):
+    __slots__ = ('value',)
+    type = 'Literal'
+
     def __init__(self, value):
-        super().__init__('Literal')
-        self.value = value
+        literals = frozenset() if value in BOOLEAN_CONSTANTS else frozenset((value,))
+        self._init(value, 1, literals, value=value)
 
-    def __str__(self):
-        return self.value
+    def __reduce__(self):
+        return (LiteralNode, (self.value,))
     
     def __to_english__(self):
         x = ltltoeng.apply_special_pattern_if_possible(self)
@@ -225,6 +316,7 @@ class LiteralNode(LTLNode):
 
 
 class UntilNode(BinaryOperatorNode):
+    __slots__ = ()
     symbol = UNTIL_SYMBOL
     def __init__(self, left, right):
         super().__init__(UntilNode.symbol, left, right)
@@ -255,6 +347,7 @@ class UntilNode(BinaryOperatorNode):
 
 
 class NextNode(UnaryOperatorNode):
+    __slots__ = ()
     symbol = NEXT_SYMBOL
     def __init__(self, operand):
         super().__init__(NextNode.symbol, operand)
@@ -274,6 +367,7 @@ class NextNode(UnaryOperatorNode):
 
 
 class GloballyNode(UnaryOperatorNode):
+    __slots__ = ()
     symbol = GLOBALLY_SYMBOL
     def __init__(self, operand):
         super().__init__(GloballyNode.symbol, operand)
@@ -304,6 +398,7 @@ class GloballyNode(UnaryOperatorNode):
 
 
 class FinallyNode(UnaryOperatorNode):
+    __slots__ = ()
     symbol = FINALLY_SYMBOL
     def __init__(self, operand):
         super().__init__(FinallyNode.symbol, operand)
@@ -334,6 +429,7 @@ class FinallyNode(UnaryOperatorNode):
 
 class OrNode(BinaryOperatorNode):
 
+    __slots__ = ()
     symbol = OR_SYMBOL
 
     def __init__(self, left, right):
@@ -361,6 +457,7 @@ class OrNode(BinaryOperatorNode):
 
 
 class AndNode(BinaryOperatorNode):
+    __slots__ = ()
     symbol = AND_SYMBOL
     def __init__(self, left, right):
         super().__init__(AndNode.symbol, left, right)
@@ -385,6 +482,7 @@ class AndNode(BinaryOperatorNode):
 
 
 class NotNode(UnaryOperatorNode):
+    __slots__ = ()
     symbol = NOT_SYMBOL
     def __init__(self, operand):
         super().__init__(NotNode.symbol, operand)
@@ -408,6 +506,7 @@ class NotNode(UnaryOperatorNode):
             return f"it is not the case that {op}"
 
 class ImpliesNode(BinaryOperatorNode):
+    __slots__ = ()
     symbol = IMPLIES_SYMBOL
     def __init__(self, left, right):
         super().__init__(ImpliesNode.symbol, left, right)
@@ -436,6 +535,7 @@ class ImpliesNode(BinaryOperatorNode):
 
 
 class EquivalenceNode(BinaryOperatorNode):
+    __slots__ = ()
     symbol = EQUIVALENCE_SYMBOL
     def __init__(self, left, right):
         super().__init__(EquivalenceNode.symbol, left, right)
@@ -463,7 +563,51 @@ class EquivalenceNode(BinaryOperatorNode):
 
 
 
+## Parser backends: the ANTLR grammar in ltl.g4 (the default), or the
+## hand-written precedence-climbing parser in precedenceparser.py, which
+## builds the same trees several times faster but raises on malformed input
+## rather than recovering. LTL_PARSER selects one.
+PARSER_BACKENDS = ('antlr', 'precedence')
+_parser_backend = 'antlr'
+
+
+def set_parser_backend(name):
+    """Use parser backend `name` (one of PARSER_BACKENDS) for parse_ltl_string."""
+    global _parser_backend
+    if name not in PARSER_BACKENDS:
+        raise ValueError(f"Unknown LTL parser backend {name!r}; expected one of {PARSER_BACKENDS}")
+    _parser_backend = name
+
+
+set_parser_backend(os.environ.get('LTL_PARSER') or 'antlr')
+
+
+## Parsed trees by input string. The same formulas are parsed over and over
+## (options printed and parsed back, every option on every render), and since
+## nodes are immutable every caller can share one tree.
+PARSE_CACHE_ENTRIES = 4096
+_parse_cache = LRUCache(max_entries=PARSE_CACHE_ENTRIES)
+
+
 def parse_ltl_string(s):
+    """The LTLNode tree of formula string `s`, shared with other callers of
+    the same string; it must not (and cannot) be modified."""
+    backend = _parser_backend
+    return _parse_cache.get_or_compute((backend, s), lambda: _parse_uncached(s, backend))
+
+
+def _parse_uncached(s, backend):
+    if backend == 'precedence':
+        import precedenceparser
+        return precedenceparser.parse(s)
+    return parse_ltl_string_antlr(s)
+
+
+def parse_cache_stats():
+    return _parse_cache.stats()
+
+
+def parse_ltl_string_antlr(s):
     # Create an input stream from the string
     input_stream = InputStream(s)
 
@@ -488,3 +632,85 @@ def parse_ltl_string(s):
     return root
 
 
+## Alpha-renaming ##
+#
+# Questions are generated over random literals, so `a U b` and `q U s` are the
+# same question up to renaming. `canonicalize` renames literals to p0, p1, ...
+# in order of first (pre-order) occurrence, so both become `(p0 U p1)`.
+# Anything that depends only on the semantics of a formula (translations,
+# equivalence checks, generated traces) can be computed on the canonical form
+# and instantiated back with the inverse renaming.
+
+CANONICAL_LITERAL_PREFIX = 'p'
+
+
+def canonical_literal(index):
+    return f"{CANONICAL_LITERAL_PREFIX}{index}"
+
+
+def literals_in_order(node):
+    """The distinct literals of `node` (excluding boolean constants), in order of first occurrence."""
+    seen = {}
+    stack = [node]
+    while stack:
+        n = stack.pop()
+        if isinstance(n, LiteralNode):
+            if n.value not in BOOLEAN_CONSTANTS:
+                seen.setdefault(n.value, None)
+        elif isinstance(n, UnaryOperatorNode):
+            stack.append(n.operand)
+        elif isinstance(n, BinaryOperatorNode):
+            stack.append(n.right)
+            stack.append(n.left)
+    return list(seen)
+
+
+def rename_literals(node, renaming):
+    """A copy of `node` with each literal renamed by `renaming` (literals not in it are kept).
+
+    `node` itself is not modified; subtrees whose literals are all kept are
+    shared with it.
+    """
+    if node.literals.isdisjoint(renaming):
+        return node
+    if isinstance(node, LiteralNode):
+        return LiteralNode(renaming.get(node.value, node.value))
+    elif isinstance(node, UnaryOperatorNode):
+        return type(node)(rename_literals(node.operand, renaming))
+    elif isinstance(node, BinaryOperatorNode):
+        return type(node)(rename_literals(node.left, renaming),
+                          rename_literals(node.right, renaming))
+    raise TypeError(f"Cannot rename literals in {node!r}")
+
+
+def canonicalize_jointly(nodes):
+    """Rename the literals of several formulas with one shared renaming.
+
+    Relations between formulas (equivalence, one trace separating them) are
+    only preserved if they are renamed together.
+
+    Returns:
+        (canonical_nodes, renaming), where renaming maps each original literal
+        to its canonical name. Invert it to map results on the canonical forms
+        (e.g. traces) back to the original literals.
+    """
+    renaming = {}
+    for node in nodes:
+        for literal in literals_in_order(node):
+            if literal not in renaming:
+                renaming[literal] = canonical_literal(len(renaming))
+    return [rename_literals(node, renaming) for node in nodes], renaming
+
+
+def canonicalize(node):
+    """`node` with its literals renamed to p0, p1, ... in order of first occurrence.
+
+    Returns:
+        (canonical_node, renaming); see canonicalize_jointly.
+    """
+    (canonical,), renaming = canonicalize_jointly([node])
+    return canonical, renaming
+
+
+def invert_renaming(renaming):
+    return {v: k for k, v in renaming.items()}
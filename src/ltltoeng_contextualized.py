@@ -695,19 +695,8 @@ def collect_literals(node: ltlnode.LTLNode) -> set:
     return set()
 
 
-def _rename_literals(node: ltlnode.LTLNode, mapping: Dict[str, str]) -> None:
-    """Rename literals in *node* in place according to *mapping*."""
-    if isinstance(node, ltlnode.LiteralNode):
-        node.value = mapping.get(node.value, node.value)
-    elif isinstance(node, ltlnode.UnaryOperatorNode):
-        _rename_literals(node.operand, mapping)
-    elif isinstance(node, ltlnode.BinaryOperatorNode):
-        _rename_literals(node.left, mapping)
-        _rename_literals(node.right, mapping)
-
-
 def remap_to_theme(node: ltlnode.LTLNode, theme: Optional[Theme] = None) -> Optional[ltlnode.LTLNode]:
-    """Rename *node*'s literals (in place) onto *theme*'s literals.
+    """A copy of *node* with its literals renamed onto *theme*'s literals.
 
     This lets the same formula be posed either abstractly or contextualized,
     so an abstract-vs-contextualized comparison varies only the framing.
@@ -729,5 +718,4 @@ def remap_to_theme(node: ltlnode.LTLNode, theme: Optional[Theme] = None) -> Opti
     unmapped = sorted(lit for lit in lits if lit not in mapping)
     mapping.update(zip(unmapped, free_theme_lits))
 
-    _rename_literals(node, mapping)
-    return node
+    return ltlnode.rename_literals(node, mapping)
@@ -0,0 +1,95 @@
+"""Locations in an LTLNode tree, and rewrites that copy only the path to them.
+
+Nodes are immutable and interned, so replacing a subtree means rebuilding its
+ancestors and nothing else: every subtree off the path from the root is
+shared with the original. A Location is a subtree together with the way back
+up to the root (a zipper), so walking all locations of a formula costs O(n),
+and replacing the subtree at one of them costs O(depth).
+
+The codebook and the syntactic mutator find the sites where a rewrite
+applies with `locations` and apply it with `Location.replace`, instead of
+copying the whole formula to probe it and again to rewrite it.
+
+Directions are the attribute names of the children: 'operand' for unary
+operators, 'left' and 'right' for binary ones.
+"""
+
+from ltlnode import UnaryOperatorNode, BinaryOperatorNode
+
+
+class Location:
+    """The subtree `node`, reached from its parent's Location by `direction`."""
+
+    __slots__ = ('node', 'parent', 'direction')
+
+    def __init__(self, node, parent=None, direction=None):
+        self.node = node
+        self.parent = parent
+        self.direction = direction
+
+    def children(self):
+        node = self.node
+        if isinstance(node, UnaryOperatorNode):
+            return [Location(node.operand, self, 'operand')]
+        if isinstance(node, BinaryOperatorNode):
+            return [Location(node.left, self, 'left'), Location(node.right, self, 'right')]
+        return []
+
+    def path(self):
+        """The directions from the root to this location."""
+        directions = []
+        location = self
+        while location.parent is not None:
+            directions.append(location.direction)
+            location = location.parent
+        directions.reverse()
+        return directions
+
+    def replace(self, replacement):
+        """The root formula with this location's subtree replaced by `replacement`.
+
+        Only the ancestors of this location are rebuilt.
+        """
+        node = replacement
+        location = self
+        while location.parent is not None:
+            node = _with_child(location.parent.node, location.direction, node)
+            location = location.parent
+        return node
+
+
+def _with_child(node, direction, child):
+    if direction == 'operand':
+        return type(node)(child)
+    if direction == 'left':
+        return type(node)(child, node.right)
+    return type(node)(node.left, child)
+
+
+def locations(root):
+    """Every Location of `root`, in pre-order (parents first, left before right).
+
+    A subformula that occurs more than once has a Location per occurrence.
+    """
+    stack = [Location(root)]
+    while stack:
+        location = stack.pop()
+        yield location
+        stack.extend(reversed(location.children()))
+
+
+def location_at(root, path):
+    """The Location reached from `root` by following the directions in `path`.
+
+    Raises:
+        ValueError: if a direction does not name a child of the node it is applied to.
+    """
+    location = Location(root)
+    for direction in path:
+        node = location.node
+        valid = (isinstance(node, UnaryOperatorNode) and direction == 'operand') or \
+                (isinstance(node, BinaryOperatorNode) and direction in ('left', 'right'))
+        if not valid:
+            raise ValueError(f"Invalid path: cannot apply direction '{direction}' to node of type {type(node).__name__}")
+        location = Location(getattr(node, direction), location, direction)
+    return location
@@ -0,0 +1,158 @@
+"""Every misconception mutant of a formula, grouped by meaning.
+
+codebook.getAllApplicableMisconceptions applies each misconception at one
+random site, so two calls give different distractor sets and a caller wanting
+coverage has to call it again and again. `enumerate_mutants` instead produces
+every (misconception, site) mutant exactly once: each misconception's rules
+at every candidate site of a MutationSiteIndex, with every alternative
+rewrite of the rules that choose among several (codebook.allRewrites).
+
+`mutant_neighborhood` adds each mutant's semantic equivalence class, shared
+with the original formula and with the other mutants. The classes come from
+one batch: the formulas are renamed jointly (so SPOT's translation and
+relation caches see one canonical alphabet), fingerprinted on a single trace
+bank, and SPOT is only asked about pairs whose fingerprints agree, each
+against one representative per class. Distractor sets are built from
+neighborhoods and cached per answer formula by distractorcache.
+"""
+
+from codebook import MISCONCEPTION_RULES, MutationSiteIndex, allRewrites
+import fingerprint
+import ltlnode
+import spotutils
+
+
+class Mutant:
+    """
+    One rewrite of a formula.
+
+    Attributes:
+        misconception: The MisconceptionCode of the rewrite.
+        path: Directions from the root to the rewritten site (see ltlzipper).
+        node: The whole mutated formula.
+        semantic_class: Id of its equivalence class in the neighborhood (the
+            original formula's class is 0), or None before classification.
+    """
+
+    def __init__(self, misconception, path, node):
+        self.misconception = misconception
+        self.path = path
+        self.node = node
+        self.semantic_class = None
+
+
+def enumerate_mutants(node, index=None):
+    """
+    Every (misconception, site) mutant of `node` exactly once.
+
+    As in codebook.applyMisconception, a misconception's fallback rules
+    (OtherImplicit's underconstraint) are only used if its earlier rules apply
+    nowhere. Mutants come grouped by misconception, then by site in
+    pre-order; the same site can yield several mutants (one per alternative
+    rewrite), but never the same one twice.
+    """
+    if index is None:
+        index = MutationSiteIndex(node)
+    mutants = []
+    for rules in MISCONCEPTION_RULES.values():
+        for f in rules:
+            found = []
+            seen = set()
+            for location in index.candidates(f):
+                for res in allRewrites(location.node, f):
+                    if not res.misconception:
+                        continue
+                    mutated = location.replace(res.node)
+                    path = location.path()
+                    key = (res.misconception, tuple(path), mutated)
+                    if key not in seen:
+                        seen.add(key)
+                        found.append(Mutant(res.misconception, path, mutated))
+            if found:
+                mutants.extend(found)
+                break
+    return mutants
+
+
+def semantic_classes(nodes, equivalent=None):
+    """
+    Partition `nodes` by semantic equivalence.
+
+    Args:
+        equivalent: Called as equivalent(f, g) on the canonical strings of two
+            formulas whose fingerprints agree. Defaults to spotutils.areEquivalent.
+
+    Returns:
+        (class ids aligned with `nodes`, numbered by first occurrence from 0,
+        number of `equivalent` calls made).
+    """
+    if equivalent is None:
+        equivalent = spotutils.areEquivalent
+    canonical, _ = ltlnode.canonicalize_jointly(nodes)
+    alphabet = sorted(set().union(*(c.literals for c in canonical)))
+
+    representatives = []
+    classes_by_fingerprint = {}
+    class_of_node = {}
+    checks = 0
+    ids = []
+    for c in canonical:
+        class_id = class_of_node.get(c)
+        if class_id is None:
+            bits = fingerprint.fingerprint(c, alphabet)
+            candidates = classes_by_fingerprint.setdefault(bits, [])
+            for candidate in candidates:
+                checks += 1
+                if equivalent(str(representatives[candidate]), str(c)):
+                    class_id = candidate
+                    break
+            if class_id is None:
+                class_id = len(representatives)
+                representatives.append(c)
+                candidates.append(class_id)
+            class_of_node[c] = class_id
+        ids.append(class_id)
+    return ids, checks
+
+
+class MutantNeighborhood:
+    """
+    The mutants of a formula with their equivalence classes.
+
+    Attributes:
+        node: The original formula; its class is ORIGINAL_CLASS.
+        mutants: All Mutants (see enumerate_mutants), classified.
+        spot_checks: Equivalence checks the classification needed.
+    """
+
+    ORIGINAL_CLASS = 0
+
+    def __init__(self, node, mutants, spot_checks):
+        self.node = node
+        self.mutants = mutants
+        self.spot_checks = spot_checks
+
+    def distinct(self):
+        """The mutants that are not equivalent to the original formula."""
+        return [m for m in self.mutants if m.semantic_class != self.ORIGINAL_CLASS]
+
+    def by_class(self):
+        """Mutants by class id, original's class included."""
+        classes = {}
+        for m in self.mutants:
+            classes.setdefault(m.semantic_class, []).append(m)
+        return classes
+
+
+def mutant_neighborhood(node, equivalent=None):
+    """
+    The MutantNeighborhood of `node`.
+
+    Args:
+        equivalent: As for semantic_classes.
+    """
+    mutants = enumerate_mutants(node)
+    ids, checks = semantic_classes([node] + [m.node for m in mutants], equivalent)
+    for m, class_id in zip(mutants, ids[1:]):
+        m.semantic_class = class_id
+    return MutantNeighborhood(node, mutants, checks)
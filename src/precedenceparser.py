@@ -0,0 +1,137 @@
+"""A hand-written precedence-climbing parser for the grammar in ltl.g4.
+
+The ANTLR Python runtime spends most of a parse in its adaptive prediction
+machinery, and `ltlnode.parse_ltl_string` runs on nearly every request path.
+This parser reads the same language into the same LTLNode trees in a single
+left-to-right pass. ltl.g4 lists its alternatives from tightest to loosest
+binding, which ANTLR turns into these precedences:
+
+    ! X F G  (prefix)  >  &  >  |  >  U  >  ->  >  <->
+
+All binary operators associate to the left, so `a -> b -> c` is
+`(a -> b) -> c`, as ANTLR reads it.
+
+Unlike ANTLR, which reports a syntax error on stderr and returns whatever it
+recovered (`a W b` parses as `a`), this parser raises LTLParseError on any
+input the grammar does not derive.
+
+Select it with LTL_PARSER=precedence (see ltlnode.set_parser_backend).
+"""
+
+import re
+
+from ltlnode import (LiteralNode, NotNode, NextNode, FinallyNode, GloballyNode,
+                     AndNode, OrNode, UntilNode, ImpliesNode, EquivalenceNode)
+
+
+class LTLParseError(ValueError):
+    pass
+
+
+## Longer keywords first, so that the lexer matches them whole ('UNTIL' over
+## 'U'), as ANTLR's longest-match lexer does.
+_TOKEN = re.compile(r'\s*(?:(<->|->|[!&|()])|(NEXT_STATE|EVENTUALLY|ALWAYS|AFTER|UNTIL|[XFGU])|([a-z0-9]+))')
+_TRAILING_SPACE = re.compile(r'\s*')
+
+_UNARY = {
+    '!': NotNode,
+    'X': NextNode, 'AFTER': NextNode, 'NEXT_STATE': NextNode,
+    'F': FinallyNode, 'EVENTUALLY': FinallyNode,
+    'G': GloballyNode, 'ALWAYS': GloballyNode,
+}
+
+## Binding strength of each binary operator (higher binds tighter).
+_BINARY = {
+    '&': (5, AndNode),
+    '|': (4, OrNode),
+    'U': (3, UntilNode), 'UNTIL': (3, UntilNode),
+    '->': (2, ImpliesNode),
+    '<->': (1, EquivalenceNode),
+}
+
+_ATOM = 'atom'
+_END = 'end'
+
+
+def tokenize(text):
+    """The tokens of `text` as (kind, text, position) triples, ending in an end token."""
+    tokens = []
+    pos = 0
+    while True:
+        m = _TOKEN.match(text, pos)
+        if m is None:
+            pos = _TRAILING_SPACE.match(text, pos).end()
+            if pos == len(text):
+                tokens.append((_END, '', pos))
+                return tokens
+            raise LTLParseError(f"Unexpected character {text[pos]!r} at position {pos}")
+        symbol, keyword, atom = m.groups()
+        if atom is not None:
+            tokens.append((_ATOM, atom, m.start(3)))
+        else:
+            token = symbol or keyword
+            tokens.append((token, token, m.start(1) if symbol else m.start(2)))
+        pos = m.end()
+
+
+class _Parser:
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.index = 0
+
+    def peek(self):
+        return self.tokens[self.index]
+
+    def advance(self):
+        token = self.tokens[self.index]
+        self.index += 1
+        return token
+
+    def error(self, expected):
+        kind, text, pos = self.peek()
+        found = 'end of input' if kind == _END else repr(text)
+        return LTLParseError(f"Expected {expected} at position {pos}, found {found}")
+
+    def formula(self, min_precedence=0):
+        left = self.prefixed()
+        while True:
+            kind = self.peek()[0]
+            if kind not in _BINARY:
+                return left
+            precedence, node_class = _BINARY[kind]
+            if precedence < min_precedence:
+                return left
+            self.advance()
+            # Left associative: the right operand only takes tighter operators.
+            left = node_class(left, self.formula(precedence + 1))
+
+    def prefixed(self):
+        kind, text, _ = self.peek()
+        if kind in _UNARY:
+            self.advance()
+            return _UNARY[kind](self.prefixed())
+        if kind == _ATOM:
+            self.advance()
+            return LiteralNode(text)
+        if kind == '(':
+            self.advance()
+            inner = self.formula()
+            if self.peek()[0] != ')':
+                raise self.error("')'")
+            self.advance()
+            return inner
+        raise self.error("a formula")
+
+
+def parse(text):
+    """The LTLNode tree of formula string `text`.
+
+    Raises:
+        LTLParseError: if `text` is not a formula of ltl.g4.
+    """
+    parser = _Parser(tokenize(text))
+    node = parser.formula()
+    if parser.peek()[0] != _END:
+        raise parser.error("an operator or end of input")
+    return node
@@ -0,0 +1,106 @@
+"""Two-tier cache for semantic relations between formulas (implication, disjointness).
+
+The same tutoring formulas recur constantly -- across questions, across
+students, and across gunicorn workers -- but every worker used to rediscover
+"does f imply g?" with a fresh SPOT product. Results are kept in:
+
+  * an in-process LRU front tier (no I/O on the hot path), and
+  * optionally, a SQLite file shared by every worker on the machine, bounded
+    by row count with least-recently-used eviction.
+
+Keys are caller-supplied canonical formula strings; spotutils passes each
+pair as SPOT prints it after parsing and renaming the pair's atoms jointly to
+p0, p1, ..., so syntactic variants and alpha-variants share an entry.
+The persistent tier (sqlitelru.SQLiteLRU) is strictly best-effort: any
+SQLite error degrades to a cache miss (or a skipped write) rather than
+failing the request.
+"""
+
+from lrucache import LRUCache
+from sqlitelru import SQLiteLRU
+
+
+IMPLIES = "implies"
+DISJOINT = "disjoint"
+
+## Relations that hold in both directions are stored once, under the sorted pair.
+SYMMETRIC_RELATIONS = {DISJOINT}
+
+DEFAULT_FRONT_ENTRIES = 8192
+DEFAULT_MAX_ROWS = 500000
+
+## Writes between two eviction checks of the SQLite tier.
+EVICTION_CHECK_INTERVAL = 500
+
+
+class RelationCache:
+
+    def __init__(self, path=None, max_rows=DEFAULT_MAX_ROWS, front_entries=DEFAULT_FRONT_ENTRIES):
+        """
+        Args:
+            path: SQLite file for the shared tier, or None to keep results in-process only.
+            max_rows: Row bound for the SQLite tier.
+            front_entries: Entry bound for the in-process tier.
+        """
+        self.front = LRUCache(max_entries=front_entries)
+        self.store = SQLiteLRU(path, "relations", ("relation", "f", "g"), "INTEGER",
+                               max_rows, EVICTION_CHECK_INTERVAL, name="relation cache")
+
+        self.persistent_hits = 0
+
+    @property
+    def path(self):
+        """The SQLite file, or None once the shared tier is disabled (or was never configured)."""
+        return self.store.path
+
+    @staticmethod
+    def key(relation, f, g):
+        if relation in SYMMETRIC_RELATIONS and g < f:
+            f, g = g, f
+        return (relation, f, g)
+
+    def get(self, relation, f, g):
+        """The cached truth value of `relation(f, g)`, or None if unknown."""
+        key = self.key(relation, f, g)
+        value = self.front.get(key)
+        if value is not None:
+            return value
+
+        value = self._load(key)
+        if value is not None:
+            self.persistent_hits += 1
+            self.front.put(key, value)
+        return value
+
+    def put(self, relation, f, g, value):
+        key = self.key(relation, f, g)
+        value = bool(value)
+        self.front.put(key, value)
+        self._store(key, value)
+
+    def get_or_compute(self, relation, f, g, compute):
+        value = self.get(relation, f, g)
+        if value is None:
+            value = bool(compute())
+            self.put(relation, f, g, value)
+        return value
+
+    def stats(self):
+        stats = dict(self.front.stats())
+        stats["persistent_hits"] = self.persistent_hits
+        stats["path"] = self.path
+        return stats
+
+    def clear(self):
+        """Drop both tiers."""
+        self.front.clear()
+        self.store.clear()
+
+    ## Persistent tier ##
+
+    def _load(self, key):
+        value = self.store.get(key)
+        return None if value is None else bool(value)
+
+    def _store(self, key, value):
+        self.store.put(key, int(value))
@@ -0,0 +1,12 @@
+"""Entry point of the web server: `python server.py`.
+
+multiprocessing re-runs the entry script, as __mp_main__, in every SPOT worker
+process (spotpool) before handing it a task. Run as app.py, that imported the
+whole app -- Flask, the database, every cache and a pool of its own -- into
+each worker. This script does nothing unless it is __main__, so workers only
+import the modules their tasks live in.
+"""
+
+if __name__ == '__main__':
+    from app import app, port
+    app.run(host="0.0.0.0", port=int(port))
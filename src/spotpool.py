@@ -0,0 +1,272 @@
+"""Isolated worker processes for SPOT calls, with per-call time and memory limits.
+
+A pathological formula can keep SPOT busy in translation or complementation
+indefinitely, and a thread stuck in native code cannot be interrupted. Routes
+that run SPOT on user-entered formulas therefore hand the work to a small pool
+of worker processes:
+
+  * each call has a wall-clock timeout; a worker that overruns it is killed
+    (and replaced on demand) and the caller gets a SpotTimeoutError,
+  * each worker runs under an address-space limit, so runaway allocation
+    fails with a SpotMemoryError instead of taking the machine with it, and
+  * workers are recycled after a number of calls, bounding whatever they
+    accumulate (caches, fragmentation) over time.
+
+Only the caller whose call overran is affected: every other in-flight call
+keeps its own worker. With the pool disabled (the default until `configure`
+is called with processes > 0), `run` simply calls the function in-process.
+"""
+
+import multiprocessing
+import threading
+
+try:
+    import resource
+except ImportError:  # pragma: no cover -- not available on Windows
+    resource = None
+
+
+DEFAULT_TIMEOUT_SECONDS = 10
+DEFAULT_MEMORY_LIMIT_MB = 1024
+DEFAULT_MAX_CALLS_PER_WORKER = 100
+
+## Workers start from a clean server process rather than a fork of the
+## (multi-threaded) web process, which could inherit a lock held by another thread.
+DEFAULT_START_METHOD = 'forkserver'
+
+## What the forkserver imports before forking workers: SPOT, through spotutils,
+## so no worker imports it itself. Not '__main__' (multiprocessing's default),
+## which would run the server's entry script in the forkserver. Workers still
+## re-run that script as __mp_main__, which is why the server is started from
+## server.py (a no-op unless it is __main__) rather than from app.py.
+WORKER_PRELOAD = ['spotutils']
+
+
+class SpotLimitError(Exception):
+    """A SPOT call exceeded a resource limit of the worker pool."""
+
+
+class SpotTimeoutError(SpotLimitError):
+
+    def __init__(self, timeout):
+        super().__init__(f"SPOT did not finish within {timeout:g} seconds.")
+        self.timeout = timeout
+
+
+class SpotMemoryError(SpotLimitError):
+
+    def __init__(self, limit_mb):
+        super().__init__(f"SPOT ran out of memory (limit: {limit_mb} MB).")
+        self.limit_mb = limit_mb
+
+
+class SpotWorkerError(SpotLimitError):
+    """The worker process died without answering (e.g. killed by the OS)."""
+
+
+def _worker_main(conn, memory_limit_mb):
+    if resource is not None and memory_limit_mb:
+        limit = memory_limit_mb * 1024 * 1024
+        try:
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        except (ValueError, OSError) as e:
+            print(f"Warning: could not limit SPOT worker memory: {e}")
+
+    while True:
+        try:
+            task = conn.recv()
+        except (EOFError, OSError):
+            return
+        if task is None:
+            return
+        fn, args, kwargs = task
+        try:
+            reply = (True, fn(*args, **kwargs))
+        except MemoryError:
+            reply = (False, MemoryError())
+        except Exception as e:
+            reply = (False, e)
+        try:
+            conn.send(reply)
+        except Exception as e:
+            # The result or the exception could not be pickled.
+            conn.send((False, RuntimeError(f"{type(e).__name__}: {e}")))
+
+
+class _Worker:
+
+    def __init__(self, context, memory_limit_mb):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn, memory_limit_mb), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.calls = 0
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except (OSError, ValueError):
+            pass
+        self.conn.close()
+        self.process.join(timeout=1)
+        if self.process.is_alive():
+            self.kill()
+
+    def kill(self):
+        self.process.kill()
+        self.process.join(timeout=1)
+        self.conn.close()
+
+
+class SpotPool:
+
+    def __init__(self, processes, timeout=DEFAULT_TIMEOUT_SECONDS, memory_limit_mb=DEFAULT_MEMORY_LIMIT_MB,
+                 max_calls_per_worker=DEFAULT_MAX_CALLS_PER_WORKER, start_method=DEFAULT_START_METHOD,
+                 preload=WORKER_PRELOAD):
+        """
+        Args:
+            processes: Maximum number of worker processes (started on demand).
+            timeout: Default per-call wall-clock limit, in seconds.
+            memory_limit_mb: Address-space limit per worker, or None for no limit.
+            max_calls_per_worker: Calls after which a worker is replaced.
+            start_method: multiprocessing start method for workers.
+            preload: Modules the forkserver imports for its workers (forkserver
+                start method only; shared by every pool in the process).
+        """
+        if processes < 1:
+            raise ValueError("A SpotPool needs at least one process")
+        self.processes = processes
+        self.timeout = timeout
+        self.memory_limit_mb = memory_limit_mb
+        self.max_calls_per_worker = max_calls_per_worker
+        self._context = multiprocessing.get_context(start_method)
+        if start_method == 'forkserver':
+            self._context.set_forkserver_preload(preload)
+
+        self._idle = []
+        self._started = 0
+        self._available = threading.Condition()
+
+        self.calls = 0
+        self.timeouts = 0
+        self.recycled = 0
+
+    def run(self, fn, *args, pool_timeout=None, **kwargs):
+        """Call `fn(*args, **kwargs)` in a worker and return its result.
+
+        `fn`, its arguments and its result must be picklable (so `fn` must be
+        a module-level function). Exceptions raised by `fn` are re-raised here.
+        Every keyword but `pool_timeout` is passed to `fn` unchanged.
+
+        Args:
+            pool_timeout: Wall-clock limit for this call, in seconds (default:
+                the pool's `timeout`).
+
+        Raises:
+            SpotTimeoutError: The call did not finish within `pool_timeout` seconds.
+            SpotMemoryError: The worker hit its memory limit.
+            SpotWorkerError: The worker died without answering.
+        """
+        timeout = self.timeout if pool_timeout is None else pool_timeout
+        worker = self._acquire()
+        try:
+            worker.conn.send((fn, args, kwargs))
+            if not worker.conn.poll(timeout):
+                self.timeouts += 1
+                self._discard(worker, kill=True)
+                worker = None
+                raise SpotTimeoutError(timeout)
+            ok, value = worker.conn.recv()
+        except (EOFError, OSError) as e:
+            if worker is not None:
+                self._discard(worker, kill=True)
+                worker = None
+            raise SpotWorkerError(f"SPOT worker exited unexpectedly: {e}") from e
+        finally:
+            if worker is not None:
+                self._release(worker)
+
+        self.calls += 1
+        if ok:
+            return value
+        if isinstance(value, MemoryError):
+            raise SpotMemoryError(self.memory_limit_mb)
+        raise value
+
+    def close(self):
+        with self._available:
+            idle, self._idle = self._idle, []
+            self._started -= len(idle)
+        for worker in idle:
+            worker.stop()
+
+    def stats(self):
+        with self._available:
+            return {
+                "processes": self.processes,
+                "started": self._started,
+                "idle": len(self._idle),
+                "calls": self.calls,
+                "timeouts": self.timeouts,
+                "recycled": self.recycled,
+            }
+
+    def _acquire(self):
+        with self._available:
+            while not self._idle and self._started >= self.processes:
+                self._available.wait()
+            if self._idle:
+                return self._idle.pop()
+            self._started += 1
+        try:
+            return _Worker(self._context, self.memory_limit_mb)
+        except Exception:
+            with self._available:
+                self._started -= 1
+                self._available.notify()
+            raise
+
+    def _release(self, worker):
+        worker.calls += 1
+        if worker.calls >= self.max_calls_per_worker:
+            self.recycled += 1
+            self._discard(worker, kill=False)
+            return
+        with self._available:
+            self._idle.append(worker)
+            self._available.notify()
+
+    def _discard(self, worker, kill):
+        if kill:
+            worker.kill()
+        else:
+            worker.stop()
+        with self._available:
+            self._started -= 1
+            self._available.notify()
+
+
+_pool = None
+
+
+def configure(processes, **kwargs):
+    """Route `run` through a pool of `processes` workers; 0 runs calls in-process."""
+    global _pool
+    if _pool is not None:
+        _pool.close()
+    _pool = SpotPool(processes, **kwargs) if processes > 0 else None
+
+
+def run(fn, *args, pool_timeout=None, **kwargs):
+    """Call `fn(*args, **kwargs)` through the configured pool (see SpotPool.run).
+
+    With no pool configured, the call runs in-process and `pool_timeout` is
+    ignored.
+    """
+    if _pool is None:
+        return fn(*args, **kwargs)
+    return _pool.run(fn, *args, pool_timeout=pool_timeout, **kwargs)
+
+
+def stats():
+    return _pool.stats() if _pool is not None else None
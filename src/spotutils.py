@@ -1,5 +1,15 @@
 import spot
 import random
+import re
+import itertools
+import os
+import threading
+import time
+from collections import deque
+from lrucache import LRUCache
+import relationcache
+import automatonstore
+import formulapool
 
 
 DEFAULT_WEIGHT = 5
@@ -65,6 +75,215 @@ def weighted_trace_choice(traces):
     return random.choices(traces, weights=weights, k=1)[0]
 
 
+## Translation effort. SPOT's default ('high') spends much of its time
+## minimizing the automaton, which only pays off where the automaton is
+## displayed or reused: emptiness checks and size estimates are just as correct
+## on a 'low' translation. Each call site names a profile, and under load the
+## translation budget below lowers the level further. 'check' and 'size' stay
+## at 'high' until experiments/translation_profiles.py has been run against
+## real SPOT and its timings and sizes recorded in CHANGELOG.md.
+LOW = 'low'
+MEDIUM = 'medium'
+HIGH = 'high'
+TRANSLATION_LEVELS = (LOW, MEDIUM, HIGH)
+
+TRANSLATION_PROFILES = {
+    # Products and emptiness / intersection checks.
+    'check': HIGH,
+    # get_aut_size, a scoring heuristic.
+    'size': HIGH,
+    # Traces are read off the automaton and shown to students.
+    'traces': HIGH,
+    # spotutils.translate: the caller may display or reuse the automaton.
+    'default': HIGH,
+}
+
+
+class TranslationBudget:
+    """Seconds of translation allowed per sliding window before effort is lowered.
+
+    Spending more than `seconds` translating within the last `window` seconds
+    lowers requested levels by one step; spending more than twice that lowers
+    them to LOW. The levels recover as old translations leave the window.
+    """
+
+    def __init__(self, seconds=2.0, window=10.0):
+        self.seconds = seconds
+        self.window = window
+        self._spent = deque()   # (finished_at, duration)
+        self._total = 0.0
+        self._lock = threading.Lock()
+        self.downgrades = 0
+
+    def record(self, duration):
+        with self._lock:
+            now = time.monotonic()
+            self._spent.append((now, duration))
+            self._total += duration
+            self._expire(now)
+
+    def spent(self):
+        with self._lock:
+            self._expire(time.monotonic())
+            return self._total
+
+    def level_for(self, requested):
+        spent = self.spent()
+        if spent <= self.seconds:
+            return requested
+        index = TRANSLATION_LEVELS.index(requested)
+        lowered = 0 if spent > 2 * self.seconds else max(0, index - 1)
+        if lowered != index:
+            self.downgrades += 1
+        return TRANSLATION_LEVELS[lowered]
+
+    def _expire(self, now):
+        while self._spent and self._spent[0][0] < now - self.window:
+            self._total -= self._spent.popleft()[1]
+        if not self._spent:
+            self._total = 0.0
+
+
+_translation_budget = TranslationBudget()
+
+
+def configure_translation_budget(seconds, window=10.0):
+    """Allow `seconds` of translation per `window` before lowering effort (None: never lower)."""
+    global _translation_budget
+    _translation_budget = TranslationBudget(seconds, window) if seconds is not None else None
+
+
+## Translated automata, shared by every helper below so that a formula
+## translated once in a request (e.g. the answer formula, which is compared
+## against every distractor) is not translated again. Keyed by the formula as
+## SPOT prints it after parsing, so "G(a)" and "G a" share an entry, and by
+## translation level. Bounded by entry count and by the total size
+## (states + edges) of cached automata.
+TRANSLATION_CACHE_MAX_ENTRIES = 512
+TRANSLATION_CACHE_MAX_SIZE = 200000
+
+
+def _automaton_size(aut):
+    return int(aut.num_states()) + int(aut.num_edges())
+
+
+_translation_cache = LRUCache(max_entries=TRANSLATION_CACHE_MAX_ENTRIES,
+                              max_weight=TRANSLATION_CACHE_MAX_SIZE,
+                              weigh=_automaton_size)
+
+
+def _translated(f, profile='default'):
+    """Return the (cached) automaton for the parsed SPOT formula `f`.
+
+    `profile` (see TRANSLATION_PROFILES) sets the optimization level, which
+    the translation budget may lower. An automaton already cached at a higher
+    level serves any lower one, and so does a precompiled one from the
+    automaton store.
+
+    Cached automata are shared between callers and must not be modified;
+    SPOT's product/complement/emptiness operations all build new automata.
+    """
+    key = str(f)
+    level = TRANSLATION_PROFILES[profile]
+    if _translation_budget is not None:
+        level = _translation_budget.level_for(level)
+
+    for better in TRANSLATION_LEVELS[:TRANSLATION_LEVELS.index(level):-1]:
+        if (key, better) in _translation_cache:
+            aut = _translation_cache.get((key, better))
+            if aut is not None:
+                return aut
+
+    if _automaton_store is not None and (key, level) not in _translation_cache:
+        aut = _automaton_store.load(key)
+        if aut is not None:
+            _translation_cache.put((key, automatonstore.STORE_LEVEL), aut)
+            return aut
+
+    def compute():
+        start = time.perf_counter()
+        aut = f.translate(level)
+        if _translation_budget is not None:
+            _translation_budget.record(time.perf_counter() - start)
+        return aut
+
+    return _translation_cache.get_or_compute((key, level), compute)
+
+
+## Precompiled automata for the shipped corpora (see automatonstore.py). The
+## default store is opened lazily, so it is empty until `automatonstore.py build`
+## has been run; AUTOMATON_STORE_PATH points elsewhere, or disables it when empty.
+_automaton_store = None
+
+
+def configure_automaton_store(path):
+    """Serve translation misses from the store at `path` (None: translate everything)."""
+    global _automaton_store
+    if _automaton_store is not None:
+        _automaton_store.close()
+    _automaton_store = automatonstore.AutomatonStore(path) if path else None
+
+
+configure_automaton_store(os.getenv('AUTOMATON_STORE_PATH', automatonstore.DEFAULT_PATH))
+
+
+def automaton_store_stats():
+    return _automaton_store.stats() if _automaton_store is not None else None
+
+
+def translate(formula, profile='default'):
+    """Return the cached automaton for `formula` (a string or LTLNode)."""
+    return _translated(spot.formula(str(formula)), profile)
+
+
+def translation_cache_stats():
+    """Hit/miss/eviction counters and occupancy of the shared translation cache."""
+    return _translation_cache.stats()
+
+
+def clear_translation_cache():
+    _translation_cache.clear()
+
+
+## Implication and disjointness results. In-process only until the app calls
+## configure_relation_cache, which adds a SQLite tier shared across workers.
+_relation_cache = relationcache.RelationCache()
+
+
+def configure_relation_cache(path, max_rows=relationcache.DEFAULT_MAX_ROWS):
+    """Back relation results with the SQLite file at `path` (None: in-process only)."""
+    global _relation_cache
+    _relation_cache = relationcache.RelationCache(path=path, max_rows=max_rows)
+
+
+def relation_cache_stats():
+    return _relation_cache.stats()
+
+
+def _canonical_pair(f, g):
+    """Parse f and g, with their atoms renamed jointly to p0, p1, ...
+
+    Relations are invariant under a joint renaming of atoms, so this makes
+    alpha-variants (`a U b` vs `F b`, `q U s` vs `F s`) one relation cache key
+    and one set of translations, whoever the caller is.
+
+    Returns:
+        (f, g, renaming from canonical atoms back to the originals).
+    """
+    ff = spot.parse_formula(str(f))
+    gf = spot.parse_formula(str(g))
+    text_f, text_g = str(ff), str(gf)
+    atoms = {str(a) for a in spot.atomic_prop_collect(spot.formula.And([ff, gf]))}
+    renaming = {}
+    for token in _ATOM_TOKEN.findall(text_f + " " + text_g):
+        if token in atoms and token not in renaming:
+            renaming[token] = f"p{len(renaming)}"
+    if all(atom == canonical for atom, canonical in renaming.items()):
+        return ff, gf, {}
+    return (spot.formula(rename_atoms(text_f, renaming)), spot.formula(rename_atoms(text_g, renaming)),
+            {v: k for k, v in renaming.items()})
+
+
 def areEquivalent(formula1, formula2):
     return isSufficientFor(formula1, formula2) and isNecessaryFor(formula1, formula2)
 
@@ -75,13 +294,14 @@ Returns true if f => g is a tautology
 '''
 def isSufficientFor(f, g):
 
-    f = spot.parse_formula(str(f))
-    g = spot.parse_formula(str(g))
+    f, g, _ = _canonical_pair(f, g)
 
+    def compute():
+        a_f = _translated(f, 'check')
+        a_ng = _translated(spot.formula.Not(g), 'check')
+        return spot.product(a_f, a_ng).is_empty()
 
-    a_f = f.translate()
-    a_ng = spot.formula.Not(g).translate()
-    return spot.product(a_f, a_ng).is_empty()
+    return _relation_cache.get_or_compute(relationcache.IMPLIES, str(f), str(g), compute)
 
 
 '''
@@ -92,73 +312,289 @@ def isNecessaryFor(f, g):
 
 
 def areDisjoint(f, g):
-    ff = spot.parse_formula(str(f))
-    gf = spot.parse_formula(str(g))
+    ff, gf, _ = _canonical_pair(f, g)
 
-    a_ff = ff.translate()
-    a_gf = gf.translate()
+    def compute():
+        a_ff = _translated(ff, 'check')
+        a_gf = _translated(gf, 'check')
+        return spot.product(a_ff, a_gf).is_empty()
 
-    return spot.product(a_ff, a_gf).is_empty()
+    return _relation_cache.get_or_compute(relationcache.DISJOINT, str(ff), str(gf), compute)
 
 
-def generate_accepting_words(automaton, max_runs=5):
-    """Generate up to max_runs distinct accepting words by excluding previously seen traces."""
-    words = []
-    current_aut = automaton
-    
-    for _ in range(max_runs):
-        # Check if current automaton is empty
-        if current_aut.is_empty():
+class SemanticRelation:
+    """How the languages of two formulas f and g relate.
+
+    `kind` is the most specific of EQUIVALENT, CONTAINED (f => g),
+    SUBSUMES (g => f), DISJOINT and OVERLAPPING. Each verdict is the
+    emptiness of one product, and `words` reads witnesses off the same
+    products, so a caller wanting counterexamples does not translate and
+    multiply the formulas again:
+        F_NOT_G -- words of f & !g (none iff f => g)
+        G_NOT_F -- words of g & !f (none iff g => f)
+        F_AND_G -- words of f & g  (none iff f and g are disjoint)
+    Products are built when first needed, so verdicts found in the relation
+    cache cost no translation at all.
+    """
+
+    EQUIVALENT = "equivalent"
+    CONTAINED = "contained"
+    SUBSUMES = "subsumes"
+    DISJOINT = "disjoint"
+    OVERLAPPING = "overlapping"
+
+    F_NOT_G = "f_not_g"
+    G_NOT_F = "g_not_f"
+    F_AND_G = "f_and_g"
+
+    def __init__(self, f, g, renaming=None):
+        """
+        f and g are parsed SPOT formulas, possibly with renamed atoms
+        (`renaming` maps them back for `words`); verdicts are filled in by
+        `relate`.
+        """
+        self.f = f
+        self.g = g
+        self.renaming = renaming or {}
+        self.f_implies_g = None
+        self.g_implies_f = None
+        self.disjoint = None
+        self._products = {}
+
+    def _product(self, which):
+        if which not in self._products:
+            left, right = {
+                self.F_NOT_G: (self.f, spot.formula.Not(self.g)),
+                self.G_NOT_F: (self.g, spot.formula.Not(self.f)),
+                self.F_AND_G: (self.f, self.g),
+            }[which]
+            # 'traces': the products are also where counterexamples are read.
+            self._products[which] = spot.product(_translated(left, 'traces'), _translated(right, 'traces'))
+        return self._products[which]
+
+    def is_empty(self, which):
+        return self._product(which).is_empty()
+
+    def words(self, which, max_words=5, max_length=None):
+        """The shortest words of product `which` (see shortest_accepting_words)."""
+        if max_length is None:
+            max_length = MAX_WITNESS_LENGTH
+        known_empty = {self.F_NOT_G: self.f_implies_g,
+                       self.G_NOT_F: self.g_implies_f,
+                       self.F_AND_G: self.disjoint}[which]
+        if known_empty:
+            return []
+        words = shortest_accepting_words(self._product(which), max_words, max_length)
+        return [rename_atoms(w, self.renaming) for w in words]
+
+    @property
+    def kind(self):
+        if self.f_implies_g and self.g_implies_f:
+            return self.EQUIVALENT
+        if self.f_implies_g:
+            return self.CONTAINED
+        if self.g_implies_f:
+            return self.SUBSUMES
+        if self.disjoint:
+            return self.DISJOINT
+        return self.OVERLAPPING
+
+    def __repr__(self):
+        return (f"SemanticRelation(kind={self.kind!r}, f_implies_g={self.f_implies_g!r}, "
+                f"g_implies_f={self.g_implies_f!r}, disjoint={self.disjoint!r})")
+
+
+def relate(f, g):
+    """The semantic relation between f and g (see SemanticRelation).
+
+    Each of the three verdicts is read from the relation cache, or else
+    decided by one emptiness check and recorded there, exactly as
+    isSufficientFor / areDisjoint would.
+    """
+    ff, gf, renaming = _canonical_pair(f, g)
+    relation = SemanticRelation(ff, gf, renaming)
+
+    relation.f_implies_g = _relation_cache.get_or_compute(
+        relationcache.IMPLIES, str(ff), str(gf), lambda: relation.is_empty(relation.F_NOT_G))
+    relation.g_implies_f = _relation_cache.get_or_compute(
+        relationcache.IMPLIES, str(gf), str(ff), lambda: relation.is_empty(relation.G_NOT_F))
+    relation.disjoint = _relation_cache.get_or_compute(
+        relationcache.DISJOINT, str(ff), str(gf), lambda: relation.is_empty(relation.F_AND_G))
+    return relation
+
+
+## Bound on the number of partial paths `iter_accepting_words` extends, so a
+## large automaton costs at most this much work however many words are asked for.
+MAX_WORD_SEARCH_EXPANSIONS = 20000
+
+
+def _normalize_lasso(prefix, cycle):
+    """The shortest (prefix, cycle) spelling of the same infinite word.
+
+    Reduces the cycle to its primitive root and rolls the end of the prefix
+    into it, so `a; cycle{b; a}` and `cycle{a; b}` (or `cycle{a; a}` and
+    `cycle{a}`) are recognised as one word.
+    """
+    n = len(cycle)
+    for period in range(1, n + 1):
+        if n % period == 0 and cycle == cycle[:period] * (n // period):
+            cycle = cycle[:period]
             break
-            
-        run = current_aut.accepting_run()
-        if run:
-            # Convert run to a word that the automaton accepts
-            word = spot.twa_word(run)
-            word_str = str(word)
-            
-            # Only add if we haven't seen it (safety check)
-            if word_str not in words:
-                words.append(word_str)
-            
-            # Exclude this trace from future runs
-            try:
-                # Build automaton that accepts only this trace
-                trace_aut = word.as_automaton()
-                # Complement it (now accepts everything EXCEPT this trace)
-                not_trace_aut = spot.complement(trace_aut)
-                # Product with current automaton to exclude this trace
-                current_aut = spot.product(current_aut, not_trace_aut)
-            except Exception as e:
-                print(f"Warning: Could not exclude trace '{word_str}': {e}")
-                break
-        else:
-            break  # Stop if no accepting run is found
-    return words
+    while prefix and prefix[-1] == cycle[-1]:
+        prefix = prefix[:-1]
+        cycle = cycle[-1:] + cycle[:-1]
+    return tuple(prefix), tuple(cycle)
+
+
+def _format_word(prefix, cycle):
+    return '; '.join(list(prefix) + ['cycle{' + '; '.join(cycle) + '}'])
+
+
+def _iter_accepting_lassos(automaton, max_expansions=MAX_WORD_SEARCH_EXPANSIONS, max_length=None):
+    """Distinct accepting lassos of `automaton` as normalized (prefix, cycle) label tuples.
+
+    Explores simple paths from the initial state breadth-first; whenever an
+    edge closes a loop back onto the path, the lasso it forms is yielded if the
+    acceptance marks seen on the loop satisfy the acceptance condition. Lassos
+    therefore come out in order of total length (prefix + cycle, before
+    normalization), and none longer than `max_length` is explored.
+    """
+    bdict = automaton.get_dict()
+    accepting = automaton.acc().accepting
+    labels = {}
+
+    def label(cond):
+        key = cond.id()
+        if key not in labels:
+            labels[key] = spot.bdd_format_formula(bdict, cond)
+        return labels[key]
+
+    seen = set()
+    expansions = 0
+    init = automaton.get_init_state_number()
+    # A path is (states on it, in order; edges taken).
+    frontier = [((init,), ())]
+    while frontier:
+        next_frontier = []
+        for states, edges in frontier:
+            for e in automaton.out(states[-1]):
+                if expansions >= max_expansions:
+                    return
+                expansions += 1
+                if e.dst not in states:
+                    if max_length is None or len(edges) + 2 <= max_length:
+                        next_frontier.append((states + (e.dst,), edges + (e,)))
+                    continue
+
+                loop_start = states.index(e.dst)
+                loop = edges[loop_start:] + (e,)
+                marks = loop[0].acc
+                for loop_edge in loop[1:]:
+                    marks = marks | loop_edge.acc
+                if not accepting(marks):
+                    continue
+                lasso = _normalize_lasso(tuple(label(x.cond) for x in edges[:loop_start]),
+                                         tuple(label(x.cond) for x in loop))
+                if lasso not in seen:
+                    seen.add(lasso)
+                    yield lasso
+        frontier = next_frontier
+
+
+def _fallback_word(automaton):
+    """SPOT's own accepting word, for when the lasso search finds none.
+
+    Some acceptance conditions need loops that revisit a state, which the
+    simple-path search never builds; the search budget can also run out.
+    """
+    run = automaton.accepting_run()
+    if run:
+        return str(spot.twa_word(run))
+    return None
+
+
+def iter_accepting_words(automaton, max_expansions=MAX_WORD_SEARCH_EXPANSIONS):
+    """Lazily yield distinct words accepted by `automaton`, shortest lassos first.
+
+    The automaton is only read, never complemented or multiplied, so each
+    further word costs a little more search rather than a bigger automaton --
+    and a caller that stops after one word pays for one.
+
+    Words are SPOT word strings (`a & !b; cycle{a}`). If the search finds none
+    but the language is not empty, SPOT's own accepting run is yielded instead.
+    """
+    found = False
+    for lasso in _iter_accepting_lassos(automaton, max_expansions=max_expansions):
+        found = True
+        yield _format_word(*lasso)
+    if not found:
+        word = _fallback_word(automaton)
+        if word is not None:
+            yield word
+
+
+## Counterexample words are read by students, so they are kept short.
+MAX_WITNESS_LENGTH = 6
+
+
+def shortest_accepting_words(automaton, max_words=5, max_length=MAX_WITNESS_LENGTH):
+    """The max_words accepted lassos with the shortest prefix, then the shortest cycle.
+
+    Every lasso of at most max_length states is considered (within the search
+    budget), so a lasso with no prefix and a cycle of three wins over one with
+    a prefix of one state, even though the search finds the latter first.
+    """
+    lassos = list(_iter_accepting_lassos(automaton, max_length=max_length))
+    if not lassos:
+        word = _fallback_word(automaton)
+        return [word] if word is not None and max_words > 0 else []
+    # sort() is stable, so ties keep the breadth-first order.
+    lassos.sort(key=lambda lasso: (len(lasso[0]), len(lasso[1])))
+    return [_format_word(*lasso) for lasso in lassos[:max_words]]
+
+
+def generate_accepting_words(automaton, max_runs=5):
+    """Up to max_runs distinct accepting words (see iter_accepting_words)."""
+    return list(itertools.islice(iter_accepting_words(automaton), max_runs))
+
+def iter_accepted_traces(formula):
+    """Lazily yield distinct traces accepted by `formula`; stop whenever enough."""
+    return iter_accepting_words(_translated(spot.formula(formula), 'traces'))
+
 
 def generate_accepted_traces(formula, max_traces=5):
-    # Parse the LTL formula
-    f = spot.formula(formula)
-    
-    # Translate the LTL formula to a Büchi automaton
-    automaton = f.translate()
-    
-    # Retrieve and return the acceptance condition
-    runs = generate_accepting_words(automaton, max_traces)
-    #w.as_automaton() shows the run as an automaton.
-    return runs
+    return list(itertools.islice(iter_accepted_traces(formula), max_traces))
+
+
+_ATOM_TOKEN = re.compile(r'\b[a-z0-9]+\b')
+
+
+def rename_atoms(text, renaming):
+    """Rename atomic propositions in a SPOT formula or word string.
+
+    Used to instantiate results computed on a literal-renamed (canonical)
+    formula back to the caller's literals; see ltlnode.canonicalize. Names not
+    in `renaming` (including `cycle` and the constants 0/1) are left as is, and
+    all names are substituted simultaneously, so swaps are safe.
+    """
+    return _ATOM_TOKEN.sub(lambda m: renaming.get(m.group(0), m.group(0)), text)
+
 
 ## Generate traces accepted by f_accepted, and rejected by f_rejected
-def generate_traces(f_accepted, f_rejected, max_traces=5):
-    # Parse the LTL formula
+def iter_traces(f_accepted, f_rejected):
+    """Lazily yield distinct traces accepted by f_accepted and rejected by f_rejected."""
     f_a = spot.formula(f_accepted)
     f_r = spot.formula.Not(spot.formula(f_rejected))
 
-    f = spot.formula.And([f_a, f_r])
-    automaton = f.translate()
-    runs = generate_accepting_words(automaton, max_traces)
-    #w.as_automaton() shows the run as an automaton.
-    return runs
+    # Product of the two cached translations rather than a translation of the
+    # conjunction: callers pass the same f_rejected (the answer) for every
+    # distractor, so its negation is translated once per request.
+    automaton = spot.product(_translated(f_a, 'traces'), _translated(f_r, 'traces'))
+    return iter_accepting_words(automaton)
+
+
+def generate_traces(f_accepted, f_rejected, max_traces=5):
+    return list(itertools.islice(iter_traces(f_accepted, f_rejected), max_traces))
 
 
 
@@ -169,48 +605,43 @@ def generate_traces(f_accepted, f_rejected, max_traces=5):
 ### Some are obvious : Implicit G means, add more G
 ### Some are less obvious: eg "BadStateIndex"
 
-def gen_rand_ltl(atoms, tree_size, ltl_priorities, num_formulae = 5):
-    
-    def to_priority_string(d):
-        return ','.join(f'{k}={v}' for k, v in d.items())
+## Random formulas come from long-lived generators with buffers kept full in
+## the background (see formulapool.py), not from a fresh generator per call.
+## The generators are constrained samplers (see formulasampler.py) rather than
+## randltl, so no formula has to be thrown away as trivial afterwards.
+def _sampled_formulas(atoms, tree_size, priorities, seed):
+    import formulasampler  # imports ltlnode, which imports this module
+    return formulasampler.sample_formulas(atoms, tree_size, priorities, seed)
 
-    # Need to do the correct kind of manipulation here
-    ltl_priorities_string = to_priority_string(ltl_priorities)
 
-    f = spot.randltl(atoms, tree_size=tree_size, ltl_priorities = ltl_priorities_string)
-    
-    return [str(next(f)) for _ in range(num_formulae)]
+_formula_pool = formulapool.FormulaPool(source=_sampled_formulas)
 
 
-def is_trivial(formula_str):
-    """
-    Check if a formula is a tautology or contradiction using SPOT.
-    
-    Args:
-        formula_str: String representation of an LTL formula
-        
-    Returns:
-        True if the formula simplifies to constant true (1) or false (0)
+def gen_rand_ltl(atoms, tree_size, ltl_priorities, num_formulae = 5):
+    """Up to `num_formulae` random formulas over `atoms` with no constant subformula.
+
+    Each has exactly `tree_size` nodes, and the true, false, xor, R, W and M
+    priorities are ignored (see formulasampler for how this differs from
+    randltl's distribution).
     """
-    try:
-        f = spot.formula(formula_str)
-        # Simplify and check if it's constant true (1) or false (0)
-        simplified = spot.simplify(f)
-        simplified_str = str(simplified)
-        return simplified_str in ['1', '0', 'true', 'false']
-    except:
-        return False
+    return _formula_pool.take(atoms, tree_size, ltl_priorities, num_formulae)
+
+
+def formula_pool_stats():
+    import formulasampler
+    stats = _formula_pool.stats()
+    stats["sampler"] = formulasampler.sampler_stats()
+    return stats
 
 
-def gen_small_rand_ltl(atoms, tree_size=3, max_attempts=10):
+def gen_small_rand_ltl(atoms, tree_size=3):
     """
-    Generate a single small non-trivial random LTL formula using SPOT.
+    Generate a single small non-trivial random LTL formula.
     Prioritizes atomic propositions and simple operators to avoid complexity.
     
     Args:
         atoms: List of atomic proposition strings
-        tree_size: Maximum tree size for the formula (default 3)
-        max_attempts: Maximum number of attempts to find a non-trivial formula
+        tree_size: Number of nodes in the formula (default 3)
         
     Returns:
         String representation of a non-trivial LTL formula, or a random atom as fallback
@@ -224,17 +655,14 @@ def gen_small_rand_ltl(atoms, tree_size=3, max_attempts=10):
         'true': 0, 'false': 0
     }
     
-    for _ in range(max_attempts):
-        try:
-            formulas = gen_rand_ltl(atoms, tree_size, priorities, num_formulae=1)
-            formula_str = formulas[0]
-            
-            # Reject trivial formulas
-            if not is_trivial(formula_str):
-                return formula_str
-        except:
-            continue
-    
+    # Pooled formulas are non-trivial by construction.
+    try:
+        formulas = _formula_pool.take(atoms, tree_size, priorities, 1)
+        if formulas:
+            return formulas[0]
+    except Exception:
+        pass
+
     # Fallback to a simple literal if all attempts fail
     return random.choice(atoms)
 
@@ -250,7 +678,7 @@ def get_mana_pneulli_class(formula):
 
 def get_aut_size(formula):
     f = spot.formula(formula)
-    aut = spot.translate(f)
+    aut = _translated(f, 'size')
     num_states = aut.num_states()
     return num_states
 
@@ -270,7 +698,7 @@ def is_trace_satisfied(trace, formula):
 
     # Translate the formula into an automaton
     f = spot.formula(formula)
-    aut = f.translate()
+    aut = _translated(f, 'check')
     wordaut = word.as_automaton()
 
     # Check if the automaton intersects with the word automaton
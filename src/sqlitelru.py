@@ -0,0 +1,158 @@
+"""A SQLite table used as a bounded key-value store with least-recently-used eviction.
+
+This is the persistent tier of relationcache and distractorcache: a file shared
+by every worker on the machine, bounded by row count. Each row records when it
+was last used; eviction deletes the oldest rows once the table outgrows its
+bound.
+
+Reads are the hot path, so a hit does not write: the new `last_used` times are
+batched in memory and written with the next write, or once TOUCH_BATCH of them
+are pending. A process that exits drops its pending touches, which only makes
+eviction slightly less accurate.
+
+The store is strictly best-effort: any SQLite error degrades to a miss (or a
+skipped write) with a warning, and a file that cannot be opened disables the
+store for the rest of the process.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+
+
+## Pending `last_used` updates written in one batch.
+TOUCH_BATCH = 64
+
+
+class SQLiteLRU:
+
+    def __init__(self, path, table, key_columns, value_type, max_rows, eviction_interval, name=None):
+        """
+        Args:
+            path: SQLite file, or None for a store that holds nothing.
+            table: Table name.
+            key_columns: Names of the TEXT/INTEGER columns forming the key.
+            value_type: SQLite type of the `value` column.
+            max_rows: Row bound.
+            eviction_interval: Writes between two eviction checks (each costs a
+                COUNT(*) and a DELETE).
+            name: What warnings call the store. Defaults to `table`.
+        """
+        self.path = path
+        self.table = table
+        self.key_columns = tuple(key_columns)
+        self.value_type = value_type
+        self.max_rows = max_rows
+        self.eviction_interval = eviction_interval
+        self.name = name or table
+
+        self._lock = threading.Lock()
+        self._conn = None
+        self._conn_pid = None
+        self._writes_since_eviction = 0
+        self._pending_touches = {}
+
+        self._where = " AND ".join(f"{c} = ?" for c in self.key_columns)
+
+    def get(self, key):
+        """The stored value for the key tuple `key`, or None."""
+        with self._lock:
+            conn = self._connection()
+            if conn is None:
+                return None
+            try:
+                row = conn.execute(f"SELECT value FROM {self.table} WHERE {self._where}", key).fetchone()
+                if row is None:
+                    return None
+                self._pending_touches[key] = time.time()
+                if len(self._pending_touches) >= TOUCH_BATCH:
+                    self._flush_touches(conn)
+                    conn.commit()
+                return row[0]
+            except sqlite3.Error as e:
+                print(f"Warning: {self.name} read failed: {e}")
+                return None
+
+    def put(self, key, value):
+        with self._lock:
+            conn = self._connection()
+            if conn is None:
+                return
+            columns = ", ".join(self.key_columns)
+            placeholders = ", ".join("?" for _ in self.key_columns)
+            try:
+                self._flush_touches(conn)
+                conn.execute(
+                    f"INSERT OR REPLACE INTO {self.table} ({columns}, value, last_used) "
+                    f"VALUES ({placeholders}, ?, ?)",
+                    tuple(key) + (value, time.time()))
+                conn.commit()
+                self._writes_since_eviction += 1
+                if self._writes_since_eviction >= self.eviction_interval:
+                    self._writes_since_eviction = 0
+                    self._evict(conn)
+            except sqlite3.Error as e:
+                print(f"Warning: {self.name} write failed: {e}")
+
+    def clear(self):
+        with self._lock:
+            self._pending_touches.clear()
+            conn = self._connection()
+            if conn is None:
+                return
+            try:
+                conn.execute(f"DELETE FROM {self.table}")
+                conn.commit()
+            except sqlite3.Error as e:
+                print(f"Warning: could not clear {self.name} at {self.path}: {e}")
+
+    def _connection(self):
+        """The SQLite connection for this process (reopened after a fork), or None."""
+        if self.path is None:
+            return None
+        if self._conn is not None and self._conn_pid == os.getpid():
+            return self._conn
+        ## Touches recorded before a fork belong to the parent's connection.
+        self._pending_touches.clear()
+        try:
+            directory = os.path.dirname(self.path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            key_columns = "".join(f" {c} TEXT NOT NULL," for c in self.key_columns)
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} ("
+                f"{key_columns}"
+                f" value {self.value_type} NOT NULL,"
+                " last_used REAL NOT NULL,"
+                f" PRIMARY KEY ({', '.join(self.key_columns)}))")
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {self.table}_last_used ON {self.table} (last_used)")
+            conn.commit()
+        except (sqlite3.Error, OSError) as e:
+            print(f"Warning: {self.name} disabled, could not open {self.path}: {e}")
+            self.path = None
+            return None
+        self._conn = conn
+        self._conn_pid = os.getpid()
+        return conn
+
+    def _flush_touches(self, conn):
+        """Write the pending `last_used` times; the caller commits."""
+        if not self._pending_touches:
+            return
+        conn.executemany(
+            f"UPDATE {self.table} SET last_used = ? WHERE {self._where}",
+            [(used,) + tuple(key) for key, used in self._pending_touches.items()])
+        self._pending_touches.clear()
+
+    def _evict(self, conn):
+        (rows,) = conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()
+        excess = rows - self.max_rows
+        if excess > 0:
+            conn.execute(
+                f"DELETE FROM {self.table} WHERE rowid IN "
+                f"(SELECT rowid FROM {self.table} ORDER BY last_used, rowid LIMIT ?)", (excess,))
+            conn.commit()
@@ -1,8 +1,11 @@
-from ltlnode import UnaryOperatorNode, BinaryOperatorNode, LiteralNode, parse_ltl_string
+from ltlnode import UnaryOperatorNode, BinaryOperatorNode, LiteralNode, parse_ltl_string, literals_in_order
 import ltltoeng_prose
-from spotutils import is_trace_satisfied
+from traceeval import is_trace_satisfied, trace_to_lasso, reevaluate_subformulas, lasso_edit, parse_trace
+from lrucache import LRUCache
 import re
 import random
+import uuid
+import json
 import html as html_module
 from exerciseprocessor import NodeRepr
 
@@ -119,9 +122,17 @@ class StepperNode:
 
 
 class TraceSatisfactionResult:
-    def __init__(self, prefix_states : list[StepperNode], cycle_states : list[StepperNode]):
+    def __init__(self, prefix_states : list[StepperNode], cycle_states : list[StepperNode], rows=None):
+        """
+        Args:
+            rows: Optionally, the satisfaction matrix the states were built
+                from: one (formula, values) pair per subformula in pre-order,
+                with one value per state. The views below read it directly
+                instead of walking every state's tree.
+        """
         self.prefix_states = prefix_states
         self.cycle_states = cycle_states
+        self.rows = rows
 
     def to_dict(self):
         return {
@@ -146,8 +157,11 @@ class TraceSatisfactionResult:
         if not all_states:
             return {"tree_html": "", "steps": []}
 
-        steps = [[1 if satisfied else 0 for _, satisfied in state.getAllSubformulae()]
-                 for state in all_states]
+        if self.rows is not None:
+            steps = _stepsFromRows(self.rows, len(all_states))
+        else:
+            steps = [[1 if satisfied else 0 for _, satisfied in state.getAllSubformulae()]
+                     for state in all_states]
 
         return {
             "tree_html": all_states[0].formulaTreeAsHTML,
@@ -160,7 +174,10 @@ class TraceSatisfactionResult:
         
         if not all_states:
             return {"subformulae": [], "matrix": [], "rows": []}
-        
+
+        if self.rows is not None:
+            return _matrixViewFromRows(self.rows)
+
         # Collect all unique subformulae across all states
         all_subformulae_set = set()
         for state in all_states:
@@ -195,6 +212,24 @@ class TraceSatisfactionResult:
         return f"TraceSatisfactionResult(prefix_states={self.prefix_states}, cycle_states={self.cycle_states})"
 
 
+def _stepsFromRows(rows, num_states):
+    return [[1 if values[i] else 0 for _, values in rows] for i in range(num_states)]
+
+
+def _matrixViewFromRows(rows):
+    # A subformula that occurs more than once has the same values everywhere.
+    values_by_formula = {}
+    for formula, values in rows:
+        values_by_formula.setdefault(formula, values)
+    all_subformulae = sorted(values_by_formula, key=lambda x: (len(x), x))
+    matrix = [[1 if v else 0 for v in values_by_formula[f]] for f in all_subformulae]
+    return {
+        "subformulae": all_subformulae,
+        "matrix": matrix,
+        "rows": [{"subformula": f, "values": row} for f, row in zip(all_subformulae, matrix)]
+    }
+
+
 
 
 def satisfiesTrace(node, trace, traceindex, originaltrace, syntax) -> StepperNode:
@@ -265,11 +300,170 @@ def splitTraceAtCycle(sr):
     return prefix_states, cycle_states
 
 
-# Trace has to be a list of spot word formulae
-def traceSatisfactionPerStep(node, trace, syntax):
+def _subtraces(prefix, cycle):
+    """The suffix of the lasso starting at each state, prefix states first."""
+    cycle_string = "cycle{" + ';'.join(cycle) + "}"
+    return ([';'.join(prefix[i:]) + ";" + cycle_string for i in range(len(prefix))]
+            + [';'.join(cycle[j:]) + ";" + cycle_string for j in range(len(cycle))])
+
+
+def _children(node):
+    if isinstance(node, UnaryOperatorNode):
+        return [node.operand]
+    if isinstance(node, BinaryOperatorNode):
+        return [node.left, node.right]
+    return []
+
+
+class StepperEvaluation:
+    """A native evaluation of a formula on a trace: the value of every
+    subformula at every state, kept so that an edited formula or trace can be
+    re-evaluated incrementally (see evaluateStepperMatrix).
+    """
+
+    def __init__(self, node, trace, syntax, prefix, cycle, lasso, values, counts):
+        self.node = node
+        self.trace = trace
+        self.syntax = syntax
+        self.prefix = prefix
+        self.cycle = cycle
+        self.lasso = lasso
+        self.reused = counts["reused"]
+        self.recomputed = counts["recomputed"]
+
+        ## Values by str(subformula), in the form reevaluate_subformulas reuses.
+        self.table = {}
+        self.labels = {}
+        self.rows = []
+        self.values = values
+
+        def walk(n):
+            # Pre-order, the order getAllSubformulae and the tree view use.
+            self.labels[id(n)] = getLTLFormulaAsString(n, syntax)
+            self.rows.append((self.labels[id(n)], values[id(n)]))
+            self.table[str(n)] = values[id(n)]
+            for child in _children(n):
+                walk(child)
+        walk(node)
+
+        self.subtraces = _subtraces(prefix, cycle)
+
+    def stepperNode(self, position):
+        """The StepperNode tree for the state at `position`."""
+        def build(n):
+            return StepperNode(self.labels[id(n)], [build(c) for c in _children(n)],
+                               self.values[id(n)][position], self.subtraces[position],
+                               traceindex=position, originaltrace=self.trace)
+        return build(self.node)
+
+    def result(self):
+        states = [self.stepperNode(i) for i in range(len(self.lasso))]
+        return TraceSatisfactionResult(states[:len(self.prefix)], states[len(self.prefix):], self.rows)
+
+    def to_json(self):
+        """The matrix and stepper views, without building a tree per state."""
+        return {
+            "matrix": _matrixViewFromRows(self.rows),
+            "tree_html": self.stepperNode(0).formulaTreeAsHTML,
+            "steps": _stepsFromRows(self.rows, len(self.lasso)),
+            "reused": self.reused,
+            "recomputed": self.recomputed,
+        }
+
+
+def evaluateStepperMatrix(node, trace, syntax, previous=None):
+    """Evaluate `node` on `trace` natively, or return None if the trace cannot
+    be evaluated without SPOT (see traceeval.trace_to_lasso).
+
+    Args:
+        previous: An earlier StepperEvaluation, typically of the same formula
+            and trace before the user edited one of them. Subformulas it
+            already evaluated are reused; after a trace edit, only those
+            mentioning a changed literal are recomputed, and if only prefix
+            states changed, only at the positions up to the last of them.
+    """
+    prefix, cycle = splitTraceAtCycle(trace)
+    lasso = trace_to_lasso(trace, literals_in_order(node))
+    if lasso is None or len(lasso) != len(prefix) + len(cycle):
+        return None
+
+    table, edit = {}, None
+    if previous is not None:
+        if previous.lasso == lasso:
+            table = previous.table
+        else:
+            edit = lasso_edit(previous.lasso, lasso)
+            if edit is not None:
+                table = previous.table
+
+    try:
+        values, counts = reevaluate_subformulas(node, lasso, table, edit)
+    except TypeError:
+        return None
+    return StepperEvaluation(node, trace, syntax, prefix, cycle, lasso, values, counts)
+
+
+def matrixTraceSatisfaction(node, trace, syntax):
+    """traceSatisfactionPerStep computed without SPOT, or None if the trace
+    cannot be evaluated natively (see traceeval.trace_to_lasso).
+
+    One bottom-up pass over the lasso gives every subformula's value at every
+    position; the per-state StepperNode trees and both views are read off that
+    matrix. Position i of the lasso is exactly the suffix trace the SPOT path
+    checks for state i.
+    """
     if len(trace) == 0:
         return []
-    
+    evaluation = evaluateStepperMatrix(node, trace, syntax)
+    return evaluation.result() if evaluation is not None else None
+
+
+## Evaluations the JSON stepper endpoint can build on, by token. They are
+## only useful while the user is still editing, so they expire quickly.
+STEPPER_CACHE_TTL_SECONDS = 300
+STEPPER_CACHE_ENTRIES = 256
+_evaluations = LRUCache(max_entries=STEPPER_CACHE_ENTRIES, ttl=STEPPER_CACHE_TTL_SECONDS)
+
+
+def rememberEvaluation(evaluation):
+    """Keep `evaluation` for later incremental edits; returns its token."""
+    token = uuid.uuid4().hex
+    _evaluations.put(token, evaluation)
+    return token
+
+
+def recallEvaluation(token):
+    """The evaluation remembered under `token`, or None if unknown or expired."""
+    if not token:
+        return None
+    return _evaluations.get(token)
+
+
+def editTraceState(trace, index, assignment):
+    """`trace` with the state at `index` (counting prefix states first, then
+    cycle states) replaced by `assignment`."""
+    if not isinstance(assignment, str) or re.search(r'[;{}]', assignment) or not assignment.strip():
+        raise ValueError("A state assignment must be a single, non-empty state")
+    prefix, cycle = splitTraceAtCycle(trace)
+    states = prefix + cycle
+    if not isinstance(index, int) or not 0 <= index < len(states):
+        raise ValueError(f"No state {index} in this trace")
+    states[index] = assignment.strip()
+    prefix, cycle = states[:len(prefix)], states[len(prefix):]
+    edited = '; '.join(prefix)
+    if cycle:
+        edited += ('; ' if prefix else '') + 'cycle{' + '; '.join(cycle) + '}'
+    return edited
+
+
+# Trace has to be a list of spot word formulae
+def traceSatisfactionPerStep(node, trace, syntax):
+    result = matrixTraceSatisfaction(node, trace, syntax)
+    if result is not None:
+        return result
+
+    # Words the native evaluator cannot take (states that leave a literal
+    # open, non-conjunctive states) are checked with SPOT, state by state.
     prefix, cycle = splitTraceAtCycle(trace)
 
 
@@ -319,3 +513,88 @@ def getTraceRenderData(trace):
         "prefix": [{"label": fmt(s)} for s in prefix],
         "cycle": [{"label": fmt(s)} for s in cycle]
     }
+
+
+## Finished /stepper views, for repeat submissions of the same formula and
+## trace (an example projected in lecture, a student re-submitting the form).
+## Bounded by entries and by total matrix cells, and kept for an hour.
+STEPPER_VIEW_CACHE_ENTRIES = 512
+STEPPER_VIEW_CACHE_MAX_CELLS = 2_000_000
+STEPPER_VIEW_CACHE_TTL_SECONDS = 3600
+_stepperViews = LRUCache(max_entries=STEPPER_VIEW_CACHE_ENTRIES,
+                         max_weight=STEPPER_VIEW_CACHE_MAX_CELLS,
+                         weigh=lambda view: view["cells"],
+                         ttl=STEPPER_VIEW_CACHE_TTL_SECONDS)
+
+
+def canonicalStepperTrace(trace):
+    """`trace` with each conjunctive state's literals sorted and whitespace
+    normalized, so that spellings of the same word share a cache entry.
+    Words traceeval cannot parse are only whitespace-normalized."""
+    parsed = parse_trace(trace)
+    if parsed is None:
+        return ' '.join(trace.split())
+
+    def state(valuation):
+        if not valuation:
+            return '1'
+        return ' & '.join(('' if v else '!') + a for a, v in sorted(valuation.items()))
+    prefix, cycle = parsed
+    return ';'.join([state(s) for s in prefix] + ['cycle{' + ';'.join(state(s) for s in cycle) + '}'])
+
+
+def stepperViewCacheKey(node, trace, syntax):
+    # Keyed on the parsed formula (parses are cached), so every spelling of a
+    # formula shares an entry; the view only depends on the parse.
+    return (str(node), canonicalStepperTrace(trace), syntax)
+
+
+def _relabelled(state, subtrace, originaltrace):
+    """A copy of StepperNode tree `state` describing `subtrace` of `originaltrace`."""
+    return StepperNode(state.formula, [_relabelled(c, subtrace, originaltrace) for c in state.children],
+                       state.satisfied, subtrace, traceindex=state.traceindex, originaltrace=originaltrace)
+
+
+def cachedStepperView(node, trace, syntax):
+    """The cached /stepper view of formula `node` on `trace`, or None.
+
+    The cached states carry the trace as first submitted; for another
+    spelling of the same word they are relabelled, so each state shows the
+    assignment as this caller wrote it.
+
+    Returns:
+        A dict with the template's prefixstates, cyclestates, matrix_data,
+        stepper_tree_html and stepper_steps (JSON), as built by
+        cacheStepperView.
+    """
+    view = _stepperViews.get(stepperViewCacheKey(node, trace, syntax))
+    if view is None or view["trace"] == trace:
+        return view
+
+    prefix, cycle = splitTraceAtCycle(trace)
+    states = [_relabelled(state, subtrace, trace)
+              for state, subtrace in zip(view["prefixstates"] + view["cyclestates"], _subtraces(prefix, cycle))]
+    return dict(view, trace=trace, prefixstates=states[:len(prefix)], cyclestates=states[len(prefix):])
+
+
+def cacheStepperView(node, trace, syntax, result):
+    """Build the /stepper view from TraceSatisfactionResult `result`, cache
+    it for later submissions of `node` and `trace`, and return it."""
+    stepper_view = result.getStepperViewData()
+    matrix_data = result.getMatrixView()
+    view = {
+        "trace": trace,
+        "prefixstates": result.prefix_states,
+        "cyclestates": result.cycle_states,
+        "matrix_data": matrix_data,
+        "stepper_tree_html": stepper_view["tree_html"],
+        "stepper_steps": json.dumps(stepper_view["steps"]),
+        "cells": max(1, sum(len(row) for row in matrix_data["matrix"])),
+    }
+    _stepperViews.put(stepperViewCacheKey(node, trace, syntax), view)
+    return view
+
+
+def stepperViewCacheStats():
+    """Hit/miss/eviction counters of the /stepper view cache."""
+    return _stepperViews.stats()
@@ -1,71 +1,107 @@
 from ltlnode import *
-import copy
+import ltlzipper
+import fingerprint
 import random
 
 
-def applyRandomMutationNotEquivalentTo(node, notEquivalentToNodes, maxAttempts = 100):
-    # Ensures that the mutated node is not equivalent to any of the nodes in the list
-    mutated_node = applyRandomMutation(node)
-
-    while isEquivalentToAny(mutated_node, notEquivalentToNodes) and maxAttempts > 0:
-        maxAttempts -= 1
-        mutated_node = applyRandomMutation(node)
-
-
-    if isEquivalentToAny(mutated_node, notEquivalentToNodes):
-        return None
-
-    return mutated_node
-
-
-def applyRandomMutation(o_node):
+## Most SPOT equivalence checks applyRandomMutationNotEquivalentTo makes
+## before giving up.
+MAX_EQUIVALENCE_CHECKS = 100
+
+
+def applyRandomMutationNotEquivalentTo(node, notEquivalentToNodes, maxEquivalenceChecks = MAX_EQUIVALENCE_CHECKS):
+    """
+    A random single-site syntactic mutation of `node` that is not equivalent
+    to any of `notEquivalentToNodes`, or None (with a warning) if there is none.
+
+    Mutants are visited in random order, each once (see randomSyntacticMutations).
+    Any mutant whose fingerprint differs from those of all the nodes is
+    returned at once, without asking SPOT. Only if every mutant agrees with
+    some node on the trace bank are mutants checked against the nodes they
+    agree with, spending at most `maxEquivalenceChecks` SPOT checks.
+    """
+    alphabet = sorted(node.literals.union(*(n.literals for n in notEquivalentToNodes)))
+    fingerprints = [(fingerprint.fingerprint(n, alphabet), n) for n in notEquivalentToNodes]
+
+    undecided = []
+    for mutated_node in randomSyntacticMutations(node):
+        bits = fingerprint.fingerprint(mutated_node, alphabet)
+        agreeing = [n for b, n in fingerprints if b == bits]
+        if not agreeing:
+            return mutated_node
+        undecided.append((mutated_node, agreeing))
+
+    checks = 0
+    for mutated_node, agreeing in undecided:
+        if checks + len(agreeing) > maxEquivalenceChecks:
+            print(f"Warning: no syntactic mutation of {node} found within {maxEquivalenceChecks} equivalence checks")
+            return None
+        checks += len(agreeing)
+        if not isEquivalentToAny(mutated_node, agreeing):
+            return mutated_node
+
+    if undecided:
+        print(f"Warning: each of the {len(undecided)} syntactic mutations of {node} is equivalent to an existing option")
+    else:
+        print(f"Warning: {node} has no syntactic mutations")
+    return None
 
-    node = copy.deepcopy(o_node)
 
+def syntacticMutations(node):
+    """
+    Every syntactic mutation of `node` at a single location: swapping the
+    operands of a binary operator, or replacing an operator with another of
+    the same arity. Yields (location, new operator class, or None for a swap)
+    pairs; `mutateAt` builds the mutated formula. Two pairs can give the
+    same formula.
+    """
+    binopclasses = BinaryOperatorNode.__subclasses__()
+    unopclasses = UnaryOperatorNode.__subclasses__()
+    for location in ltlzipper.locations(node):
+        site = location.node
+        if isinstance(site, BinaryOperatorNode):
+            if site.left is not site.right:
+                yield location, None
+            for c in binopclasses:
+                if c is not site.__class__:
+                    yield location, c
+        elif isinstance(site, UnaryOperatorNode):
+            for c in unopclasses:
+                if c is not site.__class__:
+                    yield location, c
+
+
+def mutateAt(location, newOperator):
+    """The whole formula with the mutation `syntacticMutations` described applied."""
+    site = location.node
+    if newOperator is None:
+        return location.replace(swapOperands(site))
+    elif isinstance(site, BinaryOperatorNode):
+        return location.replace(newOperator(site.left, site.right))
+    return location.replace(newOperator(site.operand))
+
+
+def randomSyntacticMutations(node):
+    """The mutants of `syntacticMutations`, in random order and each only once."""
+    mutations = list(syntacticMutations(node))
+    random.shuffle(mutations)
+    seen = {node}
+    for location, newOperator in mutations:
+        mutated_node = mutateAt(location, newOperator)
+        ## The same formula can arise at two locations (e.g. both sides of
+        ## (G a) & (G a)); nodes are interned, so this compares by identity.
+        if mutated_node not in seen:
+            seen.add(mutated_node)
+            yield mutated_node
+
+
+def applyRandomMutation(node):
     """Apply a random mutation to a random subtree of the tree rooted at `node`."""
-    # Choose a random subtree from the tree, and apply a random mutation to it
-    # Then replace the subtree with the mutated subtree
-    subtree = chooseRandomSubtree(node)
-
-    parent = findParentNode(node, subtree)
-    if parent is None:
-        return applyRandomMutationAtRoot(node)
-    else:
-        new_child = applyRandomMutationAtRoot(subtree)
-
-        ## If the parent is a UnaryOperatorNode
-        if isinstance(parent, UnaryOperatorNode):
-            parent.operand = new_child
-        elif isinstance(parent, BinaryOperatorNode) and parent.left == subtree:
-            parent.left = new_child
-        elif isinstance(parent, BinaryOperatorNode) and subtree:
-            parent.right = new_child
-        else:
-            return applyRandomMutationAtRoot(node)
-    return node
-
-
-
-
-def findParentNode(root, node):
-    if root == node:
-        return None
-
-    if isinstance(root, UnaryOperatorNode):
-        if root.operand == node:
-            return root
-        else:
-            return findParentNode(root.operand, node)
-    elif isinstance(root, BinaryOperatorNode):
-        if root.left == node or root.right == node:
-            return root
-        else:
-            left = findParentNode(root.left, node)
-            if left is not None:
-                return left
-            else:
-                return findParentNode(root.right, node)
-    return None
+    # Choose a random location in the tree (each occurrence of a repeated
+    # subformula is its own location), apply a random mutation to the subtree
+    # there, and rebuild only the path from the root to it.
+    location = random.choice(list(ltlzipper.locations(node)))
+    return location.replace(applyRandomMutationAtRoot(location.node))
 
 
 def isEquivalentToAny(node, nodes):
@@ -81,25 +117,6 @@ def isEquivalentToAny(node, nodes):
 
 
 
-def collectNodes(node):
-    """Recursively collect all nodes in the tree."""
-    nodes = [node]
-    
-    if isinstance(node, UnaryOperatorNode):
-        nodes.extend(collectNodes(node.operand))
-    elif isinstance(node, BinaryOperatorNode):
-        nodes.extend(collectNodes(node.left))
-        nodes.extend(collectNodes(node.right))
-    
-    return nodes
-
-def chooseRandomSubtree(node):
-    """Choose a random subtree from the tree rooted at `node`."""
-    all_nodes = collectNodes(node)
-    return random.choice(all_nodes)
-
-
-
 def applyRandomMutationAtRoot(node):
     """Apply a random mutation to the root of the tree."""
     ## TODO:    ## Replace a Literal with another Literal
@@ -0,0 +1,427 @@
+"""Pure-Python evaluation of LTL formulas on ultimately periodic traces.
+
+A lasso is a finite prefix followed by a cycle repeated forever -- the same
+shape as a SPOT word (`a; !a; cycle{a & b}`). Each state is the set of
+literals true in it; every other literal is false. Evaluation is linear in
+(formula size x trace length), with no automaton construction, which makes
+it cheap enough to run on a whole bank of traces (see fingerprint.py).
+
+`is_trace_satisfied` is the drop-in for spotutils.is_trace_satisfied used by
+the stepper and trace-satisfaction feedback: it parses the SPOT word itself
+and only falls back to SPOT for words it cannot turn into a lasso. Formula
+strings are read with the tutor's grammar, never with SPOT's (see
+parse_exactly).
+"""
+
+import re
+
+from ltlnode import (LTLNode, UnaryOperatorNode, BinaryOperatorNode, LiteralNode, NotNode, AndNode, OrNode, ImpliesNode,
+                     EquivalenceNode, NextNode, FinallyNode, GloballyNode,
+                     UntilNode, BOOLEAN_CONSTANTS, parse_ltl_string, literals_in_order)
+
+
+TRUE_CONSTANTS = {'true', '1'}
+
+
+class Lasso:
+
+    def __init__(self, prefix, cycle):
+        """
+        Args:
+            prefix: Sequence of states (sets of true literals), possibly empty.
+            cycle: Non-empty sequence of states, repeated forever after the prefix.
+        """
+        if len(cycle) == 0:
+            raise ValueError("A lasso needs a non-empty cycle")
+        self.prefix = tuple(frozenset(s) for s in prefix)
+        self.cycle = tuple(frozenset(s) for s in cycle)
+        self.states = self.prefix + self.cycle
+
+    @property
+    def loop_start(self):
+        return len(self.prefix)
+
+    def __len__(self):
+        return len(self.states)
+
+    def successor(self, i):
+        return i + 1 if i + 1 < len(self.states) else self.loop_start
+
+    def __eq__(self, other):
+        return isinstance(other, Lasso) and (self.prefix, self.cycle) == (other.prefix, other.cycle)
+
+    def __hash__(self):
+        return hash((self.prefix, self.cycle))
+
+    def to_spot_word(self, alphabet):
+        """This lasso as a SPOT word, fixing every literal of `alphabet` in every state."""
+        def state(s):
+            if not alphabet:
+                return '1'
+            return ' & '.join(a if a in s else f'!{a}' for a in alphabet)
+        parts = [state(s) for s in self.prefix]
+        parts.append('cycle{' + ';'.join(state(s) for s in self.cycle) + '}')
+        return ';'.join(parts)
+
+    def __repr__(self):
+        def state(s):
+            return ' & '.join(sorted(s)) if s else '1'
+        parts = [state(s) for s in self.prefix]
+        parts.append('cycle{' + ';'.join(state(s) for s in self.cycle) + '}')
+        return 'Lasso(' + ';'.join(parts) + ')'
+
+
+def evaluate(node, lasso):
+    """Whether the trace `lasso` satisfies `node` (i.e. at its first state)."""
+    return evaluate_positions(node, lasso)[0]
+
+
+def evaluate_positions(node, lasso):
+    """Truth value of `node` at every position of `lasso`, as a list of bools.
+
+    Positions past the end of the lasso repeat the cycle, so these values
+    determine the formula at every position of the infinite trace.
+    """
+    return _evaluate(node, lasso, None)
+
+
+def evaluate_subformulas(node, lasso):
+    """Truth values of every subformula of `node` at every position of `lasso`.
+
+    The same single bottom-up pass as evaluate_positions, keeping each
+    subformula's values instead of only the root's.
+
+    Returns:
+        dict from id(subformula) to its list of values (see evaluate_positions).
+    """
+    values = {}
+    _evaluate(node, lasso, values)
+    return values
+
+
+def _children(node):
+    if isinstance(node, UnaryOperatorNode):
+        return [node.operand]
+    if isinstance(node, BinaryOperatorNode):
+        return [node.left, node.right]
+    return []
+
+
+def _evaluate(node, lasso, record):
+    # Nodes are interned, so a subformula occurring twice is one object and
+    # is only evaluated once.
+    if record is not None and id(node) in record:
+        return record[id(node)]
+    result = _combine(node, lasso, [_evaluate(c, lasso, record) for c in _children(node)])
+    if record is not None:
+        record[id(node)] = result
+    return result
+
+
+def _combine(node, lasso, operands):
+    """Values of `node` at every position, given the values of its operands."""
+    n = len(lasso)
+
+    if isinstance(node, LiteralNode):
+        if node.value in BOOLEAN_CONSTANTS:
+            return [node.value in TRUE_CONSTANTS] * n
+        return [node.value in s for s in lasso.states]
+
+    if isinstance(node, NotNode):
+        return [not v for v in operands[0]]
+
+    if isinstance(node, NextNode):
+        v = operands[0]
+        return [v[lasso.successor(i)] for i in range(n)]
+
+    if isinstance(node, FinallyNode):
+        return _until([True] * n, operands[0], lasso)
+
+    if isinstance(node, GloballyNode):
+        # G a == !F !a
+        return [not x for x in _until([True] * n, [not x for x in operands[0]], lasso)]
+
+    if isinstance(node, UntilNode):
+        return _until(operands[0], operands[1], lasso)
+
+    if isinstance(node, (AndNode, OrNode, ImpliesNode, EquivalenceNode)):
+        left, right = operands
+        if isinstance(node, AndNode):
+            return [l and r for l, r in zip(left, right)]
+        if isinstance(node, OrNode):
+            return [l or r for l, r in zip(left, right)]
+        if isinstance(node, ImpliesNode):
+            return [(not l) or r for l, r in zip(left, right)]
+        return [l == r for l, r in zip(left, right)]
+
+    raise TypeError(f"Cannot evaluate {node!r} on a trace")
+
+
+class LassoEdit:
+    """How a lasso differs from an earlier one of the same shape.
+
+    Attributes:
+        literals: Literals whose value changed in some state. A subformula
+            mentioning none of them has the same values as before.
+        last_position: If every changed state is in the prefix, the last of
+            them: values at later positions cannot have changed, since LTL
+            only looks forward. None if a cycle state changed.
+    """
+
+    def __init__(self, literals, last_position):
+        self.literals = frozenset(literals)
+        self.last_position = last_position
+
+
+def lasso_edit(old, new):
+    """The LassoEdit taking `old` to `new`, or None if their shapes differ."""
+    if (len(old.prefix), len(old.cycle)) != (len(new.prefix), len(new.cycle)):
+        return None
+    changed = [i for i, (a, b) in enumerate(zip(old.states, new.states)) if a != b]
+    literals = set()
+    for i in changed:
+        literals |= old.states[i] ^ new.states[i]
+    in_prefix = all(i < new.loop_start for i in changed)
+    return LassoEdit(literals, max(changed, default=-1) if in_prefix else None)
+
+
+def reevaluate_subformulas(node, lasso, previous, edit=None):
+    """evaluate_subformulas, reusing an earlier evaluation wherever possible.
+
+    Args:
+        previous: Values by str(subformula) from an earlier evaluation, on
+            `lasso` itself (edit=None) or on a lasso `edit` turns into `lasso`.
+            Subformulas of `node` found there (e.g. the parts of a formula the
+            user did not touch) are not evaluated again unless the edit
+            changed one of their literals, and then only at the positions
+            it can have affected.
+        edit: A LassoEdit (see lasso_edit), or None.
+
+    Returns:
+        (values, counts): values as evaluate_subformulas returns them, and
+        {"reused": ..., "recomputed": ...} counts of subformulas.
+    """
+    values = {}
+    counts = {"reused": 0, "recomputed": 0}
+    _reevaluate(node, lasso, previous, edit, values, counts)
+    return values, counts
+
+
+def _reevaluate(node, lasso, previous, edit, record, counts):
+    if id(node) in record:
+        return record[id(node)]
+    operands = [_reevaluate(c, lasso, previous, edit, record, counts) for c in _children(node)]
+
+    old = previous.get(str(node))
+    if old is not None and len(old) != len(lasso):
+        old = None
+    if old is not None and (edit is None or node.literals.isdisjoint(edit.literals)):
+        result = old
+        counts["reused"] += 1
+    elif old is not None and edit.last_position is not None:
+        result = _update_prefix(node, lasso, operands, old, edit.last_position)
+        counts["recomputed"] += 1
+    else:
+        result = _combine(node, lasso, operands)
+        counts["recomputed"] += 1
+    record[id(node)] = result
+    return result
+
+
+def _update_prefix(node, lasso, operands, old, last):
+    """`old` with positions 0..last recomputed; `last` is a prefix position.
+
+    Positions after `last` keep their old values, and every position up to
+    it lies in the prefix, so its successor is simply the next position.
+    """
+    res = list(old)
+    positions = range(last, -1, -1)
+    if isinstance(node, LiteralNode):
+        if node.value not in BOOLEAN_CONSTANTS:
+            for i in positions:
+                res[i] = node.value in lasso.states[i]
+    elif isinstance(node, NotNode):
+        for i in positions:
+            res[i] = not operands[0][i]
+    elif isinstance(node, NextNode):
+        for i in positions:
+            res[i] = operands[0][i + 1]
+    elif isinstance(node, FinallyNode):
+        for i in positions:
+            res[i] = operands[0][i] or res[i + 1]
+    elif isinstance(node, GloballyNode):
+        for i in positions:
+            res[i] = operands[0][i] and res[i + 1]
+    elif isinstance(node, UntilNode):
+        left, right = operands
+        for i in positions:
+            res[i] = right[i] or (left[i] and res[i + 1])
+    else:
+        full = _combine(node, lasso, operands)
+        res[:last + 1] = full[:last + 1]
+    return res
+
+
+def _until(left, right, lasso):
+    """Least fixpoint of  res[i] = right[i] or (left[i] and res[i + 1]).
+
+    Two backward passes over the cycle suffice: the first settles every
+    position that reaches `right` without wrapping around, the second carries
+    those values across the back edge. The prefix then needs a single pass.
+    """
+    n = len(lasso)
+    start = lasso.loop_start
+    res = [False] * n
+    for _ in range(2):
+        for i in range(n - 1, start - 1, -1):
+            res[i] = right[i] or (left[i] and res[lasso.successor(i)])
+    for i in range(start - 1, -1, -1):
+        res[i] = right[i] or (left[i] and res[i + 1])
+    return res
+
+
+_STATE_LITERAL = re.compile(r'(!?)\s*([a-z0-9]+)')
+_CYCLE = re.compile(r'cycle\s*\{([^}]*)\}\s*$')
+
+
+def _strip_parens(text):
+    """`text` without the parentheses enclosing all of it, if any."""
+    text = text.strip()
+    while text.startswith('(') and text.endswith(')'):
+        depth = 0
+        for i, c in enumerate(text):
+            depth += (c == '(') - (c == ')')
+            if depth == 0 and i < len(text) - 1:
+                return text  # "(a) & (b)": the first paren closes early
+        text = text[1:-1].strip()
+    return text
+
+
+def _parse_state(text):
+    """A state of a SPOT word as {literal: value}, or None unless it is a
+    conjunction of (negated) literals, e.g. `a & !b` or `1`."""
+    text = _strip_parens(text)
+    if text in TRUE_CONSTANTS:
+        return {}
+    valuation = {}
+    for part in text.split('&'):
+        m = _STATE_LITERAL.fullmatch(_strip_parens(part))
+        if m is None or m.group(2) in BOOLEAN_CONSTANTS:
+            return None
+        literal, value = m.group(2), not m.group(1)
+        if valuation.get(literal, value) != value:
+            return None  # a & !a: no valuation matches this state
+        valuation[literal] = value
+    return valuation
+
+
+def parse_trace(text):
+    """Parse a SPOT word such as `a & !b; cycle{a; !a}`.
+
+    Returns:
+        (prefix, cycle), lists of {literal: value} dicts, or None if the word
+        has no cycle or a state that is not a conjunction of literals.
+    """
+    text = text.strip()
+    m = _CYCLE.search(text)
+    if m is None:
+        return None
+    prefix_text = text[:m.start()].strip().rstrip(';')
+    prefix = [_parse_state(s) for s in prefix_text.split(';')] if prefix_text.strip() else []
+    cycle = [_parse_state(s) for s in m.group(1).split(';') if s.strip()]
+    if not cycle or any(s is None for s in prefix + cycle):
+        return None
+    return prefix, cycle
+
+
+def trace_to_lasso(text, alphabet):
+    """The lasso for SPOT word `text`, or None unless every state fixes every
+    literal of `alphabet`.
+
+    A state that leaves a literal open stands for several concrete states, and
+    SPOT then answers whether *some* trace matching the word satisfies the
+    formula, which a single lasso cannot.
+    """
+    return lasso_from_parsed(parse_trace(text), alphabet)
+
+
+def lasso_from_parsed(parsed, alphabet):
+    """trace_to_lasso for a word already parsed with parse_trace."""
+    if parsed is None:
+        return None
+    prefix, cycle = parsed
+    for state in prefix + cycle:
+        if any(a not in state for a in alphabet):
+            return None
+
+    def true_literals(state):
+        return [a for a, v in state.items() if v]
+    return Lasso([true_literals(s) for s in prefix], [true_literals(s) for s in cycle])
+
+
+_counts = {"native": 0, "spot": 0}
+
+## The characters of the tutor's formula syntax. The ANTLR parser recovers
+## from input it does not understand by dropping it ("a W b" parses as "a"),
+## so a string formula is only read if it uses these characters alone and
+## every atom in it made it into the parse tree.
+_NATIVE_FORMULA = re.compile(r'[a-z0-9\s()!&|<>\-XFGU]*')
+_ATOM = re.compile(r'[a-z0-9]+')
+
+
+def _leaf_count(node):
+    if isinstance(node, LiteralNode):
+        return 1
+    if hasattr(node, 'operand'):
+        return _leaf_count(node.operand)
+    return _leaf_count(node.left) + _leaf_count(node.right)
+
+
+def parse_exactly(text):
+    """The LTLNode the tutor's parser reads from formula string `text`, or
+    None if it would not read all of it (see _NATIVE_FORMULA).
+
+    The tutor's precedence is not SPOT's: `U` binds looser than `&`, and
+    every binary operator groups to the left, so `a & b U c` is
+    `(a & b) U c` and `a -> b -> c` is `(a -> b) -> c`, where SPOT reads
+    `a & (b U c)` and `a -> (b -> c)`. Anything that hands the formula to
+    SPOT must pass str() of the node, which is fully parenthesized.
+    """
+    if not _NATIVE_FORMULA.fullmatch(text) or '<>' in text:  # SPOT's "<> a" is F a
+        return None
+    try:
+        node = parse_ltl_string(text)
+    except Exception:
+        return None
+    if _leaf_count(node) != len(_ATOM.findall(text)):
+        return None
+    return node
+
+
+def is_trace_satisfied(trace, formula):
+    """Whether the SPOT word `trace` satisfies `formula` (an LTLNode, or a
+    string in the tutor's syntax, read by parse_exactly).
+
+    Agrees with spotutils.is_trace_satisfied on str() of the parsed formula,
+    which it calls whenever the word cannot be evaluated natively (see
+    trace_to_lasso), so the verdict never depends on which path answered.
+
+    Raises:
+        ValueError: `formula` is a string the tutor's parser cannot read in
+            full (e.g. SPOT-only operators such as `W` or `<>`).
+    """
+    node = formula if isinstance(formula, LTLNode) else parse_exactly(str(formula))
+    if node is None:
+        raise ValueError(f"Cannot read formula {formula!r}")
+    lasso = trace_to_lasso(str(trace), literals_in_order(node))
+    if lasso is None:
+        import spotutils
+        _counts["spot"] += 1
+        return spotutils.is_trace_satisfied(trace=trace, formula=str(node))
+    _counts["native"] += 1
+    return evaluate(node, lasso)
+
+
+def evaluator_stats():
+    """How many trace checks were answered natively and how many by SPOT."""
+    return dict(_counts)
@@ -0,0 +1,139 @@
+"""Tests for spotutils.iter_accepting_words -- the lazy enumeration of distinct
+accepting lassos that replaced the complement-and-product exclusion loop.
+
+spot is mocked. The enumerator only reads an automaton through a handful of
+twa_graph methods (get_init_state_number, out, acc().accepting, get_dict), so
+a tiny hand-built automaton stands in for SPOT's, with edge labels that are
+already strings. Enumeration on real translations is covered in
+test_spotutils_realspot.py.
+
+Run with:
+    python -m pytest test/test_accepting_words.py -v
+"""
+
+import itertools
+import os
+import sys
+import unittest
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+sys.modules.setdefault("spot", MagicMock())
+
+import spotutils
+
+
+class _Cond(str):
+    def id(self):
+        return hash(str(self))
+
+
+class _Automaton:
+    """Transition-based Büchi automaton: an edge carries mark {0} or nothing."""
+
+    def __init__(self, edges, init=0):
+        # edges: (src, dst, label, accepting)
+        self.edges = [SimpleNamespace(src=s, dst=d, cond=_Cond(l), acc=frozenset([0]) if a else frozenset())
+                      for s, d, l, a in edges]
+        self.init = init
+        self.outs = 0
+
+    def get_dict(self):
+        return None
+
+    def get_init_state_number(self):
+        return self.init
+
+    def out(self, s):
+        self.outs += 1
+        return [e for e in self.edges if e.src == s]
+
+    def acc(self):
+        return SimpleNamespace(accepting=lambda marks: 0 in marks)
+
+    def accepting_run(self):
+        return None
+
+
+def words(aut, n=None, **kwargs):
+    with patch.object(spotutils.spot, "bdd_format_formula", side_effect=lambda d, c: str(c)):
+        return list(itertools.islice(spotutils.iter_accepting_words(aut, **kwargs), n))
+
+
+class TestIterAcceptingWords(unittest.TestCase):
+
+    def test_shortest_lassos_come_first(self):
+        # F b: wait on !b, then loop on 1 forever.
+        aut = _Automaton([(0, 0, "!b", False), (0, 1, "b", False), (1, 1, "1", True)])
+        self.assertEqual(words(aut, 1), ["b; cycle{1}"])
+
+    def test_non_accepting_loops_are_skipped(self):
+        aut = _Automaton([(0, 0, "!b", False), (0, 1, "b", False), (1, 1, "1", True)])
+        for w in words(aut):
+            self.assertNotIn("cycle{!b}", w)
+
+    def test_words_are_distinct_up_to_rotation_and_unrolling(self):
+        # Two ways to spell the same infinite word a, b, a, b, ...
+        aut = _Automaton([(0, 1, "a", True), (1, 0, "b", True),
+                          (0, 2, "a", True), (2, 3, "b", True), (3, 2, "a", True)])
+        self.assertEqual(words(aut), ["cycle{a; b}"])
+
+    def test_caller_can_stop_early(self):
+        aut = _Automaton([(0, i, f"p{i}", True) for i in range(1, 50)] +
+                         [(i, i, "1", True) for i in range(1, 50)])
+        with patch.object(spotutils.spot, "bdd_format_formula", side_effect=lambda d, c: str(c)):
+            stream = spotutils.iter_accepting_words(aut)
+            first = next(stream)
+        self.assertEqual(first, "p1; cycle{1}")
+        self.assertEqual(aut.outs, 2)
+
+    def test_search_is_bounded(self):
+        aut = _Automaton([(0, i, f"p{i}", False) for i in range(1, 50)] +
+                         [(i, 0, "1", False) for i in range(1, 50)])
+        self.assertEqual(words(aut, max_expansions=10), [])
+
+    def test_generate_accepting_words_takes_a_prefix_of_the_stream(self):
+        aut = _Automaton([(0, i, f"p{i}", True) for i in range(1, 10)] +
+                         [(i, i, "1", True) for i in range(1, 10)])
+        with patch.object(spotutils.spot, "bdd_format_formula", side_effect=lambda d, c: str(c)):
+            self.assertEqual(spotutils.generate_accepting_words(aut, 3),
+                             ["p1; cycle{1}", "p2; cycle{1}", "p3; cycle{1}"])
+
+
+class TestShortestAcceptingWords(unittest.TestCase):
+
+    def _shortest(self, aut, **kwargs):
+        with patch.object(spotutils.spot, "bdd_format_formula", side_effect=lambda d, c: str(c)):
+            return spotutils.shortest_accepting_words(aut, **kwargs)
+
+    def test_shortest_prefix_wins_over_shortest_total(self):
+        # 'x; cycle{y}' (length 2) is found before 'cycle{a; b; c}' (length 3),
+        # but a witness with no prefix at all reads more easily.
+        aut = _Automaton([(0, 1, "x", False), (1, 1, "y", True),
+                          (0, 2, "a", True), (2, 3, "b", True), (3, 0, "c", True)])
+        self.assertEqual(self._shortest(aut), ["cycle{a; b; c}", "x; cycle{y}"])
+
+    def test_count_cap(self):
+        aut = _Automaton([(0, i, f"p{i}", True) for i in range(1, 10)] +
+                         [(i, i, "1", True) for i in range(1, 10)])
+        self.assertEqual(len(self._shortest(aut, max_words=2)), 2)
+
+    def test_length_cap(self):
+        # The only accepting loop is four edges long.
+        aut = _Automaton([(0, 1, "a", False), (1, 2, "b", False), (2, 3, "c", False), (3, 0, "d", True)])
+        self.assertEqual(self._shortest(aut, max_length=3), [])
+        self.assertEqual(self._shortest(aut, max_length=4), ["cycle{a; b; c; d}"])
+
+
+class TestNormalizeLasso(unittest.TestCase):
+
+    def test_cycle_reduced_to_primitive_root(self):
+        self.assertEqual(spotutils._normalize_lasso((), ("a", "a")), ((), ("a",)))
+
+    def test_prefix_rolled_into_cycle(self):
+        self.assertEqual(spotutils._normalize_lasso(("c", "a"), ("b", "a")), (("c",), ("a", "b")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,166 @@
+"""Tests for the precompiled automaton store and its use by spotutils.
+
+spot is mocked: the store only hands HOA text to `spot.automaton`, so these
+tests check what is written, what is read back, and when spotutils uses a
+stored automaton instead of translating.
+
+Run with:
+    python -m pytest test/test_automatonstore.py -v
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+sys.modules.setdefault("spot", MagicMock())
+
+import automatonstore
+import spotutils
+from automatonstore import AutomatonStore, write_store
+
+
+HOA_A = "HOA: v1\nname: \"G a\"\nStates: 1\n--BODY--\nState: 0\n[0] 0\n--END--"
+HOA_B = "HOA: v1\nname: \"F b\"\nStates: 2\n--BODY--\nState: 0\n[t] 0\n[0] 1\nState: 1\n[t] 1\n--END--"
+
+
+class TestAutomatonStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, "automata")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_round_trip(self):
+        write_store(self.path, {"G a": HOA_A, "F b": HOA_B})
+        store = AutomatonStore(self.path)
+        self.assertEqual(len(store), 2)
+        self.assertIn("G a", store)
+        self.assertEqual(store.text("G a"), HOA_A + "\n")
+        self.assertEqual(store.text("F b"), HOA_B + "\n")
+        self.assertIsNone(store.text("a U b"))
+        store.close()
+
+    def test_index_records_offsets_into_the_data_file(self):
+        write_store(self.path, {"G a": HOA_A, "F b": HOA_B})
+        with open(self.path + ".json") as f:
+            index = json.load(f)
+        self.assertEqual(index["version"], automatonstore.FORMAT_VERSION)
+        self.assertEqual(index["level"], automatonstore.STORE_LEVEL)
+        with open(self.path + ".hoa", "rb") as f:
+            data = f.read()
+        for key, (offset, length) in index["entries"].items():
+            self.assertTrue(data[offset:offset + length].startswith(b"HOA: v1"), key)
+
+    def test_load_parses_only_the_requested_automaton(self):
+        write_store(self.path, {"G a": HOA_A, "F b": HOA_B})
+        store = AutomatonStore(self.path)
+        with patch.object(automatonstore.spot, "automaton") as parse:
+            parse.return_value = "parsed"
+            self.assertEqual(store.load("F b"), "parsed")
+            self.assertIsNone(store.load("X a"))
+        parse.assert_called_once_with(HOA_B + "\n")
+        self.assertEqual(store.stats()["hits"], 1)
+        self.assertEqual(store.stats()["misses"], 1)
+        store.close()
+
+    def test_missing_store_is_empty(self):
+        store = AutomatonStore(os.path.join(self.tmp, "nothing-here"))
+        self.assertEqual(len(store), 0)
+        self.assertIsNone(store.load("G a"))
+
+    def test_empty_store(self):
+        write_store(self.path, {})
+        store = AutomatonStore(self.path)
+        self.assertEqual(len(store), 0)
+        self.assertIsNone(store.load("G a"))
+
+    def test_unknown_format_is_ignored(self):
+        write_store(self.path, {"G a": HOA_A})
+        with open(self.path + ".json", "w") as f:
+            json.dump({"version": automatonstore.FORMAT_VERSION + 1, "entries": {"G a": [0, 10]}}, f)
+        self.assertEqual(len(AutomatonStore(self.path)), 0)
+
+    def test_rewrite_replaces_the_store(self):
+        write_store(self.path, {"G a": HOA_A})
+        write_store(self.path, {"F b": HOA_B})
+        store = AutomatonStore(self.path)
+        self.assertNotIn("G a", store)
+        self.assertEqual(store.text("F b"), HOA_B + "\n")
+        self.assertFalse(os.path.exists(self.path + ".hoa.tmp"))
+        store.close()
+
+
+class TestCorpusFormulas(unittest.TestCase):
+
+    def test_collects_every_shipped_corpus(self):
+        formulas = automatonstore.corpus_formulas()
+        self.assertEqual(len(formulas), len(set(formulas)))
+        self.assertIn("G(p -> F q)", formulas)         # ltl_formula_suggestions.json
+        self.assertIn("e U (G (!e))", formulas)        # equivalent.json
+        self.assertIn("!p1 | X(p0 | X(p1 U p0))", formulas)  # semantic benchmark
+        for pattern in automatonstore.TEMPLATE_PATTERNS:
+            self.assertIn(pattern, formulas)
+
+
+class _Formula:
+    def __init__(self, text):
+        self.text = text
+        self.translate = MagicMock(side_effect=lambda level: self._aut())
+
+    def __str__(self):
+        return self.text
+
+    @staticmethod
+    def _aut():
+        aut = MagicMock()
+        aut.num_states.return_value = 1
+        aut.num_edges.return_value = 1
+        return aut
+
+
+class TestTranslationUsesTheStore(unittest.TestCase):
+
+    def setUp(self):
+        spotutils.clear_translation_cache()
+        self.store = MagicMock()
+        self.stored = _Formula._aut()
+        self.store.load.side_effect = lambda key: self.stored if key == "G a" else None
+        self._patches = [patch.object(spotutils, "_automaton_store", self.store),
+                         patch.object(spotutils, "_translation_budget", None)]
+        for p in self._patches:
+            p.start()
+
+    def tearDown(self):
+        for p in self._patches:
+            p.stop()
+        spotutils.clear_translation_cache()
+
+    def test_stored_automaton_replaces_translation(self):
+        f = _Formula("G a")
+        self.assertIs(spotutils._translated(f, "check"), self.stored)
+        f.translate.assert_not_called()
+
+    def test_stored_automaton_serves_every_profile(self):
+        f = _Formula("G a")
+        spotutils._translated(f, "check")
+        self.assertIs(spotutils._translated(f, "traces"), self.stored)
+        self.store.load.assert_called_once_with("G a")
+        f.translate.assert_not_called()
+
+    def test_other_formulas_are_translated(self):
+        f = _Formula("F b")
+        first = spotutils._translated(f, "traces")
+        self.assertIs(spotutils._translated(f, "traces"), first)
+        f.translate.assert_called_once()
+        self.store.load.assert_called_once_with("F b")
+
+
+if __name__ == "__main__":
+    unittest.main()
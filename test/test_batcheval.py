@@ -0,0 +1,117 @@
+"""Tests for batch evaluation of formula/trace pairs.
+
+spot is mocked; pairs that need SPOT go through an injected checker.
+
+Run with:
+    python -m pytest test/test_batcheval.py -v
+"""
+
+import io
+import json
+import os
+import sys
+import unittest
+from contextlib import redirect_stdout
+from unittest.mock import MagicMock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+sys.modules.setdefault("spot", MagicMock())
+
+import batcheval
+from batcheval import check_batch, evaluate_batch, suffix_traces
+
+
+class _SpotCheck:
+
+    def __init__(self, values=None, error=None):
+        self.calls = []
+        self.values = values
+        self.error = error
+
+    def __call__(self, formula, trace):
+        self.calls.append((formula, trace))
+        if self.error is not None:
+            raise self.error
+        return self.values
+
+
+class TestCheckBatch(unittest.TestCase):
+
+    def test_valid(self):
+        check_batch(["G a"], ["cycle{a}", "a; cycle{!a}"])
+        check_batch(["G a", "F a"], ["cycle{a}"])
+
+    def test_invalid(self):
+        for formulas, traces in [([], ["cycle{a}"]), (["G a"], []), ("G a", ["cycle{a}"]),
+                                 (["G a"], [None]), (["  "], ["cycle{a}"]),
+                                 (["G a"], ["cycle{a}"] * (batcheval.MAX_PAIRS + 1))]:
+            with self.subTest(formulas=formulas, traces=traces):
+                with self.assertRaises(ValueError):
+                    check_batch(formulas, traces)
+
+
+class TestEvaluateBatch(unittest.TestCase):
+
+    def test_one_formula_many_traces(self):
+        spot_check = _SpotCheck()
+        results = list(evaluate_batch(["G (a -> F b)"], ["a & !b; cycle{b & !a}", "cycle{a & !b}"],
+                                      spot_check=spot_check))
+        self.assertEqual(results, [
+            {"formula": "G (a -> F b)", "trace": "a & !b; cycle{b & !a}",
+             "satisfied": True, "positions": [1, 1], "engine": "native"},
+            {"formula": "G (a -> F b)", "trace": "cycle{a & !b}",
+             "satisfied": False, "positions": [0], "engine": "native"},
+        ])
+        self.assertEqual(spot_check.calls, [])
+
+    def test_many_formulas_one_trace(self):
+        results = list(evaluate_batch(["a", "X a", "F !a"], ["a; !a; cycle{a}"]))
+        self.assertEqual([r["positions"] for r in results], [[1, 0, 1], [0, 1, 1], [1, 1, 0]])
+
+    def test_falls_back_to_spot(self):
+        spot_check = _SpotCheck(values=[True, False])
+        results = list(evaluate_batch(["a U b"], ["a; cycle{b}"], spot_check=spot_check))
+        # "a; cycle{b}" leaves b open in the first state.
+        self.assertEqual(spot_check.calls, [("(a U b)", "a; cycle{b}")])
+        self.assertEqual(results[0]["engine"], "spot")
+        self.assertEqual(results[0]["positions"], [1, 0])
+        self.assertTrue(results[0]["satisfied"])
+
+    def test_both_paths_read_the_formula_the_same_way(self):
+        # The tutor reads "a & b U c" as (a & b) U c; SPOT would read the raw
+        # string as a & (b U c), so it must be sent the parse.
+        spot_check = _SpotCheck(values=[True, False])
+        results = list(evaluate_batch(["a & b U c"], ["!a & !b & c; cycle{!a & !b & !c}", "!a & c; cycle{!c}"],
+                                      spot_check=spot_check))
+        self.assertEqual([(r["engine"], r["satisfied"]) for r in results], [("native", True), ("spot", True)])
+        self.assertEqual(spot_check.calls, [("((a & b) U c)", "!a & c; cycle{!c}")])
+
+    def test_unreadable_formulas_are_errors(self):
+        spot_check = _SpotCheck(values=[True])
+        results = list(evaluate_batch(["a W b"], ["cycle{a}", "cycle{b}"], spot_check=spot_check))
+        self.assertEqual([r["error"] for r in results], ["Cannot read formula 'a W b'"] * 2)
+        self.assertEqual(spot_check.calls, [])
+
+    def test_errors_are_reported_per_pair(self):
+        spot_check = _SpotCheck(error=RuntimeError("SPOT timed out"))
+        results = list(evaluate_batch(["G b", "G a"], ["cycle{a}"], spot_check=spot_check))
+        self.assertEqual(results[0], {"formula": "G b", "trace": "cycle{a}", "error": "SPOT timed out"})
+        self.assertTrue(results[1]["satisfied"])
+
+    def test_suffix_traces(self):
+        self.assertEqual(suffix_traces("a; b; cycle{c; d}"),
+                         ["a;b;cycle{c;d}", "b;cycle{c;d}", "c;d;cycle{c;d}", "d;cycle{c;d}"])
+
+
+class TestCommandLine(unittest.TestCase):
+
+    def test_prints_ndjson(self):
+        out = io.StringIO()
+        with redirect_stdout(out):
+            batcheval.main(["--formula", "G a", "--trace", "cycle{a}", "--trace", "a; cycle{!a}"])
+        lines = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual([line["satisfied"] for line in lines], [True, False])
+
+
+if __name__ == "__main__":
+    unittest.main()
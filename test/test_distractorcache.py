@@ -0,0 +1,168 @@
+"""Tests for the per-answer distractor set cache.
+
+SPOT is mocked. Sets are built from real mutant neighborhoods with a
+trusting equivalence check, or by a counting fake so the tests can tell hits
+from recomputation.
+
+Run with:
+    python -m pytest test/test_distractorcache.py -v
+"""
+
+import os
+import random
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+sys.modules.setdefault("spot", MagicMock())
+
+from ltlnode import parse_ltl_string
+from codebook import MisconceptionCode
+import distractorcache
+import mutantneighborhood
+from mutantneighborhood import Mutant
+from distractorcache import DistractorCache
+import sqlitelru
+
+
+class _Builder:
+    """Stands in for build_distractor_set: drops the U's right operand or swaps its sides."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, canonical):
+        self.calls.append(str(canonical))
+        return [{"formula": str(canonical.left), "misconceptions": ["ExclusiveU"]},
+                {"formula": str(parse_ltl_string(f"({canonical.right}) U ({canonical.left})")),
+                 "misconceptions": ["BadStateQuantification", "ExclusiveU"]}]
+
+
+class TestBuildDistractorSet(unittest.TestCase):
+
+    def test_every_site_one_option_per_class(self):
+        with patch.object(mutantneighborhood.spotutils, "areEquivalent", return_value=True):
+            options = distractorcache.build_distractor_set(parse_ltl_string("F a & F b"))
+        implicit_f = [o["formula"] for o in options if str(MisconceptionCode.ImplicitF) in o["misconceptions"]]
+        self.assertEqual(implicit_f, ["(a & (F b))", "((F a) & b)"])
+        formulas = [o["formula"] for o in options]
+        self.assertEqual(len(formulas), len(set(formulas)))
+        self.assertNotIn("((F a) & (F b))", formulas)
+
+    def test_equivalent_mutants_share_an_option(self):
+        mutants = [Mutant(code, [], parse_ltl_string(f))
+                   for f, code in [("G p0", "A"), ("G G p0", "B"), ("F p0", "C"), ("G G p0", "A")]]
+        with patch.object(mutantneighborhood, "enumerate_mutants", return_value=mutants), \
+             patch.object(mutantneighborhood.spotutils, "areEquivalent", return_value=True):
+            options = distractorcache.build_distractor_set(parse_ltl_string("G F p0"))
+        self.assertEqual(options, [{"formula": "(G p0)", "misconceptions": ["A", "B"]},
+                                   {"formula": "(F p0)", "misconceptions": ["C"]}])
+
+
+class TestOnePerMisconception(unittest.TestCase):
+
+    OPTIONS = [{"formula": "a", "misconceptions": ["A"]},
+               {"formula": "b", "misconceptions": ["A", "B"]},
+               {"formula": "c", "misconceptions": ["C"]},
+               {"formula": "d", "misconceptions": ["A"]}]
+
+    def test_one_option_per_code(self):
+        for seed in range(20):
+            chosen = distractorcache.one_per_misconception(self.OPTIONS, random.Random(seed))
+            codes = [c for o in chosen for c in o["misconceptions"]]
+            self.assertTrue({"A", "B", "C"} <= set(codes))
+            self.assertEqual(len(chosen), len({o["formula"] for o in chosen}))
+            self.assertLessEqual(len(chosen), 3)
+
+    def test_every_site_can_be_chosen(self):
+        shown = {o["formula"] for seed in range(50)
+                 for o in distractorcache.one_per_misconception(self.OPTIONS, random.Random(seed))}
+        self.assertEqual(shown, {"a", "b", "c", "d"})
+
+
+class TestDistractorSet(unittest.TestCase):
+
+    def setUp(self):
+        distractorcache.configure(None)
+        self.build = _Builder()
+
+    def tearDown(self):
+        distractorcache.configure(None)
+
+    def test_renamed_answers_share_one_set(self):
+        first = distractorcache.distractor_set(parse_ltl_string("a U b"), compute=self.build)
+        second = distractorcache.distractor_set(parse_ltl_string("q U s"), compute=self.build)
+        self.assertEqual(self.build.calls, ["(p0 U p1)"])
+        self.assertEqual([o["formula"] for o in first], ["a", "(b U a)"])
+        self.assertEqual([o["formula"] for o in second], ["q", "(s U q)"])
+        self.assertEqual(second[1]["misconceptions"], ["BadStateQuantification", "ExclusiveU"])
+        self.assertEqual(distractorcache.stats()["hits"], 1)
+
+    def test_callers_cannot_modify_the_cached_set(self):
+        node = parse_ltl_string("a U b")
+        options = distractorcache.distractor_set(node, compute=self.build)
+        options[0]["misconceptions"].append("Syntactic")
+        options.pop()
+        again = distractorcache.distractor_set(node, compute=self.build)
+        self.assertEqual(len(again), 2)
+        self.assertEqual(again[0]["misconceptions"], ["ExclusiveU"])
+
+    def test_failures_are_not_cached(self):
+        def failing(canonical):
+            raise TimeoutError("worker timed out")
+
+        node = parse_ltl_string("a U b")
+        with self.assertRaises(TimeoutError):
+            distractorcache.distractor_set(node, compute=failing)
+        distractorcache.distractor_set(node, compute=self.build)
+        self.assertEqual(len(self.build.calls), 1)
+
+
+class TestPersistentTier(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp(prefix="ltltutor_distractors_")
+        self.path = os.path.join(self.dir, "distractor_cache.db")
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def test_sets_survive_a_new_process(self):
+        options = [{"formula": "(F p0)", "misconceptions": ["ImplicitG"]}]
+        DistractorCache(path=self.path).put("(G (F p0))", options)
+        restarted = DistractorCache(path=self.path)
+        self.assertEqual(restarted.get("(G (F p0))"), options)
+        self.assertEqual(restarted.stats()["persistent_hits"], 1)
+
+    def test_other_versions_are_ignored(self):
+        DistractorCache(path=self.path).put("(G p0)", [])
+        with patch.object(distractorcache, "DISTRACTOR_SET_VERSION", distractorcache.DISTRACTOR_SET_VERSION + 1):
+            self.assertIsNone(DistractorCache(path=self.path).get("(G p0)"))
+
+    def test_least_recently_used_rows_are_evicted(self):
+        with patch.object(distractorcache, "EVICTION_CHECK_INTERVAL", 1):
+            cache = DistractorCache(path=self.path, max_rows=2, front_entries=1)
+            with patch.object(sqlitelru.time, "time", side_effect=[1.0, 2.0, 3.0, 4.0]):
+                cache.put("(F p0)", [])
+                cache.put("(G p0)", [])
+                cache.get("(F p0)")  # from SQLite, bumping its last use past G's
+                cache.put("(X p0)", [])
+        restarted = DistractorCache(path=self.path)
+        self.assertIsNone(restarted.get("(G p0)"))
+        self.assertEqual(restarted.get("(F p0)"), [])
+        self.assertEqual(restarted.get("(X p0)"), [])
+
+    def test_unusable_path_degrades_to_memory(self):
+        blocker = os.path.join(self.dir, "file")
+        open(blocker, "w").close()
+        cache = DistractorCache(path=os.path.join(blocker, "distractor_cache.db"))
+        cache.put("(F p0)", [])
+        self.assertEqual(cache.get("(F p0)"), [])
+        self.assertIsNone(cache.stats()["path"])
+
+
+if __name__ == "__main__":
+    unittest.main()
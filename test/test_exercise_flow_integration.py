@@ -31,8 +31,15 @@ _TMPDIR = tempfile.mkdtemp(prefix="ltltutor_flowtest_")
 _DB_PATH = os.path.join(_TMPDIR, "flowtest.db")
 _PREV_DB_URL = os.environ.get("DATABASE_URL")
 _PREV_SECRET = os.environ.get("SECRET_KEY")
+_PREV_RELATION_CACHE = os.environ.get("RELATION_CACHE_PATH")
+_PREV_DISTRACTOR_CACHE = os.environ.get("DISTRACTOR_CACHE_PATH")
+_PREV_SPOT_POOL = os.environ.get("SPOT_POOL_PROCESSES")
 os.environ["DATABASE_URL"] = f"sqlite:///{_DB_PATH}"
 os.environ["SECRET_KEY"] = "integration-test-secret"
+os.environ["RELATION_CACHE_PATH"] = os.path.join(_TMPDIR, "relation_cache.db")
+os.environ["DISTRACTOR_CACHE_PATH"] = os.path.join(_TMPDIR, "distractor_cache.db")
+# SPOT is mocked in this process; worker processes would not see the mock.
+os.environ["SPOT_POOL_PROCESSES"] = "0"
 
 sys.modules.setdefault("spot", MagicMock())
 sys.modules.setdefault("inflect", MagicMock())
@@ -54,9 +61,26 @@ if _PREV_DB_URL is None:
     os.environ.pop("DATABASE_URL", None)
 else:
     os.environ["DATABASE_URL"] = _PREV_DB_URL
+if _PREV_RELATION_CACHE is None:
+    os.environ.pop("RELATION_CACHE_PATH", None)
+else:
+    os.environ["RELATION_CACHE_PATH"] = _PREV_RELATION_CACHE
+if _PREV_DISTRACTOR_CACHE is None:
+    os.environ.pop("DISTRACTOR_CACHE_PATH", None)
+else:
+    os.environ["DISTRACTOR_CACHE_PATH"] = _PREV_DISTRACTOR_CACHE
+if _PREV_SPOT_POOL is None:
+    os.environ.pop("SPOT_POOL_PROCESSES", None)
+else:
+    os.environ["SPOT_POOL_PROCESSES"] = _PREV_SPOT_POOL
 
 
 def tearDownModule():
+    # Point the relation and distractor caches back at in-process tiers
+    # before the temp directory holding their SQLite files is removed.
+    if APP_AVAILABLE:
+        appmod.spotutils.configure_relation_cache(None)
+        appmod.distractorcache.configure(None)
     shutil.rmtree(_TMPDIR, ignore_errors=True)
 
 
@@ -212,5 +236,103 @@ class TestMalformedPayloadContract(_BaseFlowTest):
         self.assertEqual(_count_responses(), before)
 
 
+class TestStepperEvaluateRoute(_BaseFlowTest):
+    """/stepper/evaluate: JSON stepper views, recomputed incrementally on edits."""
+
+    def _evaluate(self, **payload):
+        return self.client.post("/stepper/evaluate", json=payload)
+
+    def test_evaluate_then_edit_a_state(self):
+        resp = self._evaluate(formula="G (a -> F b)", trace="a & !b; cycle{!a & b}")
+        self.assertEqual(resp.status_code, 200)
+        first = resp.get_json()
+        self.assertEqual(first["steps"], [[1, 1, 1, 1, 0], [1, 1, 0, 1, 1]])
+        self.assertEqual(first["trace_render_data"]["cycle"], [{"label": "\u00aca \u2003 b"}])
+        self.assertIn("formula-tree", first["tree_html"])
+
+        resp = self._evaluate(previous=first["evaluation"], edit={"state": 0, "assignment": "a & b"})
+        self.assertEqual(resp.status_code, 200)
+        second = resp.get_json()
+        self.assertEqual(second["trace"], "a & b; cycle{!a & b}")
+        self.assertEqual(second["formula"], "(G (a -> (F b)))")
+        self.assertEqual(second["steps"][0], [1, 1, 1, 1, 1])
+        self.assertGreater(second["reused"], 0)
+
+    def test_unknown_token_falls_back_to_a_full_evaluation(self):
+        # Another worker's token, or one that expired: the request still
+        # carries everything needed to start over.
+        resp = self._evaluate(formula="G (a -> F b)", trace="a & !b; cycle{!a & b}",
+                              previous="expired", edit={"state": 0, "assignment": "a & b"})
+        self.assertEqual(resp.status_code, 200)
+        body = resp.get_json()
+        self.assertEqual(body["trace"], "a & b; cycle{!a & b}")
+        self.assertEqual(body["steps"][0], [1, 1, 1, 1, 1])
+        self.assertEqual(body["reused"], 0)
+
+    def test_errors(self):
+        self.assertEqual(self._evaluate(formula="G a").status_code, 400)
+        self.assertEqual(self._evaluate(previous="expired").status_code, 400)
+        self.assertEqual(self._evaluate(previous="expired", edit={"state": 0, "assignment": "a"}).status_code, 400)
+        resp = self._evaluate(formula="G a", trace="cycle{a}", edit={"state": 4, "assignment": "a"})
+        self.assertEqual(resp.status_code, 400)
+        self.assertIn("error", resp.get_json())
+
+
+class TestStepperViewCacheRoute(_BaseFlowTest):
+    """/stepper: a repeat submission is served from the view cache."""
+
+    def test_repeat_submission_hits_the_cache(self):
+        self._login_anonymous()
+        appmod.stepper._stepperViews.clear()
+        before = appmod.stepper.stepperViewCacheStats()
+        form = {"formula": "G (a -> F b)", "trace": "a & !b; cycle{!a & b}"}
+        first = self.client.post("/stepper", data=form)
+        second = self.client.post("/stepper", data={"formula": "G(a -> (F b))", "trace": "!b & a; cycle{b & !a}"})
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(second.status_code, 200)
+        self.assertIn(b"formula-tree", second.data)
+        self.assertIn("<pre>\u00acb \u2003 a</pre>".encode(), second.data)
+        stats = appmod.stepper.stepperViewCacheStats()
+        self.assertEqual((stats["hits"] - before["hits"], stats["misses"] - before["misses"]), (1, 1))
+
+    def test_errors_are_not_cached(self):
+        self._login_anonymous()
+        appmod.stepper._stepperViews.clear()
+        resp = self.client.post("/stepper", data={"formula": "G a", "trace": ""})
+        self.assertIn(b"Invalid trace", resp.data)
+        self.assertEqual(appmod.stepper.stepperViewCacheStats()["entries"], 0)
+
+
+class TestBatchTraceEvaluationRoute(_BaseFlowTest):
+    """/instructor/evaluate-traces streams one NDJSON line per formula/trace pair."""
+
+    def _login_instructor(self):
+        resp = self.client.post("/signup", data={"username": "batch-instructor", "password": "pw",
+                                                 "confirm_password": "pw"})
+        if resp.status_code != 302:
+            self.client.post("/login", data={"user_type": "course-instructor",
+                                             "username": "batch-instructor", "password": "pw"})
+
+    def test_streams_ndjson(self):
+        self._login_instructor()
+        resp = self.client.post("/instructor/evaluate-traces",
+                                json={"formula": "G a", "traces": ["cycle{a}", "a; cycle{!a}"]})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.mimetype, "application/x-ndjson")
+        lines = [json.loads(line) for line in resp.get_data(as_text=True).splitlines()]
+        self.assertEqual([(line["trace"], line["positions"]) for line in lines],
+                         [("cycle{a}", [1]), ("a; cycle{!a}", [0, 0])])
+
+    def test_rejects_bad_batches(self):
+        self._login_instructor()
+        resp = self.client.post("/instructor/evaluate-traces", json={"formula": "G a"})
+        self.assertEqual(resp.status_code, 400)
+
+    def test_students_are_forbidden(self):
+        self._login_anonymous()
+        resp = self.client.post("/instructor/evaluate-traces", json={"formula": "G a", "trace": "cycle{a}"})
+        self.assertEqual(resp.status_code, 403)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -10,6 +10,7 @@ and generates counterexample traces that distinguish them. It was previously at
 import os
 import sys
 import unittest
+from unittest.mock import patch
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
 
@@ -65,6 +66,19 @@ class TestRelationPredicates(unittest.TestCase):
         self.assertFalse(fg.correctAnswerSubsumes())
 
 
+@unittest.skipUnless(SPOT_AVAILABLE, "real SPOT library not available")
+class TestSingleRelationCall(unittest.TestCase):
+    def test_feedback_computes_the_relation_once(self):
+        fg = FeedbackGenerator(correct="a", student="F a")
+        with patch.object(spotutils, "relate", wraps=spotutils.relate) as relate:
+            fg.correctAnswerSubsumes()
+            fg.correctAnswerContained()
+            fg.disjoint()
+            fg.equivalent()
+            fg.getCEWords()
+        self.assertEqual(relate.call_count, 1)
+
+
 @unittest.skipUnless(SPOT_AVAILABLE, "real SPOT library not available")
 class TestCounterexampleWords(unittest.TestCase):
     def test_equivalent_formulas_have_no_counterexamples(self):
@@ -98,6 +112,14 @@ class TestCounterexampleWords(unittest.TestCase):
                     f"{correct!r} (sat={sat_correct}) from {student!r} (sat={sat_student})",
                 )
 
+    def test_counterexamples_respect_the_count_cap_and_come_shortest_first(self):
+        fg = FeedbackGenerator(correct="F a", student="a")
+        words = fg.getCEWords(max_words=2)
+        self.assertLessEqual(len(words), 2)
+        # Witnesses are ordered by prefix length first.
+        prefix_lengths = [w.split("cycle")[0].count(";") for w in words]
+        self.assertEqual(prefix_lengths, sorted(prefix_lengths))
+
     def test_disjoint_counterexamples_satisfy_student_not_correct(self):
         # For disjoint answers the generated words are accepted by the student's
         # (wrong) formula, illustrating traces the student wrongly admits.
@@ -0,0 +1,119 @@
+"""Tests for fingerprint.py -- semantic fingerprints over a fixed trace bank,
+and their use as a pre-filter in LTLNode.equiv.
+
+spot is mocked; the SPOT fallback is patched where its calls are counted.
+
+Run with:
+    python -m pytest test/test_fingerprint.py -v
+"""
+
+import os
+import sys
+import unittest
+from unittest.mock import MagicMock, patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+sys.modules.setdefault("spot", MagicMock())
+
+import ltlnode
+import fingerprint
+from ltlnode import parse_ltl_string, LTLNode
+from traceeval import evaluate
+
+try:
+    from hypothesis import given, settings, strategies as st
+    HAS_HYPOTHESIS = True
+except ImportError:  # pragma: no cover
+    HAS_HYPOTHESIS = False
+
+
+def fp(formula, alphabet=("a", "b")):
+    return fingerprint.fingerprint(parse_ltl_string(formula), alphabet)
+
+
+class TestFingerprint(unittest.TestCase):
+
+    def test_equivalent_formulas_share_a_fingerprint(self):
+        for f, g in [("G a", "!(F !a)"), ("a -> b", "!a | b"),
+                     ("F a", "true U a"), ("G G a", "G a"),
+                     ("a U b", "b | (a & X (a U b))")]:
+            self.assertEqual(fp(f), fp(g), f"{f} vs {g}")
+
+    def test_common_distractor_pairs_are_separated(self):
+        for f, g in [("G a", "F a"), ("a U b", "F b"), ("G (a -> F b)", "G (a -> b)"),
+                     ("X a", "a"), ("F G a", "G F a"), ("a & b", "a | b")]:
+            self.assertNotEqual(fp(f), fp(g), f"{f} vs {g}")
+
+    def test_bank_is_deterministic_and_alphabet_specific(self):
+        bank = fingerprint.trace_bank(("p0", "p1"))
+        fingerprint._banks.clear()
+        self.assertEqual(fingerprint.trace_bank(("p0", "p1")), bank)
+        for lasso in bank:
+            for state in lasso.states:
+                self.assertLessEqual(state, {"p0", "p1"})
+
+    def test_separating_trace_separates(self):
+        f, g = parse_ltl_string("G a"), parse_ltl_string("F a")
+        lasso = fingerprint.separating_trace(f, g)
+        self.assertIsNotNone(lasso)
+        self.assertNotEqual(evaluate(f, lasso), evaluate(g, lasso))
+        self.assertIsNone(fingerprint.separating_trace(f, parse_ltl_string("G G a")))
+
+
+class TestEquivPrefilter(unittest.TestCase):
+
+    def test_separated_pairs_never_reach_spot(self):
+        with patch.object(ltlnode, "areEquivalent") as oracle:
+            self.assertFalse(LTLNode.equiv(parse_ltl_string("G a"), parse_ltl_string("F a")))
+        oracle.assert_not_called()
+
+    def test_unseparated_pairs_fall_through_to_spot(self):
+        with patch.object(ltlnode, "areEquivalent", return_value=False) as oracle:
+            self.assertFalse(LTLNode.equiv(parse_ltl_string("G a"), parse_ltl_string("G G a")))
+        oracle.assert_called_once()
+
+
+def _ltl_formula_strategy():
+    atoms = st.sampled_from(["a", "b", "c"])
+
+    def extend(children):
+        unary = st.builds(
+            lambda op, f: f"({op} {f})", st.sampled_from(["G", "F", "X", "!"]), children
+        )
+        binary = st.builds(
+            lambda op, l, r: f"({l} {op} {r})",
+            st.sampled_from(["&", "|", "U", "->", "<->"]),
+            children,
+            children,
+        )
+        return unary | binary
+
+    return st.recursive(atoms, extend, max_leaves=6)
+
+
+@unittest.skipUnless(HAS_HYPOTHESIS, "hypothesis not installed")
+class TestFingerprintProperties(unittest.TestCase):
+    ALPHABET = ("a", "b", "c")
+
+    @settings(max_examples=200, deadline=None)
+    @given(_ltl_formula_strategy())
+    def test_rewriting_by_ltl_identities_preserves_the_fingerprint(self, formula):
+        f = f"({formula})"
+        self.assertEqual(fp(f"F {f}", self.ALPHABET), fp(f"true U {f}", self.ALPHABET))
+        self.assertEqual(fp(f"G {f}", self.ALPHABET), fp(f"! (F (! {f}))", self.ALPHABET))
+        self.assertEqual(fp(f, self.ALPHABET), fp(f"! (! {f})", self.ALPHABET))
+        self.assertEqual(fp(f"X (! {f})", self.ALPHABET), fp(f"! (X {f})", self.ALPHABET))
+
+    @settings(max_examples=200, deadline=None)
+    @given(_ltl_formula_strategy())
+    def test_fingerprint_does_not_depend_on_literal_names(self, formula):
+        node = parse_ltl_string(formula)
+        canonical, renaming = ltlnode.canonicalize(node)
+        alphabet = sorted(renaming)
+        canonical_alphabet = [renaming[a] for a in alphabet]
+        self.assertEqual(fingerprint.fingerprint(node, alphabet),
+                         fingerprint.fingerprint(canonical, canonical_alphabet))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+"""Tests for the pre-generated random formula pool.
+
+The pool's formula source is a fake generator, so these tests run
+without SPOT.
+
+Run with:
+    python -m pytest test/test_formulapool.py -v
+"""
+
+import itertools
+import os
+import sys
+import time
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+from formulapool import FormulaPool, rename_pool_atoms
+
+
+PRIORITIES = {"ap": 3, "U": 2, "true": 0}
+
+
+class _Source:
+    """Yields 'p0 U X^i p1'-style formulas."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, atoms, tree_size, priorities, seed):
+        self.calls.append((tuple(atoms), tree_size, priorities))
+        return self._formulas(atoms)
+
+    @staticmethod
+    def _formulas(atoms):
+        for i in itertools.count():
+            yield f"{atoms[0]} U {'X' * i}{atoms[-1]}"
+
+
+class TestHelpers(unittest.TestCase):
+
+    def test_rename_pool_atoms_is_simultaneous(self):
+        self.assertEqual(rename_pool_atoms("p0 U (p1 & Gp0)", ["p1", "p0"]), "p1 U (p0 & Gp1)")
+        self.assertEqual(rename_pool_atoms("F p2", ["a", "b", "c"]), "F c")
+
+class TestFormulaPool(unittest.TestCase):
+
+    def setUp(self):
+        self.source = _Source()
+        self.pool = FormulaPool(self.source, buffer_size=8, low_water=4, background=False)
+
+    def test_take_renames(self):
+        formulas = self.pool.take(["a", "b"], 5, PRIORITIES, 3)
+        self.assertEqual(formulas, ["a U b", "a U Xb", "a U XXb"])
+
+    def test_one_generator_per_profile(self):
+        self.pool.take(["a", "b"], 5, PRIORITIES, 2)
+        self.pool.take(["q", "s"], 5, dict(reversed(list(PRIORITIES.items()))), 2)
+        self.assertEqual(len(self.source.calls), 1)
+        self.assertEqual(self.source.calls[0][:2], (("p0", "p1"), 5))
+
+        self.pool.take(["a", "b"], 6, PRIORITIES, 1)
+        self.pool.take(["a", "b", "c"], 5, PRIORITIES, 1)
+        self.pool.take(["a", "b"], 5, {"ap": 1}, 1)
+        self.assertEqual(len(self.source.calls), 4)
+
+    def test_generator_continues_across_calls(self):
+        first = self.pool.take(["a", "b"], 5, PRIORITIES, 2)
+        second = self.pool.take(["a", "b"], 5, PRIORITIES, 2)
+        self.assertEqual(first + second, ["a U b", "a U Xb", "a U XXb", "a U XXXb"])
+
+    def test_take_serves_from_the_buffer(self):
+        key = FormulaPool._key(2, 5, PRIORITIES)
+        self.pool.fill(key)
+        self.assertEqual(self.pool.stats()["refilled"], 8)
+        self.pool.take(["a", "b"], 5, PRIORITIES, 3)
+        self.assertEqual(self.pool.stats()["drawn_inline"], 0)
+        self.assertEqual(self.pool.stats()["served"], 3)
+
+    def test_exhausted_source(self):
+        pool = FormulaPool(lambda *args: iter(["p0", "Fp0"]), background=False)
+        self.assertEqual(pool.take(["a"], 3, PRIORITIES, 3), ["a", "Fa"])
+
+    def test_background_refill(self):
+        pool = FormulaPool(self.source, buffer_size=8, low_water=4)
+        pool.take(["a", "b"], 5, PRIORITIES, 1)
+        deadline = time.monotonic() + 5
+        while pool.stats()["refilled"] < 8 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(pool.stats()["refilled"], 8)
+        self.assertEqual(pool.take(["a", "b"], 5, PRIORITIES, 2), ["a U Xb", "a U XXb"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+"""Tests for the constrained random formula sampler.
+
+Run with:
+    python -m pytest test/test_formulasampler.py -v
+"""
+
+import os
+import sys
+import unittest
+from unittest.mock import MagicMock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+sys.modules.setdefault("spot", MagicMock())
+
+from ltlnode import (parse_ltl_string, LiteralNode, UnaryOperatorNode, BinaryOperatorNode,
+                     NotNode, FinallyNode, GloballyNode, UntilNode)
+import formulasampler
+from formulasampler import FormulaSampler, takes_both_values
+
+
+PRIORITIES = {"ap": 5, "F": 7, "G": 7, "X": 7, "U": 7, "and": 5, "or": 5,
+              "equiv": 5, "implies": 5, "not": 5, "false": 1, "true": 1,
+              "W": 0, "M": 0, "xor": 0, "R": 0}
+ATOMS = ["p", "q", "r"]
+
+
+def subformulas(node):
+    yield node
+    if isinstance(node, UnaryOperatorNode):
+        yield from subformulas(node.operand)
+    elif isinstance(node, BinaryOperatorNode):
+        yield from subformulas(node.left)
+        yield from subformulas(node.right)
+
+
+def size(node):
+    return sum(1 for _ in subformulas(node))
+
+
+class TestTakesBothValues(unittest.TestCase):
+
+    def test_constants_do_not(self):
+        for text in ["p | !p", "p & !p", "G F p | F G !p", "p U (p -> p)"]:
+            with self.subTest(text):
+                self.assertFalse(takes_both_values(parse_ltl_string(text), ["p"]))
+
+    def test_contingent_formulas_do(self):
+        for text in ["p", "G p", "p U q", "X (p & q)"]:
+            with self.subTest(text):
+                self.assertTrue(takes_both_values(parse_ltl_string(text), ["p", "q"]))
+
+
+class TestFormulaSampler(unittest.TestCase):
+
+    def setUp(self):
+        self.sampler = FormulaSampler(ATOMS, PRIORITIES, seed=7)
+        self.samples = [self.sampler.sample(n) for n in range(1, 12) for _ in range(20)]
+
+    def test_exact_size(self):
+        sizes = [size(node) for node in self.samples]
+        self.assertEqual(sizes, [n for n in range(1, 12) for _ in range(20)])
+
+    def test_only_atoms_as_leaves(self):
+        for node in self.samples:
+            for sub in subformulas(node):
+                if isinstance(sub, LiteralNode):
+                    self.assertIn(sub.value, ATOMS)
+
+    def test_no_constant_subformula(self):
+        for node in self.samples:
+            for sub in subformulas(node):
+                self.assertTrue(takes_both_values(sub, sorted(ATOMS)), str(sub))
+
+    def test_no_identical_operands_or_stacked_idempotent_operators(self):
+        for node in self.samples:
+            for sub in subformulas(node):
+                if isinstance(sub, BinaryOperatorNode):
+                    self.assertNotEqual(str(sub.left), str(sub.right))
+                if isinstance(sub, (NotNode, FinallyNode, GloballyNode)):
+                    self.assertIsNot(type(sub.operand), type(sub))
+
+    def test_output_parses_back(self):
+        for node in self.samples:
+            self.assertEqual(str(parse_ltl_string(str(node))), str(node))
+
+    def test_zero_priority_operators_are_not_used(self):
+        sampler = FormulaSampler(ATOMS, {"ap": 1, "U": 1, "not": 1, "F": 0}, seed=1)
+        for _ in range(50):
+            for sub in subformulas(sampler.sample(7)):
+                self.assertIsInstance(sub, (LiteralNode, UntilNode, NotNode))
+
+    def test_seed_makes_it_deterministic(self):
+        again = FormulaSampler(ATOMS, PRIORITIES, seed=7)
+        self.assertEqual([str(again.sample(n)) for n in range(1, 12) for _ in range(20)],
+                         [str(n) for n in self.samples])
+
+    def test_reports_rejection_rate(self):
+        stats = self.sampler.stats()
+        self.assertEqual(stats["sampled"], len(self.samples))
+        self.assertGreater(stats["built"], 0)
+        self.assertLessEqual(stats["rejected"], stats["built"])
+        self.assertAlmostEqual(stats["rejection_rate"], stats["rejected"] / stats["built"])
+        self.assertGreaterEqual(formulasampler.sampler_stats()["sampled"], stats["sampled"])
+
+    def test_impossible_profile_ends_the_stream(self):
+        # One atom and only binary operators: every operator node has identical operands.
+        sampler = FormulaSampler(["p"], {"ap": 1, "and": 1}, seed=3)
+        self.assertIsNone(sampler.sample(3))
+        self.assertEqual(list(sampler.iter_formulas(3)), [])
+
+    def test_needs_an_atom(self):
+        with self.assertRaises(ValueError):
+            FormulaSampler([], PRIORITIES)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+"""Tests for hash-consed LTLNodes: one object per distinct subformula.
+
+Run with:
+    python -m pytest test/test_interned_nodes.py -v
+"""
+
+import copy
+import gc
+import os
+import pickle
+import sys
+import unittest
+from unittest.mock import MagicMock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+sys.modules.setdefault("spot", MagicMock())
+
+import ltlnode
+from ltlnode import (parse_ltl_string, rename_literals, LiteralNode, NotNode, AndNode,
+                     OrNode, UntilNode, GloballyNode)
+import traceeval
+
+
+class TestInterning(unittest.TestCase):
+
+    def test_equal_formulas_are_one_object(self):
+        self.assertIs(AndNode(LiteralNode("a"), NotNode(LiteralNode("b"))),
+                      parse_ltl_string("a & !b"))
+        self.assertIs(parse_ltl_string("G (a U b)"), parse_ltl_string("G((a)U b)"))
+        self.assertIsNot(AndNode(LiteralNode("a"), LiteralNode("b")),
+                         OrNode(LiteralNode("a"), LiteralNode("b")))
+
+    def test_repeated_subformulas_are_shared(self):
+        node = parse_ltl_string("(a U b) & G (a U b)")
+        self.assertIs(node.left, node.right.operand)
+        self.assertIs(node.left, UntilNode(LiteralNode("a"), LiteralNode("b")))
+
+    def test_equality_and_hash(self):
+        a, b = parse_ltl_string("F (a & b)"), parse_ltl_string("F(a & b)")
+        self.assertEqual(a, b)
+        self.assertEqual(hash(a), hash(b))
+        self.assertNotEqual(a, parse_ltl_string("F (b & a)"))
+        self.assertEqual(len({a, b, parse_ltl_string("F (b & a)")}), 2)
+
+    def test_unreferenced_nodes_are_released(self):
+        GloballyNode(LiteralNode("released_literal"))
+        gc.collect()
+        self.assertFalse(any(getattr(n, "value", None) == "released_literal"
+                             for n in list(ltlnode._interned.values())))
+
+
+class TestCachedAttributes(unittest.TestCase):
+
+    def test_string_size_and_literals(self):
+        node = parse_ltl_string("G (a -> F b) | (true U c)")
+        self.assertEqual(str(node), "((G (a -> (F b))) | (true U c))")
+        self.assertEqual(node.size, 9)
+        self.assertEqual(node.literals, frozenset({"a", "b", "c"}))
+        self.assertEqual(LiteralNode("1").literals, frozenset())
+
+    def test_size_counts_shared_subtrees_each_time(self):
+        self.assertEqual(parse_ltl_string("X a & X a").size, 5)
+
+    def test_nodes_have_no_instance_dict(self):
+        node = parse_ltl_string("a U !b")
+        for n in (node, node.left, node.right):
+            self.assertFalse(hasattr(n, "__dict__"), type(n).__name__)
+        with self.assertRaises(AttributeError):
+            node.annotation = "x"
+
+
+class TestCopyingAndPickling(unittest.TestCase):
+
+    def test_copies_are_the_node_itself(self):
+        node = parse_ltl_string("G (a -> X b)")
+        self.assertIs(copy.copy(node), node)
+        self.assertIs(copy.deepcopy(node), node)
+        self.assertIs(copy.deepcopy([node, node.operand])[1], node.operand)
+
+    def test_pickle_round_trip_reinterns(self):
+        node = parse_ltl_string("(a U b) <-> !(F c)")
+        self.assertIs(pickle.loads(pickle.dumps(node)), node)
+
+
+class TestSharingConsumers(unittest.TestCase):
+
+    def test_rename_shares_untouched_subtrees(self):
+        node = parse_ltl_string("(a U b) & G c")
+        renamed = rename_literals(node, {"c": "d"})
+        self.assertIs(renamed.left, node.left)
+        self.assertEqual(str(renamed), "((a U b) & (G d))")
+        self.assertIs(rename_literals(node, {"z": "y"}), node)
+
+    def test_shared_subformula_evaluated_once(self):
+        node = parse_ltl_string("(a U b) | X (a U b)")
+        lasso = traceeval.trace_to_lasso("a & !b; cycle{!a & b}", ["a", "b"])
+        values = traceeval.evaluate_subformulas(node, lasso)
+        self.assertEqual(len(values), 5)
+        self.assertEqual(values[id(node)], traceeval.evaluate_positions(node, lasso))
+
+
+if __name__ == "__main__":
+    unittest.main()
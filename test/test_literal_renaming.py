@@ -0,0 +1,110 @@
+"""Tests for alpha-renaming: ltlnode.canonicalize / canonicalize_jointly /
+rename_literals, and spotutils.rename_atoms for mapping results computed on a
+canonical form back to the original literals.
+
+Run with:
+    python -m pytest test/test_literal_renaming.py -v
+"""
+
+import unittest
+import sys
+import os
+from unittest.mock import MagicMock, patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+sys.modules['spot'] = MagicMock()
+
+import ltlnode
+import spotutils
+import exercisebuilder as eb
+from ltlnode import (parse_ltl_string, canonicalize, canonicalize_jointly,
+                     rename_literals, literals_in_order, invert_renaming, LTLNode)
+
+
+class TestCanonicalize(unittest.TestCase):
+
+    def test_renamings_share_a_canonical_form(self):
+        a, _ = canonicalize(parse_ltl_string("a U b"))
+        q, _ = canonicalize(parse_ltl_string("q U s"))
+        swapped, _ = canonicalize(parse_ltl_string("b U a"))
+        self.assertEqual(str(a), "(p0 U p1)")
+        self.assertEqual(str(a), str(q))
+        self.assertEqual(str(a), str(swapped))
+
+    def test_literals_numbered_by_first_preorder_occurrence(self):
+        node = parse_ltl_string("G (z -> (F (k & z)))")
+        self.assertEqual(literals_in_order(node), ["z", "k"])
+        canonical, renaming = canonicalize(node)
+        self.assertEqual(renaming, {"z": "p0", "k": "p1"})
+        self.assertEqual(str(canonical), "(G (p0 -> (F (p1 & p0))))")
+
+    def test_boolean_constants_are_not_renamed(self):
+        canonical, renaming = canonicalize(parse_ltl_string("a U true"))
+        self.assertEqual(str(canonical), "(p0 U true)")
+        self.assertNotIn("true", renaming)
+
+    def test_joint_canonicalization_uses_one_renaming(self):
+        (f, g), renaming = canonicalize_jointly(
+            [parse_ltl_string("G q"), parse_ltl_string("q U s")])
+        self.assertEqual(str(f), "(G p0)")
+        self.assertEqual(str(g), "(p0 U p1)")
+        self.assertEqual(renaming, {"q": "p0", "s": "p1"})
+
+    def test_input_is_not_modified(self):
+        node = parse_ltl_string("(a & b) U c")
+        canonicalize(node)
+        self.assertEqual(str(node), "((a & b) U c)")
+
+    def test_inverse_renaming_round_trips(self):
+        node = parse_ltl_string("X (h | !n)")
+        canonical, renaming = canonicalize(node)
+        restored = rename_literals(canonical, invert_renaming(renaming))
+        self.assertEqual(str(restored), str(node))
+        self.assertIs(type(restored), type(node))
+
+    def test_equiv_compares_canonical_forms(self):
+        with patch.object(ltlnode, "areEquivalent", return_value=True) as oracle:
+            LTLNode.equiv(parse_ltl_string("q U s"),
+                          parse_ltl_string("s | (q & X (q U s))"))
+        oracle.assert_called_once()
+        f, g = oracle.call_args[0]
+        self.assertEqual((str(f), str(g)),
+                         ("(p0 U p1)", "(p1 | (p0 & (X (p0 U p1))))"))
+
+
+class TestRenameAtoms(unittest.TestCase):
+
+    def test_renames_spot_words(self):
+        renaming = {"p0": "q", "p1": "s"}
+        self.assertEqual(spotutils.rename_atoms("p0 & !p1; cycle{!p0 & p1}", renaming),
+                         "q & !s; cycle{!q & s}")
+
+    def test_leaves_keywords_and_constants_alone(self):
+        self.assertEqual(spotutils.rename_atoms("cycle{1}", {"p0": "a"}), "cycle{1}")
+
+    def test_substitution_is_simultaneous(self):
+        self.assertEqual(spotutils.rename_atoms("a & !b", {"a": "b", "b": "a"}), "b & !a")
+
+
+class TestGenerateTracesUpToRenaming(unittest.TestCase):
+
+    def test_traces_are_generated_on_canonical_forms_and_renamed_back(self):
+        builder = eb.ExerciseBuilder([])
+        with patch.object(eb.spotutils, "generate_traces",
+                          return_value=["p0 & !p1; cycle{p1}"]) as gen:
+            traces = builder.generateTraces("q U s", "G q")
+        self.assertEqual(gen.call_args.kwargs["f_accepted"], "(p0 U p1)")
+        self.assertEqual(gen.call_args.kwargs["f_rejected"], "(G p0)")
+        self.assertEqual(traces, ["q & !s; cycle{s}"])
+
+    def test_streamed_traces_are_renamed_back(self):
+        builder = eb.ExerciseBuilder([])
+        with patch.object(eb.spotutils, "iter_accepted_traces",
+                          return_value=iter(["p0; cycle{!p0}"])) as gen:
+            traces = list(builder.iterTraces("G h"))
+        gen.assert_called_once_with("(G p0)")
+        self.assertEqual(traces, ["h; cycle{!h}"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,134 @@
+"""Tests for lrucache.LRUCache -- the bounded cache behind the SPOT translation
+cache (and other memoized SPOT work).
+
+Pure Python; no SPOT needed.
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+from lrucache import LRUCache
+
+
+class TestLRUCache(unittest.TestCase):
+    def test_get_counts_hits_and_misses(self):
+        cache = LRUCache(max_entries=4)
+        self.assertIsNone(cache.get("a"))
+        cache.put("a", 1)
+        self.assertEqual(cache.get("a"), 1)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_least_recently_used_entry_is_evicted_first(self):
+        cache = LRUCache(max_entries=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")          # b is now least recently used
+        cache.put("c", 3)
+        self.assertIn("a", cache)
+        self.assertNotIn("b", cache)
+        self.assertEqual(cache.evictions, 1)
+
+    def test_weight_bound_evicts_until_under_budget(self):
+        cache = LRUCache(max_entries=100, max_weight=10, weigh=len)
+        cache.put("a", "xxxx")
+        cache.put("b", "xxxx")
+        cache.put("c", "xxxx")  # 12 > 10: evicts "a"
+        self.assertEqual(len(cache), 2)
+        self.assertLessEqual(cache.total_weight, 10)
+        self.assertNotIn("a", cache)
+
+    def test_value_heavier_than_budget_is_not_cached(self):
+        cache = LRUCache(max_entries=100, max_weight=3, weigh=len)
+        cache.put("a", "x")
+        cache.put("big", "xxxxx")
+        self.assertNotIn("big", cache)
+        self.assertIn("a", cache)
+
+    def test_replacing_a_key_updates_its_weight(self):
+        cache = LRUCache(max_entries=10, max_weight=100, weigh=len)
+        cache.put("a", "xxxx")
+        cache.put("a", "x")
+        self.assertEqual(cache.total_weight, 1)
+        self.assertEqual(len(cache), 1)
+
+    def test_get_or_compute_computes_once(self):
+        cache = LRUCache(max_entries=4)
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return "value"
+
+        self.assertEqual(cache.get_or_compute("k", compute), "value")
+        self.assertEqual(cache.get_or_compute("k", compute), "value")
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["misses"], 1)
+
+    def test_clear_keeps_counters(self):
+        cache = LRUCache(max_entries=4)
+        cache.put("a", 1)
+        cache.get("a")
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.total_weight, 0)
+        self.assertEqual(cache.hits, 1)
+
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTimeToLive(unittest.TestCase):
+    def setUp(self):
+        self.clock = _Clock()
+        self.cache = LRUCache(max_entries=2, ttl=10, clock=self.clock)
+
+    def test_entries_expire(self):
+        self.cache.put("a", 1)
+        self.clock.now = 9.5
+        self.assertEqual(self.cache.get("a"), 1)
+        self.clock.now = 10
+        self.assertNotIn("a", self.cache)
+        self.assertIsNone(self.cache.get("a"))
+        self.assertEqual(self.cache.expirations, 1)
+        self.assertEqual(len(self.cache), 0)
+
+    def test_reading_does_not_extend_the_lifetime(self):
+        self.cache.put("a", 1)
+        self.clock.now = 5
+        self.cache.get("a")
+        self.clock.now = 11
+        self.assertIsNone(self.cache.get("a"))
+
+    def test_get_or_compute_recomputes_after_expiry(self):
+        calls = []
+        compute = lambda: calls.append(1) or len(calls)
+        self.assertEqual(self.cache.get_or_compute("a", compute), 1)
+        self.assertEqual(self.cache.get_or_compute("a", compute), 1)
+        self.clock.now = 20
+        self.assertEqual(self.cache.get_or_compute("a", compute), 2)
+
+    def test_expired_entries_make_room_before_live_ones(self):
+        self.cache.put("old", 1)
+        self.clock.now = 8
+        self.cache.put("new", 2)
+        self.cache.get("old")       # "new" is now least recently used ...
+        self.clock.now = 12         # ... but "old" has expired
+        self.cache.put("newer", 3)
+        self.assertIn("new", self.cache)
+        self.assertIn("newer", self.cache)
+        self.assertEqual(self.cache.stats()["expirations"], 1)
+        self.assertEqual(self.cache.stats()["evictions"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
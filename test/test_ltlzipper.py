@@ -0,0 +1,123 @@
+"""Tests for ltlzipper and the path-copying rewrites built on it.
+
+Run with:
+    python -m pytest test/test_ltlzipper.py -v
+"""
+
+import os
+import random
+import sys
+import unittest
+from unittest.mock import MagicMock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+sys.modules.setdefault("spot", MagicMock())
+
+from ltlnode import parse_ltl_string, LiteralNode, AndNode, GloballyNode, FinallyNode
+import ltlzipper
+import codebook
+from codebook import MisconceptionCode, MutationResult
+import syntacticmutator
+
+
+def _chain(depth):
+    """G (p0 & G (p1 & ... G p_depth)): a deep formula with a G at every level."""
+    node = GloballyNode(LiteralNode(f"p{depth}"))
+    for i in reversed(range(depth)):
+        node = GloballyNode(AndNode(LiteralNode(f"p{i}"), node))
+    return node
+
+
+class TestLocations(unittest.TestCase):
+
+    def test_pre_order_with_paths(self):
+        node = parse_ltl_string("(a U b) & X a")
+        found = [(str(loc.node), loc.path()) for loc in ltlzipper.locations(node)]
+        self.assertEqual(found, [
+            ("((a U b) & (X a))", []),
+            ("(a U b)", ["left"]), ("a", ["left", "left"]), ("b", ["left", "right"]),
+            ("(X a)", ["right"]), ("a", ["right", "operand"]),
+        ])
+
+    def test_replace_rebuilds_only_the_spine(self):
+        node = parse_ltl_string("(a U b) & G (c | d)")
+        location = ltlzipper.location_at(node, ["right", "operand", "left"])
+        self.assertEqual(str(location.node), "c")
+        replaced = location.replace(LiteralNode("e"))
+        self.assertEqual(str(replaced), "((a U b) & (G (e | d)))")
+        self.assertIs(replaced.left, node.left)
+        self.assertIs(replaced.right.operand.right, node.right.operand.right)
+        self.assertEqual(str(node), "((a U b) & (G (c | d)))")
+
+    def test_replace_one_occurrence_of_a_repeated_subformula(self):
+        node = parse_ltl_string("X a & X a")
+        right = ltlzipper.location_at(node, ["right"])
+        self.assertEqual(str(right.replace(FinallyNode(LiteralNode("a")))), "((X a) & (F a))")
+
+    def test_invalid_paths(self):
+        node = parse_ltl_string("G a")
+        for path in (["left"], ["operand", "operand"]):
+            with self.subTest(path):
+                with self.assertRaises(ValueError):
+                    ltlzipper.location_at(node, path)
+
+
+class TestCodebookSites(unittest.TestCase):
+
+    def test_probing_calls_the_rewrite_once_per_node(self):
+        node = _chain(40)
+        calls = []
+
+        def implicit_g(n):
+            calls.append(n)
+            return codebook.applyImplicitG(n)
+
+        sites = codebook.applicableMutationSites(node, implicit_g)
+        self.assertEqual(len(calls), node.size)
+        self.assertEqual(len(sites), 41)
+        self.assertEqual(codebook.collectAllMutationLocations(node, codebook.applyImplicitG)[:2],
+                         [[], ["operand", "right"]])
+
+    def test_apply_at_path(self):
+        node = parse_ltl_string("a & G (b U c)")
+        res = codebook.applyMutationAtPath(node, codebook.applyImplicitG, ["right"])
+        self.assertEqual(res.misconception, MisconceptionCode.ImplicitG)
+        self.assertEqual(str(res.node), "(a & (b U c))")
+        self.assertIs(res.node.left, node.left)
+        with self.assertRaises(ValueError):
+            codebook.applyMutationAtPath(node, codebook.applyImplicitG, ["operand"])
+
+    def test_random_site_result_is_the_whole_formula(self):
+        random.seed(3)
+        node = parse_ltl_string("G a & F (G b)")
+        for _ in range(20):
+            res = codebook.applyTilFirstRandom(node, codebook.applyImplicitG)
+            self.assertIn(str(res.node), {"(a & (F (G b)))", "((G a) & (F b))"})
+
+    def test_no_site_returns_the_formula_itself(self):
+        node = parse_ltl_string("a U b")
+        res = codebook.applyTilFirstRandom(node, codebook.applyImplicitG)
+        self.assertIs(res.node, node)
+        self.assertIsNone(res.misconception)
+
+    def test_deep_formulas_keep_most_of_the_tree(self):
+        node = _chain(200)
+        res = codebook.applyMisconception(node, MisconceptionCode.ImplicitG)
+        self.assertEqual(res.node.size, node.size - 1)
+
+
+class TestRandomSyntacticMutation(unittest.TestCase):
+
+    def test_shares_everything_off_the_path(self):
+        random.seed(11)
+        node = parse_ltl_string("(a U b) & (X c | G d)")
+        subtrees = {id(loc.node) for loc in ltlzipper.locations(node)}
+        for _ in range(30):
+            mutated = syntacticmutator.applyRandomMutation(node)
+            # Apart from the rebuilt path, every subtree is one of the original's.
+            fresh = [loc for loc in ltlzipper.locations(mutated) if id(loc.node) not in subtrees]
+            self.assertLessEqual(len(fresh), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
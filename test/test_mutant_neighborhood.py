@@ -0,0 +1,122 @@
+"""Tests for exhaustive mutant enumeration and its semantic classes.
+
+SPOT is mocked; semantic_classes only consults its equivalence check for
+formulas with equal fingerprints, so these tests pass one that trusts the
+fingerprint (and records what it was asked).
+
+Run with:
+    python -m pytest test/test_mutant_neighborhood.py -v
+"""
+
+import os
+import random
+import sys
+import unittest
+from unittest.mock import MagicMock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+sys.modules.setdefault("spot", MagicMock())
+
+from ltlnode import parse_ltl_string
+import codebook
+from codebook import MisconceptionCode
+from mutantneighborhood import enumerate_mutants, semantic_classes, mutant_neighborhood
+
+
+FORMULAS = ["G (a -> F b)", "a U (b & F c)", "X X (a & b)", "(a U b) & G (a -> !b)",
+            "F a & G (a -> X G a)", "!(a U b) | (G F c)", "(!a) U a"]
+
+
+def _trusting(calls):
+    def equivalent(f, g):
+        calls.append((f, g))
+        return True
+    return equivalent
+
+
+class TestAllRewrites(unittest.TestCase):
+
+    def test_every_alternative_once(self):
+        until = parse_ltl_string("a U b")
+        self.assertEqual(sorted(str(r.node) for r in codebook.allRewrites(until, codebook.applyBadStateQuantification)),
+                         sorted(["((F a) U b)", "((G a) U b)", "(a U (F b))", "(a U (G b))", "(b U a)"]))
+        self.assertEqual(len(codebook.allRewrites(until, codebook.applyExclusiveU)), 3)
+        self.assertEqual([str(r.node) for r in codebook.allRewrites(until, codebook.applyUnderconstraint)], ["a", "b"])
+        self.assertEqual(len(codebook.allRewrites(parse_ltl_string("G a"), codebook.applyImplicitG)), 1)
+
+    def test_nested_choices(self):
+        chain = parse_ltl_string("X X X a")
+        results = {str(r.node) for r in codebook.allRewrites(chain, codebook.applyBadStateIndex)}
+        self.assertEqual(results, {"(X a)", "(X (X a))", "(X (X (X (X a))))", "(X (X (X (X (X a)))))"})
+
+
+class TestEnumerateMutants(unittest.TestCase):
+
+    def test_each_mutant_once(self):
+        for text in FORMULAS:
+            keys = [(m.misconception, tuple(m.path), m.node) for m in enumerate_mutants(parse_ltl_string(text))]
+            self.assertEqual(len(keys), len(set(keys)), text)
+
+    def test_covers_every_random_application(self):
+        for text in FORMULAS:
+            node = parse_ltl_string(text)
+            enumerated = {(m.misconception, m.node) for m in enumerate_mutants(node)}
+            for seed in range(25):
+                random.seed(seed)
+                for code in MisconceptionCode:
+                    res = codebook.applyMisconception(node, code, randomize_location=True)
+                    if res.misconception:
+                        with self.subTest(formula=text, code=code.name, seed=seed):
+                            self.assertIn((res.misconception, res.node), enumerated)
+
+    def test_paths_locate_the_rewrite(self):
+        node = parse_ltl_string("F a & G F b")
+        implicit_f = [m for m in enumerate_mutants(node) if m.misconception == MisconceptionCode.ImplicitF]
+        self.assertEqual([(m.path, str(m.node)) for m in implicit_f],
+                         [(["left"], "(a & (G (F b)))"), (["right", "operand"], "((F a) & (G b))")])
+
+    def test_fallback_rule_only_when_the_first_applies_nowhere(self):
+        codes = lambda text: [m for m in enumerate_mutants(parse_ltl_string(text))
+                              if m.misconception == MisconceptionCode.OtherImplicit]
+        self.assertEqual([str(m.node) for m in codes("X a & b")], ["((F a) & b)"])
+        self.assertEqual(sorted(str(m.node) for m in codes("a & G b")), ["(G b)", "(a & b)", "a"])
+
+
+class TestSemanticClasses(unittest.TestCase):
+
+    def test_classes_from_fingerprints_and_checks(self):
+        calls = []
+        nodes = [parse_ltl_string(t) for t in ["G q", "G G q", "F q", "F F q", "q", "G q"]]
+        ids, checks = semantic_classes(nodes, _trusting(calls))
+        self.assertEqual(ids, [0, 0, 1, 1, 2, 0])
+        self.assertEqual(checks, 2)
+        # Asked on the jointly canonicalized formulas, once per new formula.
+        self.assertEqual(calls, [("(G p0)", "(G (G p0))"), ("(F p0)", "(F (F p0))")])
+
+    def test_refuted_candidates_open_a_class(self):
+        nodes = [parse_ltl_string(t) for t in ["G a", "G G a"]]
+        ids, _ = semantic_classes(nodes, lambda f, g: False)
+        self.assertEqual(ids, [0, 1])
+
+
+class TestNeighborhood(unittest.TestCase):
+
+    def test_classified_against_the_original(self):
+        hood = mutant_neighborhood(parse_ltl_string("G (G a) | b"), _trusting([]))
+        by_text = {str(m.node): m.semantic_class for m in hood.mutants}
+        # ImplicitG at the inner G gives G a | b, which means the same.
+        self.assertEqual(by_text["((G a) | b)"], hood.ORIGINAL_CLASS)
+        self.assertNotIn("((G a) | b)", {str(m.node) for m in hood.distinct()})
+        self.assertIn(hood.ORIGINAL_CLASS, hood.by_class())
+
+    def test_classes_group_every_site(self):
+        hood = mutant_neighborhood(parse_ltl_string("F a & F b"), _trusting([]))
+        implicit_f = [m for m in hood.mutants if m.misconception == MisconceptionCode.ImplicitF]
+        self.assertEqual(len(implicit_f), 2)
+        self.assertNotEqual(implicit_f[0].semantic_class, implicit_f[1].semantic_class)
+        for class_id, members in hood.by_class().items():
+            self.assertEqual({m.semantic_class for m in members}, {class_id})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+"""Tests for operator-indexed misconception dispatch (codebook.MutationSiteIndex).
+
+The index must only ever skip work: on any formula, probing the candidate
+sites of a rule's triggers finds exactly the sites a walk over every node
+finds, with the same rewrites.
+
+Run with:
+    python -m pytest test/test_mutation_index.py -v
+"""
+
+import os
+import random
+import sys
+import unittest
+from unittest.mock import MagicMock, patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+sys.modules.setdefault("spot", MagicMock())
+
+from ltlnode import parse_ltl_string
+import codebook
+from codebook import MisconceptionCode, MutationSiteIndex, MUTATION_TRIGGERS
+from formulasampler import FormulaSampler
+
+
+PRIORITIES = {"ap": 4, "F": 3, "G": 3, "X": 3, "U": 4, "and": 3, "or": 3,
+              "equiv": 1, "implies": 2, "not": 3}
+
+## Formulas with the shapes the pattern-matching rules look for.
+SHAPED = ["a U (b & F c)", "a U (b -> G c)", "X (a & b)", "X X a", "(!a) U a",
+          "a U G a", "F a & G (a -> X G a)", "(a U b) & G (a -> !b)",
+          "G !(a & b) & (a U b)", "a & (b | c)", "a U (!a & b)"]
+
+
+def _sites(node, f, index):
+    random.seed(1)
+    return [(location.path(), str(res.node))
+            for location, res in codebook.applicableMutationSites(node, f, index)]
+
+
+class TestMutationSiteIndex(unittest.TestCase):
+
+    def setUp(self):
+        sampler = FormulaSampler(["a", "b", "c"], PRIORITIES, seed=4)
+        self.formulas = [parse_ltl_string(text) for text in SHAPED]
+        self.formulas += [sampler.sample(n) for n in range(1, 14) for _ in range(8)]
+
+    def test_triggers_find_every_site(self):
+        for node in self.formulas:
+            index = MutationSiteIndex(node)
+            for f in MUTATION_TRIGGERS:
+                with self.subTest(formula=str(node), rule=f.__name__):
+                    self.assertEqual(_sites(node, f, index), _sites(node, f, None))
+
+    def test_indexed_dispatch_matches_the_unindexed_walk(self):
+        for node in self.formulas:
+            index = MutationSiteIndex(node)
+            for code in MisconceptionCode:
+                random.seed(2)
+                walked = [codebook.applyTilFirstRandom(node, f) for f in codebook.MISCONCEPTION_RULES.get(code, [])]
+                walked = next((r for r in walked if r.misconception), None)
+                random.seed(2)
+                indexed = codebook.applyMisconception(node, code, randomize_location=True, index=index)
+                with self.subTest(formula=str(node), code=code.name):
+                    if walked is None:
+                        self.assertIsNone(indexed.misconception)
+                    else:
+                        self.assertEqual(indexed.misconception, walked.misconception)
+
+    def test_absent_operators_are_skipped(self):
+        node = parse_ltl_string("G (a -> F b)")
+        index = MutationSiteIndex(node)
+        self.assertEqual(index.candidates(codebook.applyWeakU), [])
+        self.assertEqual(index.candidates(codebook.applyExclusiveU), [])
+        self.assertEqual([str(l.node) for l in index.candidates(codebook.applyImplicitF)], ["(F b)"])
+
+        calls = []
+        rule = lambda n: calls.append(n) or codebook.applyWeakU(n)
+        with patch.dict(codebook.MUTATION_TRIGGERS, {rule: MUTATION_TRIGGERS[codebook.applyWeakU]}):
+            self.assertEqual(codebook.applicableMutationSites(node, rule, index), [])
+        self.assertEqual(calls, [])
+
+    def test_shapes_narrow_candidates(self):
+        node = parse_ltl_string("(a U b) | (c U (d & F e))")
+        index = MutationSiteIndex(node)
+        self.assertEqual([str(l.node) for l in index.candidates(codebook.applyBadStateIndex)],
+                         ["(c U (d & (F e)))"])
+
+    def test_untriggered_rules_probe_everything(self):
+        node = parse_ltl_string("a U X b")
+        self.assertEqual(len(MutationSiteIndex(node).candidates(lambda n: None)), node.size)
+
+
+if __name__ == "__main__":
+    unittest.main()
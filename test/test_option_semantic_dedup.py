@@ -1,13 +1,14 @@
 """Distractor options must be pairwise semantically distinct.
 
-Misconception mutations are filtered against the *answer* (codebook drops
-mutations equivalent to the original), but two different misconceptions can
-produce formulas equivalent to each other — e.g. mutating G(F d) gives both
+Misconception mutations equivalent to the *answer* are dropped, but two
+different misconceptions (or sites) can produce formulas equivalent to each
+other — e.g. mutating G(F d) gives both
 "G d" (dropped F) and "G (G d)" (F->G swap), and G is idempotent. Showing
 both wastes a distractor slot and makes misconception attribution arbitrary,
-so the option builder must merge them.
+so the option builder must merge them: distractor sets come from the
+semantic classes of the answer's mutant neighborhood.
 
-The equivalence oracle (LTLNode.equiv -> SPOT) is patched deterministically,
+The mutants and SPOT's equivalence check are patched deterministically,
 following test_syntacticmutator_pbt.py.
 
 Run with:
@@ -17,22 +18,22 @@ Run with:
 import unittest
 import sys
 import os
-from types import SimpleNamespace
 from unittest.mock import MagicMock, patch
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
 sys.modules['spot'] = MagicMock()
 
 import exercisebuilder as eb
-import ltlnode
-from ltlnode import parse_ltl_string, LTLNode
+import mutantneighborhood
+from mutantneighborhood import Mutant
+from ltlnode import parse_ltl_string
 
 
 def _fake_misconceptions(*pairs):
-    """Build getAllApplicableMisconceptions-shaped results from
-    (formula_string, code) pairs."""
-    return [SimpleNamespace(node=parse_ltl_string(f), misconception=code)
-            for f, code in pairs]
+    """Build enumerate_mutants-shaped results from (formula_string, code) pairs.
+
+    Mutants are built on the canonical answer, where d is p0."""
+    return [Mutant(code, [], parse_ltl_string(f)) for f, code in pairs]
 
 
 # G is idempotent: "G d" and "G (G d)" denote the same property. Everything
@@ -41,28 +42,32 @@ _EQUIV_CLASS = {"(G d)", "(G (G d))"}
 
 
 def _fake_equiv(f1, f2):
-    a, b = str(f1), str(f2)
-    if a == b:
-        return True
-    return a in _EQUIV_CLASS and b in _EQUIV_CLASS
+    # Asked on canonical forms, where d is p0.
+    same = {"(G p0)", "(G (G p0))"}
+    return f1 == f2 or (f1 in same and f2 in same)
 
 
 class TestSemanticOptionDedup(unittest.TestCase):
 
+    def setUp(self):
+        # Every test builds options for the same answer with different fake
+        # mutations, so none may see another's cached distractor set.
+        eb.distractorcache.clear()
+
     def _options(self, misconceptions):
         builder = eb.ExerciseBuilder([])
-        with patch.object(eb.codebook, "getAllApplicableMisconceptions",
+        with patch.object(mutantneighborhood, "enumerate_mutants",
                           return_value=misconceptions), \
-             patch.object(LTLNode, "equiv", _fake_equiv), \
+             patch.object(mutantneighborhood.spotutils, "areEquivalent", _fake_equiv), \
              patch.object(eb, "applyRandomMutationNotEquivalentTo",
                           return_value=None):
             return builder.get_options_with_misconceptions_as_formula("G(F d)")
 
     def test_equivalent_distractors_are_merged(self):
         options = self._options(_fake_misconceptions(
-            ("G d", "MissingFinally"),
-            ("G(G d)", "SwappedFinallyForGlobally"),
-            ("F d", "MissingGlobally"),
+            ("G p0", "MissingFinally"),
+            ("G(G p0)", "SwappedFinallyForGlobally"),
+            ("F p0", "MissingGlobally"),
         ))
         texts = [o["option"] for o in options if not o["isCorrect"]]
         in_class = [t for t in texts if t in _EQUIV_CLASS]
@@ -71,8 +76,8 @@ class TestSemanticOptionDedup(unittest.TestCase):
 
     def test_merged_option_keeps_both_misconception_codes(self):
         options = self._options(_fake_misconceptions(
-            ("G d", "MissingFinally"),
-            ("G(G d)", "SwappedFinallyForGlobally"),
+            ("G p0", "MissingFinally"),
+            ("G(G p0)", "SwappedFinallyForGlobally"),
         ))
         merged = next(o for o in options if o["option"] in _EQUIV_CLASS)
         self.assertCountEqual(
@@ -81,8 +86,8 @@ class TestSemanticOptionDedup(unittest.TestCase):
 
     def test_distinct_distractors_survive(self):
         options = self._options(_fake_misconceptions(
-            ("G d", "MissingFinally"),
-            ("F d", "MissingGlobally"),
+            ("G p0", "MissingFinally"),
+            ("F p0", "MissingGlobally"),
         ))
         texts = sorted(o["option"] for o in options if not o["isCorrect"])
         self.assertEqual(texts, ["(F d)", "(G d)"])
@@ -91,16 +96,16 @@ class TestSemanticOptionDedup(unittest.TestCase):
         """The evidence model splits strength by len(codes), so a duplicated
         code would halve its own evidence."""
         options = self._options(_fake_misconceptions(
-            ("G d", "MissingFinally"),
-            ("G(G d)", "MissingFinally"),
+            ("G p0", "MissingFinally"),
+            ("G(G p0)", "MissingFinally"),
         ))
         merged = next(o for o in options if o["option"] in _EQUIV_CLASS)
         self.assertEqual(merged["misconceptions"], ["MissingFinally"])
 
     def test_correct_option_still_present(self):
         options = self._options(_fake_misconceptions(
-            ("G d", "MissingFinally"),
-            ("G(G d)", "SwappedFinallyForGlobally"),
+            ("G p0", "MissingFinally"),
+            ("G(G p0)", "SwappedFinallyForGlobally"),
         ))
         correct = [o for o in options if o["isCorrect"]]
         self.assertEqual(len(correct), 1)
@@ -0,0 +1,123 @@
+"""Tests for the parse cache and the immutable nodes that make it safe.
+
+parse_ltl_string hands every caller of the same string the same tree, so
+nothing may modify a node in place: these tests check that nodes refuse it
+and that the rewriting code paths leave cached trees untouched.
+
+Run with:
+    python -m pytest test/test_parse_cache.py -v
+"""
+
+import os
+import random
+import sys
+import unittest
+from unittest.mock import MagicMock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+sys.modules.setdefault("spot", MagicMock())
+sys.modules.setdefault("inflect", MagicMock())
+sys.modules.setdefault("wordfreq", MagicMock(zipf_frequency=lambda *a, **k: 0))
+
+import ltlnode
+from ltlnode import parse_ltl_string, LiteralNode, AndNode
+import codebook
+import exerciseprocessor
+import ltltoeng_contextualized
+import syntacticmutator
+
+
+FORMULAS = ["G (a -> F b)", "(a U (b & F c)) | X X a", "F G (a & !b) -> (c U (a -> b))",
+            "X (a & b) U G c", "!(a U b) & (G F c)"]
+
+
+class TestParseCache(unittest.TestCase):
+
+    def test_same_string_same_tree(self):
+        self.assertIs(parse_ltl_string("G (a U b)"), parse_ltl_string("G (a U b)"))
+        # A different string is parsed again, into the same interned node.
+        misses = ltlnode.parse_cache_stats()["misses"]
+        self.assertIs(parse_ltl_string("G (a U b)"), parse_ltl_string("G  (a U b)"))
+        self.assertEqual(ltlnode.parse_cache_stats()["misses"] - misses, 1)
+
+    def test_backends_are_cached_separately(self):
+        self.addCleanup(ltlnode.set_parser_backend, "antlr")
+        ltlnode.set_parser_backend("antlr")
+        antlr = parse_ltl_string("F backends")
+        ltlnode.set_parser_backend("precedence")
+        misses = ltlnode.parse_cache_stats()["misses"]
+        self.assertIs(parse_ltl_string("F backends"), antlr)
+        self.assertEqual(ltlnode.parse_cache_stats()["misses"] - misses, 1)
+
+    def test_parse_errors_are_not_cached(self):
+        self.addCleanup(ltlnode.set_parser_backend, "antlr")
+        ltlnode.set_parser_backend("precedence")
+        for _ in range(2):
+            with self.assertRaises(ValueError):
+                parse_ltl_string("a W b")
+
+    def test_stats(self):
+        before = ltlnode.parse_cache_stats()["hits"]
+        parse_ltl_string("G F stats")
+        parse_ltl_string("G F stats")
+        self.assertGreaterEqual(ltlnode.parse_cache_stats()["hits"] - before, 1)
+
+
+class TestImmutableNodes(unittest.TestCase):
+
+    def test_assignment_is_refused(self):
+        node = AndNode(LiteralNode("a"), LiteralNode("b"))
+        with self.assertRaises(AttributeError):
+            node.left = LiteralNode("c")
+        with self.assertRaises(AttributeError):
+            node.left.value = "c"
+        with self.assertRaises(AttributeError):
+            del node.right
+        self.assertEqual(str(node), "(a & b)")
+
+
+class TestRewritesLeaveCachedTreesIntact(unittest.TestCase):
+
+    def setUp(self):
+        random.seed(5)
+
+    def test_misconceptions(self):
+        for text in FORMULAS:
+            node = parse_ltl_string(text)
+            before = str(node)
+            for misconception in codebook.MisconceptionCode:
+                for randomize in (False, True):
+                    codebook.applyMisconception(node, misconception, randomize_location=randomize)
+            self.assertEqual(str(node), before)
+            self.assertIs(parse_ltl_string(text), node)
+
+    def test_precedence_rewrite(self):
+        node = parse_ltl_string("a & (b | c)")
+        result = codebook.applyPrecedence(node)
+        self.assertEqual(str(result.node), "((a & b) | c)")
+        self.assertEqual(str(node), "(a & (b | c))")
+
+    def test_random_syntactic_mutations(self):
+        for text in FORMULAS:
+            node = parse_ltl_string(text)
+            before = str(node)
+            for _ in range(30):
+                mutated = syntacticmutator.applyRandomMutation(node)
+                self.assertIsNotNone(mutated)
+            self.assertEqual(str(node), before)
+
+    def test_remove_ors(self):
+        node = parse_ltl_string("G (a | b) & (c | X d)")
+        before = str(node)
+        self.assertNotIn("|", str(exerciseprocessor.removeORs(node)))
+        self.assertEqual(str(node), before)
+
+    def test_remap_to_theme(self):
+        node = parse_ltl_string("G (z -> F k)")
+        remapped = ltltoeng_contextualized.remap_to_theme(node)
+        self.assertNotEqual(str(remapped), str(node))
+        self.assertEqual(str(node), "(G (z -> (F k)))")
+
+
+if __name__ == "__main__":
+    unittest.main()
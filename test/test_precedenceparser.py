@@ -0,0 +1,140 @@
+"""Tests for the hand-written precedence-climbing LTL parser.
+
+The differential tests check that it builds the same trees as the ANTLR
+grammar in ltl.g4, on formulas written with as few parentheses as the
+grammar allows, so that precedence and associativity decide their shape.
+
+Run with:
+    python -m pytest test/test_precedenceparser.py -v
+"""
+
+import io
+import os
+import sys
+import unittest
+from contextlib import redirect_stderr
+from unittest.mock import MagicMock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+sys.modules.setdefault("spot", MagicMock())
+
+import ltlnode
+from ltlnode import parse_ltl_string_antlr, UnaryOperatorNode, BinaryOperatorNode
+import precedenceparser
+from precedenceparser import parse, LTLParseError
+
+try:
+    from hypothesis import given, settings, strategies as st
+    HAS_HYPOTHESIS = True
+except ImportError:  # pragma: no cover
+    HAS_HYPOTHESIS = False
+
+
+def shape(node):
+    """Node classes and literal values of a tree, for exact comparison."""
+    if isinstance(node, UnaryOperatorNode):
+        return (type(node).__name__, shape(node.operand))
+    if isinstance(node, BinaryOperatorNode):
+        return (type(node).__name__, shape(node.left), shape(node.right))
+    return (type(node).__name__, node.value)
+
+
+def antlr(text):
+    with redirect_stderr(io.StringIO()):
+        return parse_ltl_string_antlr(text)
+
+
+if HAS_HYPOTHESIS:
+    _space = st.sampled_from(["", " ", "  ", "\t", "\n"])
+
+    def _formula_text():
+        atoms = st.sampled_from(["a", "b", "p0", "q12", "true", "1"])
+
+        def extend(children):
+            unary = st.builds(lambda op, s, f: f"{op}{s}{f}",
+                              st.sampled_from(["!", "X", "F", "G", "AFTER ", "NEXT_STATE ",
+                                               "EVENTUALLY ", "ALWAYS "]), _space, children)
+            # No parentheses around the operands: the parsers must agree on
+            # how operators of different precedence group.
+            binary = st.builds(lambda l, s1, op, s2, r: f"{l}{s1}{op}{s2}{r}",
+                               children, _space,
+                               st.sampled_from(["&", "|", "->", "<->", " U ", " UNTIL "]),
+                               _space, children)
+            grouped = st.builds(lambda s, f: f"({s}{f}{s})", _space, children)
+            return unary | binary | grouped
+
+        return st.recursive(atoms, extend, max_leaves=8)
+
+
+class TestPrecedenceParser(unittest.TestCase):
+
+    def test_precedence_and_associativity(self):
+        cases = {
+            "!a & b": "((! a) & b)",
+            "a | b & c": "(a | (b & c))",
+            "a & b U c | d": "((a & b) U (c | d))",
+            "F a U b": "((F a) U b)",
+            "a -> b -> c": "((a -> b) -> c)",
+            "a U b U c": "((a U b) U c)",
+            "a <-> b -> c": "(a <-> (b -> c))",
+            "a -> b <-> c -> d": "((a -> b) <-> (c -> d))",
+            "ALWAYSEVENTUALLY a": "(G (F a))",
+            "aUNTILb": "(a U b)",
+            "((a))": "a",
+        }
+        for text, expected in cases.items():
+            with self.subTest(text):
+                self.assertEqual(str(parse(text)), expected)
+                self.assertEqual(shape(parse(text)), shape(antlr(text)))
+
+    def test_rejects_what_antlr_would_recover_from(self):
+        for text in ["", "a W b", "a b", "(a", "a)", "G", "a ->", "a <- b", "A", "UNTIL a", "<> a"]:
+            with self.subTest(text):
+                with self.assertRaises(LTLParseError):
+                    parse(text)
+
+    def test_error_is_a_value_error_with_a_position(self):
+        with self.assertRaisesRegex(ValueError, "position 4"):
+            parse("a & )")
+
+
+@unittest.skipUnless(HAS_HYPOTHESIS, "hypothesis not installed")
+class TestAgreesWithAntlr(unittest.TestCase):
+
+    @settings(max_examples=500, deadline=None)
+    @given(_formula_text() if HAS_HYPOTHESIS else None)
+    def test_same_tree(self, text):
+        self.assertEqual(shape(parse(text)), shape(antlr(text)))
+
+    @settings(max_examples=300, deadline=None)
+    @given(st.lists(st.sampled_from(["a", "b", "!", "X", "F", "G", "&", "|", "U", "->", "<->", "(", ")"]),
+                    min_size=1, max_size=10).map(" ".join) if HAS_HYPOTHESIS else None)
+    def test_whatever_it_accepts_antlr_reads_the_same(self, text):
+        try:
+            node = parse(text)
+        except LTLParseError:
+            return
+        self.assertEqual(shape(node), shape(antlr(text)))
+
+
+class TestBackendSelection(unittest.TestCase):
+
+    def tearDown(self):
+        ltlnode.set_parser_backend("antlr")
+
+    def test_switching_backends(self):
+        ltlnode.set_parser_backend("precedence")
+        with self.assertRaises(LTLParseError):
+            ltlnode.parse_ltl_string("a W b")
+        self.assertEqual(str(ltlnode.parse_ltl_string("G a -> F b")), "((G a) -> (F b))")
+
+        ltlnode.set_parser_backend("antlr")
+        self.assertEqual(str(antlr("G a -> F b")), "((G a) -> (F b))")
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            ltlnode.set_parser_backend("yacc")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+"""Tests for relationcache.RelationCache -- the two-tier (in-process LRU +
+shared SQLite file) cache of implication/disjointness results.
+
+Pure Python; no SPOT needed. Each test uses its own temporary SQLite file.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+import relationcache
+from relationcache import RelationCache, IMPLIES, DISJOINT
+
+
+class TestRelationCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp(prefix="ltltutor_relcache_")
+        self.path = os.path.join(self.tmpdir, "relations.db")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_in_process_only_without_a_path(self):
+        cache = RelationCache()
+        self.assertIsNone(cache.get(IMPLIES, "a", "b"))
+        cache.put(IMPLIES, "a", "b", False)
+        self.assertIs(cache.get(IMPLIES, "a", "b"), False)
+
+    def test_results_survive_a_new_instance(self):
+        # Models a second gunicorn worker opening the same file.
+        RelationCache(path=self.path).put(IMPLIES, "(G a)", "(F a)", True)
+        other = RelationCache(path=self.path)
+        self.assertIs(other.get(IMPLIES, "(G a)", "(F a)"), True)
+        self.assertEqual(other.stats()["persistent_hits"], 1)
+
+    def test_implication_is_directional(self):
+        cache = RelationCache(path=self.path)
+        cache.put(IMPLIES, "(G a)", "(F a)", True)
+        self.assertIsNone(cache.get(IMPLIES, "(F a)", "(G a)"))
+
+    def test_disjointness_is_symmetric(self):
+        cache = RelationCache(path=self.path)
+        cache.put(DISJOINT, "a", "!a", True)
+        self.assertIs(cache.get(DISJOINT, "!a", "a"), True)
+
+    def test_get_or_compute_only_computes_on_a_miss(self):
+        cache = RelationCache(path=self.path)
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return True
+
+        self.assertTrue(cache.get_or_compute(IMPLIES, "a", "a", compute))
+        self.assertTrue(cache.get_or_compute(IMPLIES, "a", "a", compute))
+        self.assertEqual(len(calls), 1)
+
+    def test_sqlite_tier_is_bounded(self):
+        with patch.object(relationcache, "EVICTION_CHECK_INTERVAL", 1):
+            cache = RelationCache(path=self.path, max_rows=5)
+            for i in range(20):
+                cache.put(IMPLIES, f"p{i}", "q", True)
+        fresh = RelationCache(path=self.path)
+        stored = [i for i in range(20) if fresh.get(IMPLIES, f"p{i}", "q") is not None]
+        self.assertEqual(len(stored), 5)
+        # Least recently used rows go first, so the newest survive.
+        self.assertEqual(stored, list(range(15, 20)))
+
+    def test_unusable_path_degrades_to_in_process(self):
+        blocker = os.path.join(self.tmpdir, "not-a-directory")
+        with open(blocker, "w") as f:
+            f.write("x")
+        cache = RelationCache(path=os.path.join(blocker, "relations.db"))
+        cache.put(IMPLIES, "a", "b", True)
+        self.assertIs(cache.get(IMPLIES, "a", "b"), True)
+        self.assertIsNone(cache.path)
+
+    def test_clear_drops_both_tiers(self):
+        cache = RelationCache(path=self.path)
+        cache.put(IMPLIES, "a", "b", True)
+        cache.clear()
+        self.assertIsNone(cache.get(IMPLIES, "a", "b"))
+        self.assertIsNone(RelationCache(path=self.path).get(IMPLIES, "a", "b"))
+
+
+if __name__ == "__main__":
+    unittest.main()
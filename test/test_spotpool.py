@@ -0,0 +1,134 @@
+"""Tests for spotpool.py -- the worker-process pool that runs SPOT calls under
+per-call time and memory limits.
+
+The pool is generic, so these tests run plain module-level functions in it
+rather than SPOT.
+
+Run with:
+    python -m pytest test/test_spotpool.py -v
+"""
+
+import os
+import runpy
+import sys
+import time
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+import spotpool
+from spotpool import SpotPool, SpotTimeoutError, SpotMemoryError
+
+
+def _square(x):
+    return x * x
+
+
+def _pid():
+    return os.getpid()
+
+
+def _sleep(seconds):
+    time.sleep(seconds)
+    return seconds
+
+
+def _fail():
+    raise ValueError("bad formula")
+
+
+def _allocate(mb):
+    return len(bytearray(mb * 1024 * 1024))
+
+
+def _keywords(**kwargs):
+    return kwargs
+
+
+def _imported(name):
+    return name in sys.modules
+
+
+class TestSpotPool(unittest.TestCase):
+
+    def setUp(self):
+        self.pool = SpotPool(processes=1, timeout=5, memory_limit_mb=512, max_calls_per_worker=50)
+
+    def tearDown(self):
+        self.pool.close()
+
+    def test_returns_results(self):
+        self.assertEqual(self.pool.run(_square, 7), 49)
+        self.assertNotEqual(self.pool.run(_pid), os.getpid())
+
+    def test_reraises_exceptions_from_the_call(self):
+        with self.assertRaisesRegex(ValueError, "bad formula"):
+            self.pool.run(_fail)
+        # The worker survives an ordinary exception.
+        self.assertEqual(self.pool.run(_square, 3), 9)
+
+    def test_timeout_kills_the_call_and_the_pool_recovers(self):
+        start = time.monotonic()
+        with self.assertRaises(SpotTimeoutError):
+            self.pool.run(_sleep, 30, pool_timeout=0.5)
+        self.assertLess(time.monotonic() - start, 5)
+        self.assertEqual(self.pool.stats()["timeouts"], 1)
+        self.assertEqual(self.pool.run(_square, 4), 16)
+
+    @unittest.skipIf(spotpool.resource is None, "resource limits not supported here")
+    def test_memory_limit(self):
+        with self.assertRaises(SpotMemoryError):
+            self.pool.run(_allocate, 2048)
+        self.assertEqual(self.pool.run(_square, 5), 25)
+
+    def test_callers_keywords_reach_the_function(self):
+        self.assertEqual(self.pool.run(_keywords, timeout=3, pool=1), {"timeout": 3, "pool": 1})
+
+    def test_workers_are_recycled(self):
+        pool = SpotPool(processes=1, max_calls_per_worker=2)
+        try:
+            pids = [pool.run(_pid) for _ in range(4)]
+        finally:
+            pool.close()
+        self.assertEqual(pids[0], pids[1])
+        self.assertEqual(pids[2], pids[3])
+        self.assertNotEqual(pids[1], pids[2])
+        self.assertEqual(pool.stats()["recycled"], 2)
+
+
+class TestModuleLevelRun(unittest.TestCase):
+
+    def tearDown(self):
+        spotpool.configure(0)
+
+    def test_runs_in_process_when_disabled(self):
+        spotpool.configure(0)
+        self.assertEqual(spotpool.run(_pid, pool_timeout=1), os.getpid())
+        self.assertIsNone(spotpool.stats())
+
+    def test_timeout_keyword_is_passed_through(self):
+        spotpool.configure(0)
+        self.assertEqual(spotpool.run(_keywords, timeout=3, pool_timeout=1), {"timeout": 3})
+
+    def test_runs_in_a_worker_when_configured(self):
+        spotpool.configure(1, timeout=5)
+        self.assertNotEqual(spotpool.run(_pid), os.getpid())
+
+
+class TestWorkerStartup(unittest.TestCase):
+
+    def test_workers_do_not_import_the_app(self):
+        pool = SpotPool(processes=1, timeout=5)
+        try:
+            self.assertFalse(pool.run(_imported, "app"))
+        finally:
+            pool.close()
+
+    def test_entry_script_is_inert_when_rerun_by_a_worker(self):
+        server = os.path.join(os.path.dirname(__file__), "../src/server.py")
+        namespace = runpy.run_path(server, run_name="__mp_main__")
+        self.assertNotIn("app", namespace)
+
+
+if __name__ == "__main__":
+    unittest.main()
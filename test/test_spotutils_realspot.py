@@ -17,6 +17,7 @@ pattern has been verified to coexist with the mocking suite under both
 ``pytest`` and ``unittest discover`` regardless of collection order.
 """
 
+import itertools
 import os
 import sys
 import unittest
@@ -69,6 +70,60 @@ class TestEquivalenceAndRelations(unittest.TestCase):
         # a and b CAN both hold (a & b) -> not disjoint
         self.assertIs(spotutils.areDisjoint("a", "b"), False)
 
+    def test_alpha_variants_share_relation_cache_entries(self):
+        spotutils.isSufficientFor("G q", "F q")
+        spotutils.areDisjoint("q U s", "G ! s")
+        before = spotutils.relation_cache_stats()
+        self.assertIs(spotutils.isSufficientFor("G a", "F a"), True)
+        self.assertIs(spotutils.areDisjoint("b U c", "G ! c"), True)
+        after = spotutils.relation_cache_stats()
+        self.assertEqual(after["hits"] - before["hits"], 2)
+        self.assertEqual(after["misses"], before["misses"])
+
+
+@unittest.skipUnless(SPOT_AVAILABLE, "real SPOT library not available")
+class TestRelate(unittest.TestCase):
+    def test_kinds(self):
+        cases = [
+            ("G a", "G G a", spotutils.SemanticRelation.EQUIVALENT),
+            ("G a", "F a", spotutils.SemanticRelation.CONTAINED),
+            ("F a", "G a", spotutils.SemanticRelation.SUBSUMES),
+            ("G a", "G ! a", spotutils.SemanticRelation.DISJOINT),
+            ("a", "b", spotutils.SemanticRelation.OVERLAPPING),
+        ]
+        for f, g, kind in cases:
+            with self.subTest(f=f, g=g):
+                self.assertEqual(spotutils.relate(f, g).kind, kind)
+
+    def test_agrees_with_the_pairwise_helpers(self):
+        for f, g in [("G a", "F a"), ("a", "b"), ("a & b", "a"), ("G a", "G ! a"), ("F a", "F F a")]:
+            with self.subTest(f=f, g=g):
+                relation = spotutils.relate(f, g)
+                self.assertEqual(relation.f_implies_g, spotutils.isSufficientFor(f, g))
+                self.assertEqual(relation.g_implies_f, spotutils.isSufficientFor(g, f))
+                self.assertEqual(relation.disjoint, spotutils.areDisjoint(f, g))
+
+    def test_witnesses_separate_the_formulas(self):
+        relation = spotutils.relate("a", "b")
+        R = spotutils.SemanticRelation
+        for word in relation.words(R.F_NOT_G):
+            self.assertTrue(spotutils.is_trace_satisfied(trace=word, formula="a"))
+            self.assertFalse(spotutils.is_trace_satisfied(trace=word, formula="b"))
+        for word in relation.words(R.G_NOT_F):
+            self.assertTrue(spotutils.is_trace_satisfied(trace=word, formula="b"))
+            self.assertFalse(spotutils.is_trace_satisfied(trace=word, formula="a"))
+        self.assertTrue(relation.words(R.F_AND_G))
+        for word in relation.words(R.F_AND_G):
+            self.assertTrue(spotutils.is_trace_satisfied(trace=word, formula="a & b"))
+
+    def test_cached_verdicts_need_no_translation(self):
+        spotutils.relate("G a", "F a")
+        spotutils.clear_translation_cache()
+        relation = spotutils.relate("G a", "F a")
+        self.assertEqual(relation.kind, spotutils.SemanticRelation.CONTAINED)
+        self.assertEqual(spotutils.translation_cache_stats()["entries"], 0)
+        self.assertEqual(relation.words(spotutils.SemanticRelation.F_NOT_G), [])
+
 
 @unittest.skipUnless(SPOT_AVAILABLE, "real SPOT library not available")
 class TestTraceSatisfaction(unittest.TestCase):
@@ -86,24 +141,6 @@ class TestTraceSatisfaction(unittest.TestCase):
         self.assertIsInstance(result, bool)
 
 
-@unittest.skipUnless(SPOT_AVAILABLE, "real SPOT library not available")
-class TestTrivialityDetection(unittest.TestCase):
-    def test_tautologies_and_contradictions_are_trivial(self):
-        self.assertTrue(spotutils.is_trivial("a | !a"))   # tautology
-        self.assertTrue(spotutils.is_trivial("a & !a"))   # contradiction
-        self.assertTrue(spotutils.is_trivial("true"))
-        self.assertTrue(spotutils.is_trivial("false"))
-
-    def test_contingent_formulas_are_not_trivial(self):
-        self.assertFalse(spotutils.is_trivial("a"))
-        self.assertFalse(spotutils.is_trivial("G a"))
-        self.assertFalse(spotutils.is_trivial("a U b"))
-
-    def test_is_trivial_never_raises_even_on_garbage(self):
-        # is_trivial has a bare try/except and must swallow parse errors.
-        self.assertFalse(spotutils.is_trivial("@@@ not a formula @@@"))
-
-
 @unittest.skipUnless(SPOT_AVAILABLE, "real SPOT library not available")
 class TestTraceGeneration(unittest.TestCase):
     def test_generated_traces_actually_satisfy_the_formula(self):
@@ -136,6 +173,14 @@ class TestTraceGeneration(unittest.TestCase):
     def test_max_traces_is_an_upper_bound(self):
         self.assertLessEqual(len(spotutils.generate_accepted_traces("F a", max_traces=2)), 2)
 
+    def test_streamed_words_are_accepted_and_distinct(self):
+        words = list(itertools.islice(spotutils.iter_traces("G F a", "G a"), 10))
+        self.assertGreater(len(words), 1)
+        self.assertEqual(len(words), len(set(words)))
+        for w in words:
+            self.assertTrue(spotutils.is_trace_satisfied(trace=w, formula="G F a"), w)
+            self.assertFalse(spotutils.is_trace_satisfied(trace=w, formula="G a"), w)
+
 
 @unittest.skipUnless(SPOT_AVAILABLE, "real SPOT library not available")
 class TestClassificationHelpers(unittest.TestCase):
@@ -152,6 +197,150 @@ class TestClassificationHelpers(unittest.TestCase):
         self.assertGreaterEqual(size, 1)
 
 
+@unittest.skipUnless(SPOT_AVAILABLE, "real SPOT library not available")
+class TestTranslationCache(unittest.TestCase):
+    def setUp(self):
+        spotutils.clear_translation_cache()
+
+    def test_repeated_translations_hit_the_cache(self):
+        before = spotutils.translation_cache_stats()
+        spotutils.translate("G a")
+        spotutils.translate("G a")
+        after = spotutils.translation_cache_stats()
+        self.assertEqual(after["misses"] - before["misses"], 1)
+        self.assertEqual(after["hits"] - before["hits"], 1)
+
+    def test_low_effort_checks_reuse_high_effort_automata(self):
+        spotutils.translate("G a")
+        before = spotutils.translation_cache_stats()
+        self.assertEqual(spotutils.translate("G a", "check").num_states(),
+                         spotutils.translate("G a").num_states())
+        after = spotutils.translation_cache_stats()
+        self.assertEqual(after["misses"], before["misses"])
+
+    def test_key_is_the_normalized_formula(self):
+        spotutils.get_aut_size("G(a)")
+        before = spotutils.translation_cache_stats()
+        spotutils.get_aut_size("G a")
+        after = spotutils.translation_cache_stats()
+        self.assertEqual(after["hits"] - before["hits"], 1)
+        self.assertEqual(after["misses"], before["misses"])
+
+    def test_cache_is_shared_across_helpers(self):
+        # Over p0 so areDisjoint's renaming to canonical atoms keeps the key.
+        spotutils.generate_accepted_traces("F p0", max_traces=2)
+        before = spotutils.translation_cache_stats()
+        spotutils.is_trace_satisfied(trace="cycle{p0}", formula="F p0")
+        spotutils.areDisjoint("F p0", "G p0")
+        after = spotutils.translation_cache_stats()
+        self.assertGreaterEqual(after["hits"] - before["hits"], 2)
+
+    def test_cached_automata_are_not_modified_by_use(self):
+        # Generating traces builds products from the cached automaton; the
+        # cached automaton itself must keep accepting the same language.
+        self.assertTrue(spotutils.generate_accepted_traces("F a", max_traces=3))
+        self.assertTrue(spotutils.is_trace_satisfied(trace="! a; cycle{a}", formula="F a"))
+        self.assertFalse(spotutils.is_trace_satisfied(trace="cycle{! a}", formula="F a"))
+
+
+@unittest.skipUnless(SPOT_AVAILABLE, "real SPOT library not available")
+class TestFingerprintAgreesWithSpot(unittest.TestCase):
+    """The pure-Python evaluator behind fingerprint.py must match SPOT's verdicts."""
+
+    FORMULAS = ["a", "X a", "F a", "G a", "a U b", "G (a -> F b)", "F G a",
+                "G F a", "!(a U b)", "(X a) <-> b", "a | (X (b U a))"]
+
+    def test_evaluator_matches_is_trace_satisfied_on_the_bank(self):
+        import fingerprint
+        from ltlnode import parse_ltl_string
+        from traceeval import evaluate
+
+        alphabet = ("a", "b")
+        for lasso in fingerprint.trace_bank(alphabet):
+            word = lasso.to_spot_word(alphabet)
+            for f in self.FORMULAS:
+                self.assertEqual(evaluate(parse_ltl_string(f), lasso),
+                                 bool(spotutils.is_trace_satisfied(word, f)),
+                                 f"{f} on {word}")
+
+    def test_separated_pairs_are_not_equivalent(self):
+        import fingerprint
+        from ltlnode import parse_ltl_string
+
+        for f in self.FORMULAS:
+            for g in self.FORMULAS:
+                if not fingerprint.maybe_equivalent(parse_ltl_string(f), parse_ltl_string(g)):
+                    self.assertFalse(spotutils.areEquivalent(f, g), f"{f} vs {g}")
+
+
+@unittest.skipUnless(SPOT_AVAILABLE, "real SPOT library not available")
+class TestNativeTraceCheckAgreesWithSpot(unittest.TestCase):
+    """traceeval.is_trace_satisfied replaces spotutils.is_trace_satisfied in the
+    stepper and in trace-satisfaction feedback, so it must give SPOT's answer on
+    every word -- natively where it can, by falling back where it cannot."""
+
+    def _words(self, alphabet, count, seed):
+        import random
+        rng = random.Random(seed)
+
+        def state():
+            lits = [a if rng.random() < 0.5 else f"!{a}" for a in alphabet]
+            if rng.random() < 0.3:
+                lits = [f"({l})" for l in lits]
+            return " & ".join(lits)
+
+        for _ in range(count):
+            prefix = [state() for _ in range(rng.randint(0, 3))]
+            cycle = [state() for _ in range(rng.randint(1, 3))]
+            yield "; ".join(prefix + ["cycle{" + "; ".join(cycle) + "}"])
+
+    def test_random_formulas_on_random_words(self):
+        import formulasampler
+        import traceeval
+
+        alphabet = ["a", "b", "c"]
+        sampler = formulasampler.FormulaSampler(alphabet, spotutils.DEFAULT_LTL_PRIORITIES, seed=13)
+        formulas = [sampler.sample(size) for size in range(1, 10) for _ in range(6)]
+        before = traceeval.evaluator_stats()["native"]
+        for word in self._words(alphabet, 20, seed=5):
+            for node in formulas:
+                self.assertEqual(traceeval.is_trace_satisfied(word, node),
+                                 bool(spotutils.is_trace_satisfied(word, str(node))),
+                                 f"{node} on {word}")
+        self.assertEqual(traceeval.evaluator_stats()["native"] - before, 20 * len(formulas))
+
+    def test_partial_and_unusual_words_fall_back(self):
+        import traceeval
+
+        cases = [
+            ("G (a | b)", "a; cycle{b}"),          # states leave a literal open
+            ("F (a & b)", "cycle{1}"),
+            ("G a", "a | b; cycle{a}"),            # not a conjunction
+            ("a", "a & !a; cycle{a}"),             # contradictory state
+            ("X a", "!a; cycle{a}"),
+        ]
+        for formula, word in cases:
+            self.assertEqual(traceeval.is_trace_satisfied(word, formula),
+                             bool(spotutils.is_trace_satisfied(word, formula)),
+                             f"{formula} on {word}")
+
+    def test_string_formulas_keep_the_tutor_reading_on_every_word(self):
+        # SPOT reads these strings with other precedence and associativity, so
+        # compare against SPOT on the tutor's fully parenthesized parse.
+        import traceeval
+        from ltlnode import parse_ltl_string
+
+        formulas = ["a & b U c", "a -> b -> c", "a U b U c", "a | b & c", "!a U b & c"]
+        words = list(self._words(["a", "b", "c"], 15, seed=11))
+        words += ["a; cycle{c}", "!a & c; cycle{!c}", "cycle{b}", "a & b; cycle{1}"]
+        for formula in formulas:
+            parsed = str(parse_ltl_string(formula))
+            for word in words:
+                self.assertEqual(traceeval.is_trace_satisfied(word, formula),
+                                 bool(spotutils.is_trace_satisfied(word, parsed)),
+                                 f"{formula} on {word}")
+
+
 @unittest.skipUnless(SPOT_AVAILABLE, "real SPOT library not available")
 class TestMalformedInputContract(unittest.TestCase):
     """Characterization of how SPOT wrappers behave on malformed input.
@@ -164,7 +353,7 @@ class TestMalformedInputContract(unittest.TestCase):
     If/when these functions are hardened to return safe defaults (None / []),
     THESE tests should be updated to assert the graceful behavior -- they exist
     precisely so that such a change is a conscious, reviewed decision and not an
-    accident. Only ``is_trivial`` currently guards its own parsing.
+    accident.
     """
 
     def test_is_trace_satisfied_raises_on_malformed_formula(self):
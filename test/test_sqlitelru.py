@@ -0,0 +1,94 @@
+"""Tests for sqlitelru.SQLiteLRU, the persistent tier of the relation and
+distractor caches.
+
+Pure Python; no SPOT needed. Each test uses its own temporary SQLite file.
+
+Run with:
+    python -m pytest test/test_sqlitelru.py -v
+"""
+
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+import sqlitelru
+from sqlitelru import SQLiteLRU
+
+
+class TestSQLiteLRU(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp(prefix="ltltutor_sqlitelru_")
+        self.path = os.path.join(self.tmpdir, "store.db")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def _store(self, max_rows=100, eviction_interval=1):
+        return SQLiteLRU(self.path, "entries", ("a", "b"), "TEXT", max_rows, eviction_interval)
+
+    def _last_used(self, key):
+        with sqlite3.connect(self.path) as conn:
+            return conn.execute("SELECT last_used FROM entries WHERE a = ? AND b = ?", key).fetchone()[0]
+
+    def test_round_trip_on_a_composite_key(self):
+        self._store().put(("x", "1"), "value")
+        store = self._store()
+        self.assertEqual(store.get(("x", "1")), "value")
+        self.assertIsNone(store.get(("x", "2")))
+
+    def test_reads_do_not_write_until_a_batch_is_due(self):
+        store = self._store()
+        with patch.object(sqlitelru.time, "time", return_value=1.0):
+            store.put(("x", "1"), "value")
+        with patch.object(sqlitelru.time, "time", return_value=2.0):
+            store.get(("x", "1"))
+        self.assertEqual(self._last_used(("x", "1")), 1.0)
+        with patch.object(sqlitelru.time, "time", return_value=3.0):
+            store.put(("y", "1"), "other")
+        # The next write carries the pending touch, with the time of the read.
+        self.assertEqual(self._last_used(("x", "1")), 2.0)
+
+    def test_a_full_batch_of_touches_is_written(self):
+        store = self._store()
+        with patch.object(sqlitelru, "TOUCH_BATCH", 2), \
+             patch.object(sqlitelru.time, "time", side_effect=[1.0, 1.0, 5.0, 6.0]):
+            store.put(("x", "1"), "v")
+            store.put(("y", "1"), "v")
+            store.get(("x", "1"))
+            store.get(("y", "1"))
+        self.assertEqual((self._last_used(("x", "1")), self._last_used(("y", "1"))), (5.0, 6.0))
+
+    def test_least_recently_used_rows_are_evicted(self):
+        store = self._store(max_rows=2)
+        with patch.object(sqlitelru.time, "time", side_effect=[1.0, 2.0, 3.0, 4.0]):
+            store.put(("old", "1"), "v")
+            store.put(("newer", "1"), "v")
+            store.get(("old", "1"))
+            store.put(("newest", "1"), "v")
+        fresh = self._store()
+        self.assertIsNone(fresh.get(("newer", "1")))
+        self.assertEqual(fresh.get(("old", "1")), "v")
+
+    def test_clear_drops_pending_touches(self):
+        store = self._store()
+        store.put(("x", "1"), "v")
+        store.get(("x", "1"))
+        store.clear()
+        store.put(("y", "1"), "v")
+        self.assertIsNone(store.get(("x", "1")))
+
+    def test_without_a_path_nothing_is_stored(self):
+        store = SQLiteLRU(None, "entries", ("a",), "TEXT", 10, 1)
+        store.put(("x",), "v")
+        self.assertIsNone(store.get(("x",)))
+
+
+if __name__ == "__main__":
+    unittest.main()
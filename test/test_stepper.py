@@ -5,8 +5,10 @@ and marks, for every subformula at every time step, whether it holds. This drive
 the coloured formula tree and the satisfaction matrix a student sees when they
 step through a trace. It was previously at 0% coverage.
 
-Uses the real SPOT kernel (satisfaction values come from spotutils). Skipped
-cleanly when SPOT is unavailable.
+Uses the real SPOT kernel: traces whose states leave a literal open are
+checked with spotutils, and the native one-pass matrix is cross-checked
+against it. Skipped cleanly when SPOT is unavailable (the native path alone
+is covered by test_stepper_matrix.py).
 """
 
 import os
@@ -93,6 +95,22 @@ class TestTraceSatisfactionPerStep(unittest.TestCase):
             expected = spotutils.is_trace_satisfied(trace=trace, formula=subformula)
             self.assertEqual(satisfied, expected, f"subformula {subformula!r}")
 
+    def test_native_matrix_agrees_with_spot_at_every_state(self):
+        # The one-pass matrix must give SPOT's verdict for every subformula
+        # on every suffix trace the per-state path would check.
+        cases = [
+            ("G (a -> F b)", "a & !b; !a & !b; cycle{a & b; !a & !b}"),
+            ("(a U b) | X X !a", "a & !b; a & !b; cycle{!a & b}"),
+            ("F G a <-> G F b", "!a & b; cycle{a & !b; a & b}"),
+        ]
+        for formula, trace in cases:
+            result = stepper.matrixTraceSatisfaction(parse(formula), trace, "Classic")
+            self.assertIsNotNone(result)
+            for state in result.prefix_states + result.cycle_states:
+                for subformula, satisfied in state.getAllSubformulae():
+                    expected = bool(spotutils.is_trace_satisfied(trace=state.trace, formula=subformula))
+                    self.assertEqual(satisfied, expected, f"{subformula!r} on {state.trace!r}")
+
 
 @unittest.skipUnless(SPOT_AVAILABLE, "real SPOT library not available")
 class TestMatrixView(unittest.TestCase):
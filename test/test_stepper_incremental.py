@@ -0,0 +1,151 @@
+"""Tests for incremental stepper re-evaluation after a formula or trace edit.
+
+Every incremental result is compared with a from-scratch evaluation of the
+edited formula and trace.
+
+Run with:
+    python -m pytest test/test_stepper_incremental.py -v
+"""
+
+import os
+import random
+import sys
+import unittest
+from unittest.mock import MagicMock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+sys.modules.setdefault("spot", MagicMock())
+
+from ltlnode import parse_ltl_string as parse
+import stepper
+from stepper import evaluateStepperMatrix, editTraceState
+from traceeval import Lasso, lasso_edit
+
+
+def random_state(rng):
+    return " & ".join(("" if rng.random() < 0.5 else "!") + x for x in "abc")
+
+
+def random_trace(rng, prefix_length, cycle_length):
+    prefix = [random_state(rng) for _ in range(prefix_length)]
+    cycle = [random_state(rng) for _ in range(cycle_length)]
+    return "; ".join(prefix + ["cycle{" + "; ".join(cycle) + "}"])
+
+
+FORMULAS = ["G (a -> F b)", "a U (b | X c)", "(F G a) & X X (b U !c)",
+            "G (a <-> X b) | F (c & X a)", "!(a U b) -> G F c"]
+
+
+class TestLassoEdit(unittest.TestCase):
+
+    def test_prefix_edit(self):
+        edit = lasso_edit(Lasso([{"a"}, set()], [{"b"}]), Lasso([{"a"}, {"c"}], [{"b"}]))
+        self.assertEqual(edit.literals, {"c"})
+        self.assertEqual(edit.last_position, 1)
+
+    def test_cycle_edit(self):
+        edit = lasso_edit(Lasso([{"a"}], [{"b"}]), Lasso([{"b"}], [{"a"}]))
+        self.assertEqual(edit.literals, {"a", "b"})
+        self.assertIsNone(edit.last_position)
+
+    def test_shape_change(self):
+        self.assertIsNone(lasso_edit(Lasso([{"a"}], [{"b"}]), Lasso([], [{"a"}, {"b"}])))
+
+
+class TestEditTraceState(unittest.TestCase):
+
+    def test_prefix_and_cycle_states(self):
+        trace = "a; !a; cycle{a & b}"
+        self.assertEqual(editTraceState(trace, 1, "a"), "a; a; cycle{a & b}")
+        self.assertEqual(editTraceState(trace, 2, " !b "), "a; !a; cycle{!b}")
+        self.assertEqual(editTraceState("cycle{a; b}", 0, "c"), "cycle{c; b}")
+
+    def test_invalid_edits(self):
+        for index, assignment in [(3, "a"), (-1, "a"), ("0", "a"), (0, "a; b"), (0, "cycle{a}"), (0, " ")]:
+            with self.subTest(index=index, assignment=assignment):
+                with self.assertRaises(ValueError):
+                    editTraceState("a; cycle{b}", index, assignment)
+
+
+class TestIncrementalEvaluation(unittest.TestCase):
+
+    def assertSameAsFresh(self, evaluation, node, trace):
+        fresh = evaluateStepperMatrix(node, trace, "Classic")
+        self.assertEqual(evaluation.rows, fresh.rows)
+        self.assertEqual(evaluation.to_json()["matrix"], fresh.to_json()["matrix"])
+
+    def test_unchanged_request_reuses_everything(self):
+        node, trace = parse("G (a -> F b)"), "a & !b; cycle{!a & b}"
+        first = evaluateStepperMatrix(node, trace, "Classic")
+        second = evaluateStepperMatrix(parse("G (a -> F b)"), trace, "Classic", previous=first)
+        self.assertEqual((second.reused, second.recomputed), (5, 0))
+        self.assertEqual(second.rows, first.rows)
+
+    def test_formula_edit_recomputes_only_new_subformulas(self):
+        trace = "a & !b; !a & b; cycle{a & b}"
+        first = evaluateStepperMatrix(parse("(G a) U (F b)"), trace, "Classic")
+        node = parse("(G a) U (X b)")
+        second = evaluateStepperMatrix(node, trace, "Classic", previous=first)
+        # G a, a and b are reused; X b and the root are new.
+        self.assertEqual((second.reused, second.recomputed), (3, 2))
+        self.assertSameAsFresh(second, node, trace)
+
+    def test_state_edit_skips_untouched_literals(self):
+        node = parse("(G a) & F b")
+        first = evaluateStepperMatrix(node, "a & b; a & !b; cycle{a & b}", "Classic")
+        trace = "a & b; a & b; cycle{a & b}"
+        second = evaluateStepperMatrix(node, trace, "Classic", previous=first)
+        self.assertEqual((second.reused, second.recomputed), (2, 3))
+        self.assertSameAsFresh(second, node, trace)
+
+    def test_shape_change_still_reuses_nothing_wrong(self):
+        node = parse("a U b")
+        first = evaluateStepperMatrix(node, "a & !b; cycle{!a & b}", "Classic")
+        trace = "a & !b; a & !b; cycle{!a & b}"
+        second = evaluateStepperMatrix(node, trace, "Classic", previous=first)
+        self.assertEqual(second.reused, 0)
+        self.assertSameAsFresh(second, node, trace)
+
+    def test_random_edits_agree_with_fresh_evaluation(self):
+        rng = random.Random(11)
+        for _ in range(200):
+            prefix_length, cycle_length = rng.randint(0, 6), rng.randint(1, 4)
+            trace = random_trace(rng, prefix_length, cycle_length)
+            node = parse(rng.choice(FORMULAS))
+            previous = evaluateStepperMatrix(node, trace, "Classic")
+            for _ in range(3):
+                if rng.random() < 0.3:
+                    node = parse(rng.choice(FORMULAS))
+                else:
+                    index = rng.randrange(prefix_length + cycle_length)
+                    trace = editTraceState(trace, index, random_state(rng))
+                current = evaluateStepperMatrix(node, trace, "Classic", previous=previous)
+                with self.subTest(formula=str(node), trace=trace):
+                    self.assertSameAsFresh(current, node, trace)
+                previous = current
+
+    def test_json_views_match_the_full_result(self):
+        node, trace = parse("a U (X b)"), "a & !b; a & !b; cycle{!a & b}"
+        evaluation = evaluateStepperMatrix(node, trace, "Classic")
+        result = stepper.matrixTraceSatisfaction(node, trace, "Classic")
+        payload = evaluation.to_json()
+        self.assertEqual(payload["matrix"], result.getMatrixView())
+        self.assertEqual(payload["steps"], result.getStepperViewData()["steps"])
+        self.assertIn('data-node-index="0"', payload["tree_html"])
+
+    def test_not_natively_evaluable(self):
+        self.assertIsNone(evaluateStepperMatrix(parse("a U b"), "a; cycle{b}", "Classic"))
+
+
+class TestEvaluationCache(unittest.TestCase):
+
+    def test_remember_and_recall(self):
+        evaluation = evaluateStepperMatrix(parse("F a"), "cycle{a}", "Classic")
+        token = stepper.rememberEvaluation(evaluation)
+        self.assertIs(stepper.recallEvaluation(token), evaluation)
+        self.assertIsNone(stepper.recallEvaluation("unknown"))
+        self.assertIsNone(stepper.recallEvaluation(None))
+
+
+if __name__ == "__main__":
+    unittest.main()
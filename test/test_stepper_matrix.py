@@ -0,0 +1,91 @@
+"""Tests for the stepper's native path: the whole subformula x state matrix in one pass.
+
+spot is mocked: words whose states fix every literal of the formula are
+evaluated by traceeval without SPOT. Agreement with the SPOT per-state path
+is checked in test_stepper.py when SPOT is available.
+
+Run with:
+    python -m pytest test/test_stepper_matrix.py -v
+"""
+
+import os
+import sys
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+sys.modules.setdefault("spot", MagicMock())
+
+from ltlnode import parse_ltl_string as parse
+import stepper
+from stepper import matrixTraceSatisfaction, traceSatisfactionPerStep
+
+
+class TestMatrixTraceSatisfaction(unittest.TestCase):
+
+    def test_values_per_state(self):
+        result = matrixTraceSatisfaction(parse("G a"), "! a; a; cycle{a}", "Classic")
+        self.assertEqual([s.satisfied for s in result.prefix_states], [False, True])
+        self.assertEqual([s.satisfied for s in result.cycle_states], [True])
+
+    def test_states_carry_their_suffix_trace_and_index(self):
+        trace = "!a & b; a & !b; cycle{!a & !b; a & b}"
+        result = matrixTraceSatisfaction(parse("a U b"), trace, "Classic")
+        states = result.prefix_states + result.cycle_states
+        self.assertEqual([s.traceindex for s in states], [0, 1, 2, 3])
+        self.assertEqual(states[1].trace, "a & !b;cycle{!a & !b;a & b}")
+        self.assertEqual(states[3].trace, "a & b;cycle{!a & !b;a & b}")
+        self.assertEqual(states[1].traceAssignmentStr, "a & !b")
+        self.assertTrue(all(s.originaltrace == trace for s in states))
+
+    def test_subformula_trees(self):
+        result = matrixTraceSatisfaction(parse("a U (X b)"), "a & !b; a & !b; cycle{!a & b}", "Classic")
+        self.assertEqual(result.prefix_states[0].getAllSubformulae(),
+                         [("(a U (X b))", True), ("a", True), ("(X b)", False), ("b", False)])
+        self.assertEqual(result.prefix_states[1].getAllSubformulae(),
+                         [("(a U (X b))", True), ("a", True), ("(X b)", True), ("b", False)])
+
+    def test_syntax_labels(self):
+        result = matrixTraceSatisfaction(parse("G a"), "cycle{a}", "Forge")
+        self.assertEqual(result.cycle_states[0].formula, parse("G a").__forge__())
+
+    def test_views_match_the_tree_walk(self):
+        trace = "!a & b; a & !b; cycle{a & b; !a & !b}"
+        result = matrixTraceSatisfaction(parse("(G a) U (b | X a)"), trace, "Classic")
+        walked = stepper.TraceSatisfactionResult(result.prefix_states, result.cycle_states)
+        self.assertEqual(result.getMatrixView(), walked.getMatrixView())
+        self.assertEqual(result.getStepperViewData(), walked.getStepperViewData())
+
+    def test_repeated_subformula_appears_once_in_the_matrix(self):
+        result = matrixTraceSatisfaction(parse("a & X a"), "!a; cycle{a}", "Classic")
+        view = result.getMatrixView()
+        self.assertEqual(view["subformulae"].count("a"), 1)
+        self.assertEqual(len(result.getStepperViewData()["steps"][0]), 4)
+
+    def test_words_it_cannot_evaluate(self):
+        self.assertIsNone(matrixTraceSatisfaction(parse("a U b"), "a; cycle{b}", "Classic"))
+        self.assertIsNone(matrixTraceSatisfaction(parse("a"), "a | b; cycle{a}", "Classic"))
+        self.assertIsNone(matrixTraceSatisfaction(parse("a"), "a; b", "Classic"))
+        self.assertEqual(matrixTraceSatisfaction(parse("a"), "", "Classic"), [])
+
+    def test_per_step_entry_point_uses_the_matrix(self):
+        with patch.object(stepper, "is_trace_satisfied") as per_state:
+            result = traceSatisfactionPerStep(parse("F (a & b)"), "a & !b; cycle{a & b}", "Classic")
+        per_state.assert_not_called()
+        self.assertIsNotNone(result.rows)
+
+    def test_long_traces_are_interactive(self):
+        states = [("a & !b" if i % 7 else "!a & b") for i in range(400)]
+        trace = "; ".join(states[:300]) + "; cycle{" + "; ".join(states[300:]) + "}"
+        node = parse("G (a -> F b) & (a U (b | X X a))")
+        start = time.perf_counter()
+        result = matrixTraceSatisfaction(node, trace, "Classic")
+        result.getMatrixView()
+        result.getStepperViewData()
+        self.assertLess(time.perf_counter() - start, 2.0)
+        self.assertEqual(len(result.prefix_states) + len(result.cycle_states), 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
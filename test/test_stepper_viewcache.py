@@ -0,0 +1,89 @@
+"""Tests for the cache of finished /stepper views.
+
+Run with:
+    python -m pytest test/test_stepper_viewcache.py -v
+"""
+
+import json
+import os
+import sys
+import unittest
+from unittest.mock import MagicMock, patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+sys.modules.setdefault("spot", MagicMock())
+
+from ltlnode import parse_ltl_string as parse
+import stepper
+from stepper import canonicalStepperTrace, cachedStepperView, cacheStepperView, matrixTraceSatisfaction
+
+
+class TestCanonicalStepperTrace(unittest.TestCase):
+
+    def test_orders_literals_and_whitespace(self):
+        self.assertEqual(canonicalStepperTrace(" b & !a ;  cycle{ (c) & a }"), "!a & b;cycle{a & c}")
+        self.assertEqual(canonicalStepperTrace("a & !b; cycle{1}"), canonicalStepperTrace("!b & a;cycle{ 1 }"))
+
+    def test_keeps_non_conjunctive_states_apart(self):
+        self.assertNotEqual(canonicalStepperTrace("a | b; cycle{a}"), canonicalStepperTrace("a; cycle{a}"))
+        self.assertEqual(canonicalStepperTrace("a  |  b; cycle{a}"), "a | b; cycle{a}")
+
+
+class TestStepperViewCache(unittest.TestCase):
+
+    def setUp(self):
+        cache = stepper.LRUCache(max_entries=16, max_weight=1000, weigh=lambda view: view["cells"], ttl=60)
+        patcher = patch.object(stepper, "_stepperViews", cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _cache(self, ltl, trace, syntax="Classic"):
+        result = matrixTraceSatisfaction(parse(ltl), trace, syntax)
+        return cacheStepperView(parse(ltl), trace, syntax, result)
+
+    def test_view_data(self):
+        view = self._cache("G a", "!a; a; cycle{a}")
+        self.assertEqual(len(view["prefixstates"]), 2)
+        self.assertEqual(len(view["cyclestates"]), 1)
+        self.assertEqual(view["matrix_data"]["subformulae"], ["a", "(G a)"])
+        self.assertEqual(json.loads(view["stepper_steps"]), [[0, 0], [1, 1], [1, 1]])
+        self.assertIn("formula-tree", view["stepper_tree_html"])
+
+    def test_same_submission_hits(self):
+        view = self._cache("G (a -> F b)", "a & !b; cycle{b & !a}")
+        self.assertIs(cachedStepperView(parse("G (a -> F b)"), "a & !b; cycle{b & !a}", "Classic"), view)
+
+    def test_equivalent_spellings_hit(self):
+        view = self._cache("G (a -> F b)", "a & !b; cycle{b & !a}")
+        hit = cachedStepperView(parse("G((a) -> (F b))"), "!b & a;cycle{!a & b}", "Classic")
+        self.assertEqual(hit["matrix_data"], view["matrix_data"])
+        self.assertEqual(hit["stepper_steps"], view["stepper_steps"])
+        stats = stepper.stepperViewCacheStats()
+        self.assertEqual((stats["hits"], stats["entries"]), (1, 1))
+
+    def test_hits_show_the_trace_as_submitted(self):
+        first = self._cache("a U b", "a & !b; cycle{b & !a}")
+        hit = cachedStepperView(parse("a U b"), "!b & a;cycle{!a & b}", "Classic")
+        self.assertEqual([s.traceAssignmentStr for s in hit["prefixstates"] + hit["cyclestates"]],
+                         ["!b & a", "!a & b"])
+        self.assertEqual(hit["prefixstates"][0].children[0].originaltrace, "!b & a;cycle{!a & b}")
+        self.assertEqual([s.formulaAsHTML for s in hit["prefixstates"]],
+                         [s.formulaAsHTML for s in first["prefixstates"]])
+        # The cached entry keeps the first submitter's spelling.
+        self.assertEqual(first["prefixstates"][0].traceAssignmentStr, "a & !b")
+
+    def test_syntax_and_trace_are_part_of_the_key(self):
+        self._cache("G a", "cycle{a}")
+        self.assertIsNone(cachedStepperView(parse("G a"), "cycle{a}", "Forge"))
+        self.assertIsNone(cachedStepperView(parse("G a"), "cycle{!a}", "Classic"))
+        self.assertIsNone(cachedStepperView(parse("F a"), "cycle{a}", "Classic"))
+        self.assertEqual(stepper.stepperViewCacheStats()["misses"], 3)
+
+    def test_weighted_by_matrix_cells(self):
+        view = self._cache("a U b", "a & !b; a & !b; cycle{b & !a}")
+        self.assertEqual(view["cells"], 9)
+        self.assertEqual(stepper.stepperViewCacheStats()["weight"], 9)
+
+
+if __name__ == "__main__":
+    unittest.main()
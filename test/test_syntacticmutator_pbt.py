@@ -70,7 +70,8 @@ class TestApplyRandomMutationProperties(unittest.TestCase):
         node = parse_ltl_string(formula)
         before = str(node)
         sm.applyRandomMutation(node)
-        # applyRandomMutation deep-copies internally; the caller's node is intact.
+        # Nodes are immutable: applyRandomMutation rebuilds only the path to the
+        # mutated site, so the caller's node is intact.
         self.assertEqual(str(node), before)
 
     @settings(max_examples=200, deadline=None)
@@ -141,38 +142,96 @@ class TestOperatorMutators(unittest.TestCase):
         self.assertEqual(str(out.right), "a")
 
 
-class TestNotEquivalentToRetryLogic(unittest.TestCase):
-    """applyRandomMutationNotEquivalentTo's retry-until-distinct logic, tested
-    deterministically by controlling the equivalence oracle (no SPOT needed)."""
+class TestMutationEnumeration(unittest.TestCase):
+    """The finite space of single-site mutations, visited in random order."""
 
-    def test_returns_a_mutation_when_nothing_is_equivalent(self):
+    def test_every_mutation_once(self):
+        node = parse_ltl_string("(a U b) & X a")
+        binops = len(BinaryOperatorNode.__subclasses__())
+        unops = len(UnaryOperatorNode.__subclasses__())
+        # Two binary sites (a swap and every other operator each), one unary site.
+        self.assertEqual(len(list(sm.syntacticMutations(node))), 2 * binops + unops - 1)
+        for seed in range(5):
+            random.seed(seed)
+            mutants = list(sm.randomSyntacticMutations(node))
+            self.assertEqual(len(mutants), len(set(mutants)))
+            self.assertNotIn(node, mutants)
+            self.assertEqual(set(mutants), {sm.mutateAt(l, c) for l, c in sm.syntacticMutations(node)})
+
+    def test_order_is_random(self):
+        node = parse_ltl_string("G (a -> F b)")
+        orders = set()
+        for seed in range(5):
+            random.seed(seed)
+            orders.add(tuple(str(m) for m in sm.randomSyntacticMutations(node)))
+        self.assertGreater(len(orders), 1)
+
+    def test_repeated_subformulas_and_equal_operands(self):
+        # Swapping equal operands changes nothing, so it is not a mutation.
+        self.assertEqual([c for _, c in sm.syntacticMutations(parse_ltl_string("a & a"))].count(None), 0)
+        self.assertEqual(list(sm.randomSyntacticMutations(parse_ltl_string("a"))), [])
+
+
+class TestNotEquivalentToSearch(unittest.TestCase):
+    """applyRandomMutationNotEquivalentTo's search, tested deterministically by
+    controlling the SPOT equivalence oracle (fingerprints are pure Python)."""
+
+    def test_fingerprint_refuted_mutants_need_no_spot(self):
         node = parse_ltl_string("a & b")
-        with patch.object(sm, "isEquivalentToAny", return_value=False):
-            out = sm.applyRandomMutationNotEquivalentTo(node, [node])
-        self.assertIsNotNone(out)
+        for seed in range(20):
+            random.seed(seed)
+            with patch.object(sm, "isEquivalentToAny") as oracle:
+                out = sm.applyRandomMutationNotEquivalentTo(node, [node])
+            oracle.assert_not_called()
+            # b & a means the same as a & b, so it is never picked unchecked.
+            self.assertNotIn(str(out), {"(a & b)", "(b & a)"})
+
+    def _every_mutant_is_an_option(self, node):
+        return [node] + list(sm.randomSyntacticMutations(node))
 
-    def test_returns_none_when_everything_is_equivalent(self):
-        # If every candidate is judged equivalent, it exhausts maxAttempts and
-        # gives up with None (rather than returning a bad distractor or looping).
+    def test_returns_none_with_a_warning_when_everything_is_equivalent(self):
         node = parse_ltl_string("a & b")
-        with patch.object(sm, "isEquivalentToAny", return_value=True):
-            out = sm.applyRandomMutationNotEquivalentTo(node, [node], maxAttempts=10)
+        with patch.object(sm, "isEquivalentToAny", return_value=True), \
+             patch("builtins.print") as warn:
+            out = sm.applyRandomMutationNotEquivalentTo(node, self._every_mutant_is_an_option(node), 1000)
+        self.assertIsNone(out)
+        self.assertIn("equivalent to an existing option", warn.call_args[0][0])
+
+    def test_spot_checks_are_bounded(self):
+        node = parse_ltl_string("G (a U b) | X c")
+        checked = []
+
+        def oracle(mutated, targets):
+            checked.extend(targets)
+            return True
+
+        with patch.object(sm, "isEquivalentToAny", side_effect=oracle), \
+             patch("builtins.print") as warn:
+            out = sm.applyRandomMutationNotEquivalentTo(node, self._every_mutant_is_an_option(node), 10)
         self.assertIsNone(out)
+        self.assertLessEqual(len(checked), 10)
+        self.assertIn("10 equivalence checks", warn.call_args[0][0])
 
-    def test_stops_retrying_early_once_a_distinct_mutation_is_found(self):
-        # The first two candidates look equivalent, then a distinct one appears.
-        # The function must stop promptly rather than burning all maxAttempts.
+    def test_checks_only_against_options_with_the_same_fingerprint(self):
         node = parse_ltl_string("a & b")
-        calls = {"n": 0}
+        options = self._every_mutant_is_an_option(node)
+        swapped = parse_ltl_string("b & a")
+        calls = []
 
-        def oracle(_mutated, _targets):
-            calls["n"] += 1
-            return calls["n"] <= 2  # first two "equivalent", then distinct
+        def oracle(mutated, targets):
+            calls.append((mutated, targets))
+            return mutated is not swapped
 
         with patch.object(sm, "isEquivalentToAny", side_effect=oracle):
-            out = sm.applyRandomMutationNotEquivalentTo(node, [node], maxAttempts=100)
-        self.assertIsNotNone(out)
-        self.assertLessEqual(calls["n"], 4, "did not stop early after finding a distinct mutation")
+            out = sm.applyRandomMutationNotEquivalentTo(node, [o for o in options if o is not swapped])
+        self.assertIs(out, swapped)
+        self.assertIn((swapped, [node]), calls)
+
+    def test_no_mutations_at_all(self):
+        node = parse_ltl_string("a")
+        with patch("builtins.print") as warn:
+            self.assertIsNone(sm.applyRandomMutationNotEquivalentTo(node, [node]))
+        self.assertIn("no syntactic mutations", warn.call_args[0][0])
 
 
 if __name__ == "__main__":
@@ -0,0 +1,138 @@
+"""Tests for traceeval.py -- pure-Python LTL evaluation on lasso traces.
+
+spot is mocked: the evaluator never calls it, and the SPOT fallback of
+is_trace_satisfied is patched. Agreement with SPOT's own
+verdicts is checked in test_spotutils_realspot.py when SPOT is available.
+
+Run with:
+    python -m pytest test/test_traceeval.py -v
+"""
+
+import os
+import sys
+import unittest
+from unittest.mock import MagicMock, patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+sys.modules.setdefault("spot", MagicMock())
+
+from ltlnode import parse_ltl_string
+import traceeval
+from traceeval import Lasso, evaluate, evaluate_positions, parse_trace, trace_to_lasso
+
+
+def holds(formula, prefix, cycle):
+    return evaluate(parse_ltl_string(formula), Lasso(prefix, cycle))
+
+
+class TestEvaluate(unittest.TestCase):
+
+    def test_literals_and_constants(self):
+        self.assertTrue(holds("a", [{"a"}], [set()]))
+        self.assertFalse(holds("b", [{"a"}], [set()]))
+        self.assertTrue(holds("true", [], [set()]))
+        self.assertFalse(holds("0", [], [{"a"}]))
+
+    def test_next_wraps_into_the_cycle(self):
+        self.assertTrue(holds("X a", [], [set(), {"a"}]))
+        self.assertFalse(holds("X X a", [], [set(), {"a"}]))
+        self.assertTrue(holds("X a", [set()], [{"a"}]))
+
+    def test_finally_and_globally(self):
+        self.assertTrue(holds("F a", [set(), set()], [set(), {"a"}]))
+        self.assertFalse(holds("F a", [], [set()]))
+        self.assertTrue(holds("G a", [{"a"}], [{"a", "b"}]))
+        self.assertFalse(holds("G a", [{"a"}], [{"a"}, set()]))
+        self.assertTrue(holds("G F a", [], [set(), set(), {"a"}]))
+        self.assertFalse(holds("F G a", [], [{"a"}, set()]))
+
+    def test_until_needs_its_right_operand_to_occur(self):
+        self.assertTrue(holds("a U b", [{"a"}, {"a"}], [{"b"}]))
+        self.assertFalse(holds("a U b", [], [{"a"}]))
+        self.assertFalse(holds("a U b", [{"a"}, set()], [{"b"}]))
+        # Satisfied only by wrapping around the cycle once.
+        self.assertTrue(holds("a U b", [], [{"a"}, {"a"}, {"b"}]))
+
+    def test_propositional_connectives(self):
+        self.assertTrue(holds("a -> b", [set()], [set()]))
+        self.assertFalse(holds("a -> b", [{"a"}], [set()]))
+        self.assertTrue(holds("a <-> b", [{"a", "b"}], [set()]))
+        self.assertTrue(holds("!(a & b) | c", [{"a"}], [set()]))
+
+    def test_positions_repeat_the_cycle(self):
+        values = evaluate_positions(parse_ltl_string("X a"), Lasso([{"a"}], [set(), {"a"}]))
+        self.assertEqual(values, [False, True, False])
+
+    def test_empty_cycle_is_rejected(self):
+        with self.assertRaises(ValueError):
+            Lasso([{"a"}], [])
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+
+class TestParseTrace(unittest.TestCase):
+
+    def test_prefix_and_cycle(self):
+        self.assertEqual(parse_trace("a & !b; ! a; cycle{a; b}"),
+                         ([{"a": True, "b": False}, {"a": False}], [{"a": True}, {"b": True}]))
+
+    def test_cycle_only_and_true_states(self):
+        self.assertEqual(parse_trace("cycle{1}"), ([], [{}]))
+        self.assertEqual(parse_trace("true; cycle{a}"), ([{}], [{"a": True}]))
+
+    def test_parenthesized_literals(self):
+        self.assertEqual(parse_trace("(! a) & (b); cycle{((a) & !b)}"),
+                         ([{"a": False, "b": True}], [{"a": True, "b": False}]))
+
+    def test_unsupported_words(self):
+        for word in ["a; b", "a | b; cycle{a}", "!(a & b); cycle{a}",
+                     "a & !a; cycle{a}", "cycle{0}", 'cycle{"x y"}', "cycle{}"]:
+            with self.subTest(word):
+                self.assertIsNone(parse_trace(word))
+
+    def test_lasso_needs_every_literal_fixed(self):
+        self.assertEqual(trace_to_lasso("a & !b; cycle{!a & b}", ["a", "b"]),
+                         Lasso([{"a"}], [{"b"}]))
+        self.assertIsNone(trace_to_lasso("a; cycle{!a & b}", ["a", "b"]))
+        # Literals the formula does not mention may be left open or be extra.
+        self.assertEqual(trace_to_lasso("a & c; cycle{!a}", ["a"]), Lasso([{"a", "c"}], [set()]))
+
+
+class TestIsTraceSatisfied(unittest.TestCase):
+
+    def test_native_verdicts(self):
+        with patch("spotutils.is_trace_satisfied") as spot_check:
+            self.assertTrue(traceeval.is_trace_satisfied("!a; cycle{a}", "X G a"))
+            self.assertFalse(traceeval.is_trace_satisfied("!a; cycle{a}", parse_ltl_string("G a")))
+            self.assertTrue(traceeval.is_trace_satisfied("a & !b; cycle{b & !a}", "a U b"))
+        spot_check.assert_not_called()
+
+    def test_falls_back_to_spot(self):
+        with patch("spotutils.is_trace_satisfied", return_value=True) as spot_check:
+            self.assertTrue(traceeval.is_trace_satisfied("a; cycle{b}", "G (a | b)"))
+        spot_check.assert_called_once_with(trace="a; cycle{b}", formula="(G (a | b))")
+
+    def test_spot_gets_the_tutor_reading(self):
+        # SPOT would read these as a & (b U c) and a -> (b -> c).
+        with patch("spotutils.is_trace_satisfied", return_value=True) as spot_check:
+            traceeval.is_trace_satisfied("a; cycle{c}", "a & b U c")
+            traceeval.is_trace_satisfied("a; cycle{c}", "a -> b -> c")
+        self.assertEqual([c.kwargs["formula"] for c in spot_check.call_args_list],
+                         ["((a & b) U c)", "((a -> b) -> c)"])
+
+    def test_precedence_is_the_tutors_on_both_paths(self):
+        # (a & b) U c holds at once where c does; a & (b U c) would need a.
+        self.assertTrue(traceeval.is_trace_satisfied("!a & !b & c; cycle{!a & !b & !c}", "a & b U c"))
+        with patch("spotutils.is_trace_satisfied", return_value=True) as spot_check:
+            self.assertTrue(traceeval.is_trace_satisfied("!a & c; cycle{!c}", "a & b U c"))
+        spot_check.assert_called_once_with(trace="!a & c; cycle{!c}", formula="((a & b) U c)")
+
+    def test_unreadable_formulas_raise(self):
+        with patch("spotutils.is_trace_satisfied") as spot_check:
+            for formula in ["<> a", "a W b"]:  # our parser would drop the unknown operator
+                with self.assertRaises(ValueError):
+                    traceeval.is_trace_satisfied("cycle{a}", formula)
+        spot_check.assert_not_called()
+
@@ -0,0 +1,116 @@
+"""Tests for spotutils' translation profiles and the translation budget.
+
+spot is mocked: `_translated` only needs an object with `translate(level)`,
+and the cache only needs the automaton's size.
+
+Run with:
+    python -m pytest test/test_translation_profiles.py -v
+"""
+
+import os
+import sys
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+sys.modules.setdefault("spot", MagicMock())
+
+import spotutils
+from spotutils import TranslationBudget, LOW, MEDIUM, HIGH
+
+
+class _Formula:
+    def __init__(self, text):
+        self.text = text
+        self.levels = []
+
+    def __str__(self):
+        return self.text
+
+    def translate(self, level):
+        self.levels.append(level)
+        aut = MagicMock()
+        aut.num_states.return_value = 1
+        aut.num_edges.return_value = 1
+        aut.level = level
+        return aut
+
+
+class TestTranslationProfiles(unittest.TestCase):
+
+    def setUp(self):
+        spotutils.clear_translation_cache()
+        self._budget = patch.object(spotutils, "_translation_budget", None)
+        self._budget.start()
+        # The shipped 'check' profile is 'high' until measured; the mechanism
+        # is exercised with a lowered one.
+        self._profiles = patch.dict(spotutils.TRANSLATION_PROFILES, {"check": LOW})
+        self._profiles.start()
+
+    def tearDown(self):
+        self._profiles.stop()
+        self._budget.stop()
+        spotutils.clear_translation_cache()
+
+    def test_unmeasured_profiles_keep_the_default_effort(self):
+        self._profiles.stop()
+        try:
+            self.assertEqual(spotutils.TRANSLATION_PROFILES["check"], HIGH)
+            self.assertEqual(spotutils.TRANSLATION_PROFILES["size"], HIGH)
+        finally:
+            self._profiles.start()
+
+    def test_profiles_choose_the_level(self):
+        f = _Formula("G x")
+        self.assertEqual(spotutils._translated(f, "check").level, LOW)
+        self.assertEqual(spotutils._translated(f, "traces").level, HIGH)
+        self.assertEqual(f.levels, [LOW, HIGH])
+
+    def test_higher_levels_serve_lower_requests(self):
+        f = _Formula("F x")
+        high = spotutils._translated(f, "traces")
+        self.assertIs(spotutils._translated(f, "check"), high)
+        self.assertEqual(f.levels, [HIGH])
+
+    def test_lower_levels_do_not_serve_higher_requests(self):
+        f = _Formula("X x")
+        spotutils._translated(f, "check")
+        self.assertEqual(spotutils._translated(f, "traces").level, HIGH)
+
+    def test_budget_lowers_the_level_under_load(self):
+        budget = TranslationBudget(seconds=1.0, window=60.0)
+        budget.record(1.5)
+        with patch.object(spotutils, "_translation_budget", budget):
+            f = _Formula("x U y")
+            self.assertEqual(spotutils._translated(f, "traces").level, MEDIUM)
+
+
+class TestTranslationBudget(unittest.TestCase):
+
+    def test_within_budget_keeps_the_requested_level(self):
+        budget = TranslationBudget(seconds=1.0, window=60.0)
+        budget.record(0.5)
+        self.assertEqual(budget.level_for(HIGH), HIGH)
+
+    def test_over_budget_lowers_one_step(self):
+        budget = TranslationBudget(seconds=1.0, window=60.0)
+        budget.record(1.5)
+        self.assertEqual(budget.level_for(HIGH), MEDIUM)
+        self.assertEqual(budget.level_for(LOW), LOW)
+
+    def test_far_over_budget_drops_to_low(self):
+        budget = TranslationBudget(seconds=1.0, window=60.0)
+        budget.record(2.5)
+        self.assertEqual(budget.level_for(HIGH), LOW)
+        self.assertEqual(budget.downgrades, 1)
+
+    def test_spending_leaves_the_window(self):
+        budget = TranslationBudget(seconds=1.0, window=0.01)
+        budget.record(5.0)
+        time.sleep(0.02)
+        self.assertEqual(budget.level_for(HIGH), HIGH)
+
+
+if __name__ == "__main__":
+    unittest.main()